@@ -20,6 +20,7 @@ from pathlib import Path
 from typing import Optional, Union
 
 from deeppavlov.core.commands.utils import import_packages, parse_config
+from deeppavlov.core.common.cache import ResultCache
 from deeppavlov.core.common.chainer import Chainer
 from deeppavlov.core.common.params import from_params
 from deeppavlov.download import deep_download
@@ -27,6 +28,15 @@ from deeppavlov.download import deep_download
 log = getLogger(__name__)
 
 
+def _get_cache(cache_config: Union[bool, dict, None]) -> Optional[ResultCache]:
+    """Creates a results cache from the ``cache`` parameter of a chainer or component config."""
+    if not cache_config:
+        return None
+    if cache_config is True:
+        cache_config = {}
+    return ResultCache(**cache_config)
+
+
 def build_model(config: Union[str, Path, dict], mode: str = 'infer',
                 load_trained: bool = False, download: bool = False,
                 serialized: Optional[bytes] = None) -> Chainer:
@@ -43,7 +53,8 @@ def build_model(config: Union[str, Path, dict], mode: str = 'infer',
 
     model_config = config['chainer']
 
-    model = Chainer(model_config['in'], model_config['out'], model_config.get('in_y'))
+    model = Chainer(model_config['in'], model_config['out'], model_config.get('in_y'),
+                    n_workers=model_config.get('n_workers', 0), cache=_get_cache(model_config.get('cache')))
 
     for component_config in model_config['pipe']:
         if load_trained and ('fit_on' in component_config or 'in_y' in component_config):
@@ -65,7 +76,10 @@ def build_model(config: Union[str, Path, dict], mode: str = 'infer',
             c_out = component_config['out']
             in_y = component_config.get('in_y', None)
             main = component_config.get('main', False)
-            model.append(component, c_in, c_out, in_y, main)
+            parallel = component_config.get('parallel', True)
+            component_id = component_config.get('id', component_config.get('ref'))
+            cache = _get_cache(component_config.get('cache'))
+            model.append(component, c_in, c_out, in_y, main, parallel, component_id, cache)
 
     return model
 
@@ -0,0 +1,221 @@
+# Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pickle
+import sys
+import time
+from collections import OrderedDict
+from logging import getLogger
+from threading import RLock
+from typing import Any, Callable, Hashable, List, Optional
+
+import numpy as np
+
+log = getLogger(__name__)
+
+_MISSING = object()
+
+
+def sizeof(obj: Any) -> int:
+    """Returns an approximate size of an object with its contents in bytes."""
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes + sys.getsizeof(obj) * (obj.base is None)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(sizeof(item) for item in obj)
+    elif isinstance(obj, dict):
+        size += sum(sizeof(k) + sizeof(v) for k, v in obj.items())
+    return size
+
+
+class LRUCache:
+    """Thread-safe mapping with least recently used entries eviction.
+
+    Args:
+        max_entries: maximum number of entries, unlimited if ``None``
+        max_bytes: maximum approximate total size of keys and values in bytes, unlimited if ``None``
+        ttl: time to live of an entry in seconds, unlimited if ``None``
+        size_func: function to measure sizes of keys and values in bytes with
+
+    Attributes:
+        max_entries: maximum number of entries
+        max_bytes: maximum approximate total size of keys and values in bytes
+        ttl: time to live of an entry in seconds
+        bytes: approximate total size of keys and values in bytes
+        hits: number of successful lookups
+        misses: number of unsuccessful lookups
+    """
+    def __init__(self, max_entries: Optional[int] = 10000, max_bytes: Optional[int] = None,
+                 ttl: Optional[float] = None, size_func: Callable[[Any], int] = sizeof) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size_func = size_func
+
+        self._data: OrderedDict = OrderedDict()
+        self._lock = RLock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of successful lookups."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
+
+    def get(self, key: Hashable, default: Any = None, count: bool = True) -> Any:
+        """Returns a value for the key or ``default`` if there is no such key or its entry has expired.
+
+        Args:
+            key: key to look up
+            default: value to return if the key is not found
+            count: whether to count the lookup in ``hits`` and ``misses``
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self.ttl is not None and entry[2] < time.monotonic():
+                self._pop(key)
+                entry = None
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            if count:
+                self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Stores the value and evicts least recently used entries if the cache limits are exceeded."""
+        size = self.size_func(key) + self.size_func(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (value, size, expires)
+            self.bytes += size
+            while ((self.max_entries is not None and len(self._data) > self.max_entries) or
+                   (self.max_bytes is not None and self.bytes > self.max_bytes)):
+                self._pop(next(iter(self._data)))
+
+    def _pop(self, key: Hashable) -> None:
+        _, size, _ = self._data.pop(key)
+        self.bytes -= size
+
+    def clear(self) -> None:
+        """Removes all entries and resets the counters."""
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Returns the cache counters as a dict."""
+        return {'entries': len(self._data), 'bytes': self.bytes, 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hit_rate}
+
+
+class ResultCache(LRUCache):
+    """Memoizes outputs of a batch processing function per batch item.
+
+    Only items missing from the cache are sent to the function, so a partially cached batch is processed as
+    a smaller one. Cached values are shared between calls, so they must not be modified in place.
+    Array outputs are collated back into arrays. Rows of batch-padded arrays are zero-padded to the widest
+    row, so their padding may be wider than the one of the same batch processed without the cache.
+
+    Args:
+        max_entries: maximum number of cached items, unlimited if ``None``
+        max_bytes: maximum approximate total size of cached items in bytes, unlimited if ``None``
+        ttl: time to live of a cached item in seconds, unlimited if ``None``
+    """
+    def __init__(self, max_entries: Optional[int] = 10000, max_bytes: Optional[int] = None,
+                 ttl: Optional[float] = None) -> None:
+        super().__init__(max_entries, max_bytes, ttl)
+        self._array_outputs: Optional[List[bool]] = None
+
+    @staticmethod
+    def _key(item: tuple) -> Optional[bytes]:
+        try:
+            return pickle.dumps(item, protocol=4)
+        except Exception:
+            return None
+
+    def __call__(self, func: Callable, batches: List[list], n_outputs: int) -> Any:
+        """Calls ``func(*batches)`` for items which outputs are not cached yet and merges results with cached ones.
+
+        Args:
+            func: function processing input batches
+            batches: input batches of equal length
+            n_outputs: number of the function outputs
+
+        Returns:
+            the function output for all the batches items
+        """
+        if not batches:
+            return func()
+        keys = [self._key(item) for item in zip(*batches)]
+        if None in keys:
+            return func(*batches)
+
+        values = [self.get(key, _MISSING) for key in keys]
+        misses = [i for i, value in enumerate(values) if value is _MISSING]
+
+        if len(misses) == len(keys):
+            result = func(*batches)
+            self._store(result, keys, values, n_outputs)
+            return result
+
+        if misses:
+            result = func(*[[batch[i] for i in misses] for batch in batches])
+            self._store(result, [keys[i] for i in misses], values, n_outputs, misses)
+
+        outputs = list(zip(*values)) if n_outputs > 1 else [values]
+        outputs = [self._collate(list(out), is_array)
+                   for out, is_array in zip(outputs, self._array_outputs or [False] * n_outputs)]
+        return outputs[0] if n_outputs == 1 else tuple(outputs)
+
+    def _store(self, result: Any, keys: List[bytes], values: list, n_outputs: int,
+               indexes: Optional[List[int]] = None) -> None:
+        outputs = [result] if n_outputs == 1 else result
+        self._array_outputs = [isinstance(out, np.ndarray) for out in outputs]
+        for j, key in enumerate(keys):
+            value = tuple(out[j] for out in outputs) if n_outputs > 1 else outputs[0][j]
+            values[indexes[j] if indexes is not None else j] = value
+            self.put(key, value)
+
+    @staticmethod
+    def _collate(items: list, is_array: bool) -> Any:
+        if not is_array:
+            return items
+        shapes = {np.shape(item) for item in items}
+        if len(shapes) == 1:
+            return np.stack(items)
+        if len({len(shape) for shape in shapes}) > 1:
+            raise ValueError(f'Cannot collate cached array outputs with different numbers of dimensions: {shapes}')
+        # rows of batch-padded outputs computed in different batches are zero-padded to the widest one
+        dtype = np.result_type(*{np.asarray(item).dtype for item in items})
+        result = np.zeros((len(items), *np.max(list(shapes), axis=0)), dtype=dtype)
+        for i, item in enumerate(items):
+            result[(i, *(slice(size) for size in np.shape(item)))] = item
+        return result
@@ -13,10 +13,16 @@
 # limitations under the License.
 
 import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+from pathlib import Path
 from logging import getLogger
-from typing import Union, Tuple, List, Optional
+from typing import Union, Tuple, List, Optional, Set, Dict, Callable
 
+from deeppavlov.core.common.cache import LRUCache, ResultCache
 from deeppavlov.core.common.errors import ConfigError
+from deeppavlov.core.common.instrumentation import Instrumentation
 from deeppavlov.core.models.component import Component
 from deeppavlov.core.models.nn_model import NNModel
 from deeppavlov.core.models.serializable import Serializable
@@ -24,6 +30,68 @@ from deeppavlov.core.models.serializable import Serializable
 log = getLogger(__name__)
 
 
+class ExecutionPlan:
+    """Part of a chainer pipe needed to compute given targets from given inputs, prepared to be run many times.
+
+    Variables are kept in a list of slots instead of a dict: inputs take the first slots in the order of
+    ``param_names`` and every other variable name gets its own slot.
+
+    Args:
+        pipe: chainer pipe to compile
+        deps: indexes of components in the pipe each component has to wait for
+        sequential: ids of components that must not be run concurrently with other ones
+        param_names: names of input variables
+        targets: names of variables to compute
+        caches: results caches of components by their ids
+
+    Attributes:
+        param_names: names of input variables
+        targets: names of variables to compute
+        steps: ``(component, in_keys, in_slots, out_slots, cache)`` tuples for components to run in order
+        deps: indexes of steps each step has to wait for
+        sequential: flags of steps that must not be run concurrently with other ones
+        n_slots: number of variable slots
+        target_slots: slots of the targets
+    """
+    __slots__ = ('param_names', 'targets', 'steps', 'deps', 'sequential', 'n_slots', 'target_slots')
+
+    def __init__(self, pipe: list, deps: List[Set[int]], sequential: Set[int],
+                 param_names: List[str], targets: List[str], caches: Optional[Dict[int, ResultCache]] = None) -> None:
+        self.param_names = tuple(param_names)
+        self.targets = tuple(targets)
+
+        expected = set(targets)
+        indexes = []
+        for i in reversed(range(len(pipe))):
+            (_, in_params), out_params, _ = pipe[i]
+            if expected.intersection(out_params):
+                expected = expected - set(out_params) | set(in_params)
+                indexes.append(i)
+        indexes.reverse()
+        if not expected.issubset(param_names):
+            raise RuntimeError(f'{expected} are required to compute {targets} but were not found in memory or inputs')
+
+        slots = {name: i for i, name in enumerate(param_names)}
+        self.steps = []
+        for i in indexes:
+            (in_keys, in_params), out_params, component = pipe[i]
+            in_slots = tuple(slots[name] for name in in_params)
+            for name in out_params:
+                slots.setdefault(name, len(slots))
+            out_slots = tuple(slots[name] for name in out_params)
+            cache = caches.get(id(component)) if caches else None
+            self.steps.append((component, tuple(in_keys), in_slots, out_slots, cache))
+
+        step_indexes = {i: step for step, i in enumerate(indexes)}
+        self.deps = [{step_indexes[j] for j in deps[i] if j in step_indexes} for i in indexes]
+        self.sequential = [id(pipe[i][2]) in sequential for i in indexes]
+        self.n_slots = len(slots)
+        self.target_slots = tuple(slots[name] for name in targets)
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+
 class Chainer(Component):
     """
     Builds an agent/component pipeline from heterogeneous components (Rule-based/ML/DL). It allows to train
@@ -37,17 +105,29 @@ class Chainer(Component):
         in_y: names of additional inputs for pipeline training and evaluation modes
         forward_map: list of all variables in chainer's memory after  running every component in ``self.pipe``
         train_map: list of all variables in chainer's memory after  running every component in ``train_pipe.pipe``
+        pipe_deps: indexes of components in ``self.pipe`` each component has to wait for
+        train_pipe_deps: indexes of components in ``self.train_pipe`` each component has to wait for
         main: reference to the main component
+        n_workers: number of threads to run independent components concurrently with
+        instrumentation: collector of components statistics if instrumentation is enabled
+        cache: results cache of the whole pipeline inference
 
     Args:
         in_x: names of inputs for pipeline inference mode
         out_params: names of pipeline inference outputs
         in_y: names of additional inputs for pipeline training and evaluation modes
+        n_workers: number of threads to run components without data dependencies between them concurrently with,
+            components are run sequentially if it is less than 2
+        cache: results cache of the whole pipeline inference, results are not cached if it is ``None``
     """
     def __init__(self, in_x: Union[str, list] = None, out_params: Union[str, list] = None,
-                 in_y: Union[str, list] = None, *args, **kwargs) -> None:
+                 in_y: Union[str, list] = None, *args, n_workers: int = 0, cache: Optional[ResultCache] = None,
+                 **kwargs) -> None:
         self.pipe: List[Tuple[Tuple[List[str], List[str]], List[str], Component]] = []
         self.train_pipe = []
+        self.pipe_deps: List[Set[int]] = []
+        self.train_pipe_deps: List[Set[int]] = []
+        self._sequential: Set[int] = set()
         if isinstance(in_x, str):
             in_x = [in_x]
         if isinstance(in_y, str):
@@ -63,8 +143,19 @@ class Chainer(Component):
 
         self.main = None
 
+        self.n_workers = n_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._plans: Dict[tuple, ExecutionPlan] = {}
+
+        self.instrumentation: Optional[Instrumentation] = None
+        self._names: Dict[int, Tuple[str, str]] = {}
+
+        self.cache = cache
+        self._caches: Dict[int, ResultCache] = {}
+
     def append(self, component: Component, in_x: [str, list, dict]=None, out_params: [str, list]=None,
-               in_y: [str, list, dict]=None, main=False):
+               in_y: [str, list, dict]=None, main=False, parallel=True, component_id: Optional[str] = None,
+               cache: Optional[ResultCache] = None):
         if isinstance(in_x, str):
             in_x = [in_x]
         if isinstance(in_y, str):
@@ -111,11 +202,19 @@ class Chainer(Component):
             self.process_event = component.process_event
         if main:
             self.main = component
+        if not parallel:
+            self._sequential.add(id(component))
+        self._names.setdefault(id(component), (type(component).__name__, component_id or ''))
+        if cache is not None:
+            self._caches[id(component)] = cache
+        self._plans.clear()
         if self.forward_map.issuperset(in_x):
+            self.pipe_deps.append(self._get_dependencies(self.pipe, in_x, out_params))
             self.pipe.append(((x_keys, in_x), out_params, component))
             self.forward_map = self.forward_map.union(out_params)
 
         if self.train_map.issuperset(in_x):
+            self.train_pipe_deps.append(self._get_dependencies(self.train_pipe, in_x, out_params))
             self.train_pipe.append(((x_keys, in_x), out_params, component))
             self.train_map = self.train_map.union(out_params)
         else:
@@ -143,40 +242,183 @@ class Chainer(Component):
         return self._compute(*args, pipe=pipe, param_names=in_params, targets=targets)
 
     def __call__(self, *args):
+        if self.cache is not None:
+            return self.cache(self._infer, list(args), len(self.out_params))
+        return self._infer(*args)
+
+    def _infer(self, *args):
         return self._compute(*args, param_names=self.in_x, pipe=self.pipe, targets=self.out_params)
 
     @staticmethod
-    def _compute(*args, param_names, pipe, targets):
-        expected = set(targets)
-        final_pipe = []
-        for (in_keys, in_params), out_params, component in reversed(pipe):
-            if expected.intersection(out_params):
-                expected = expected - set(out_params) | set(in_params)
-                final_pipe.append(((in_keys, in_params), out_params, component))
-        final_pipe.reverse()
-        if not expected.issubset(param_names):
-            raise RuntimeError(f'{expected} are required to compute {targets} but were not found in memory or inputs')
-        pipe = final_pipe
+    def _get_dependencies(pipe: list, in_x: List[str], out_params: List[str]) -> Set[int]:
+        """Returns indexes of components in the pipe that have to be run before a component with given
+        inputs and outputs: the ones producing its inputs, reading or producing its outputs."""
+        deps = set()
+        in_x, out_params = set(in_x), set(out_params)
+        for i, ((_, c_in), c_out, _) in enumerate(pipe):
+            if in_x.intersection(c_out) or out_params.intersection(c_in) or out_params.intersection(c_out):
+                deps.add(i)
+        return deps
+
+    def compile(self, targets: Optional[List[str]] = None, param_names: Optional[List[str]] = None,
+                train: bool = False) -> 'ExecutionPlan':
+        """Returns an execution plan for given targets and input names, creating and caching it if needed.
+
+        Args:
+            targets: names of variables to compute, ``self.out_params`` by default
+            param_names: names of input variables, ``self.in_x`` by default
+                (``self.in_x + self.in_y`` if ``train`` is ``True``)
+            train: whether to compile ``self.train_pipe`` instead of ``self.pipe``
 
-        mem = dict(zip(param_names, args))
+        Returns:
+            a cached execution plan
+        """
+        if targets is None:
+            targets = self.out_params
+        if param_names is None:
+            param_names = self.in_x + self.in_y if train else self.in_x
+        pipe = self.train_pipe if train else self.pipe
+        return self._get_plan(pipe, param_names, targets)
+
+    def _get_plan(self, pipe: list, param_names: List[str], targets: List[str]) -> 'ExecutionPlan':
+        key = (pipe is self.train_pipe, tuple(param_names), tuple(targets))
+        plan = self._plans.get(key)
+        if plan is None:
+            deps = self.train_pipe_deps if pipe is self.train_pipe else self.pipe_deps
+            # results are cached only in the inference mode
+            caches = self._caches if pipe is self.pipe else None
+            plan = ExecutionPlan(pipe, deps, self._sequential, param_names, targets, caches)
+            self._plans[key] = plan
+        return plan
+
+    def _compute(self, *args, param_names, pipe, targets):
+        plan = self._get_plan(pipe, param_names, targets)
+
+        mem = list(args)
         del args
+        mem += [None] * (plan.n_slots - len(mem))
 
-        for (in_keys, in_params), out_params, component in pipe:
-            x = [mem[k] for k in in_params]
-            if in_keys:
-                res = component(**dict(zip(in_keys, x)))
-            else:
-                res = component(*x)
-            if len(out_params) == 1:
-                mem[out_params[0]] = res
-            else:
-                mem.update(zip(out_params, res))
+        run = self._run_component
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            start = time.perf_counter()
+            trace = []
+            run = partial(self._run_instrumented, instrumentation, trace)
 
-        res = [mem[k] for k in targets]
+        if self.n_workers > 1 and len(plan.steps) > 1:
+            self._run_parallel(plan, mem, run)
+        else:
+            for step in plan.steps:
+                self._store(mem, step[3], run(mem, step))
+
+        if instrumentation is not None:
+            instrumentation.finish(trace, start)
+
+        res = [mem[i] for i in plan.target_slots]
         if len(res) == 1:
             res = res[0]
         return res
 
+    @staticmethod
+    def _run_component(mem: list, step: tuple):
+        component, in_keys, in_slots, out_slots, cache = step
+        x = [mem[i] for i in in_slots]
+        if cache is not None:
+            return cache(partial(Chainer._call_component, component, in_keys), x, len(out_slots))
+        return Chainer._call_component(component, in_keys, *x)
+
+    @staticmethod
+    def _call_component(component: Component, in_keys: Tuple[str, ...], *batches):
+        if in_keys:
+            return component(**dict(zip(in_keys, batches)))
+        return component(*batches)
+
+    def _run_instrumented(self, instrumentation: Instrumentation, trace: List[dict], mem: list, step: tuple):
+        component, _, in_slots, out_slots, _ = step
+        start = time.perf_counter()
+        res = self._run_component(mem, step)
+        seconds = time.perf_counter() - start
+        key = self._names.get(id(component)) or (type(component).__name__, '')
+        batch = mem[in_slots[0]] if in_slots else None
+        instrumentation.record(trace, key, start, seconds, batch, res, len(out_slots))
+        return res
+
+    def enable_instrumentation(self, trace_path: Optional[Union[str, Path]] = None) -> Instrumentation:
+        """Starts collecting latency and throughput statistics of the pipeline components.
+
+        Args:
+            trace_path: path to a file to append per-call traces to, traces are not saved if it is ``None``
+
+        Returns:
+            statistics collector, also available as ``self.instrumentation``
+        """
+        self.instrumentation = Instrumentation(trace_path)
+        return self.instrumentation
+
+    def disable_instrumentation(self) -> None:
+        """Stops collecting statistics of the pipeline components."""
+        self.instrumentation = None
+
+    def get_caches(self) -> Dict[Tuple[str, str], LRUCache]:
+        """Returns results caches of the pipeline and its components by component class names and ids.
+
+        Internal caches of components which have a ``get_caches`` method are added too.
+        """
+        caches = {}
+        if self.cache is not None:
+            caches[(type(self).__name__, '')] = self.cache
+        for component_id, cache in self._caches.items():
+            caches[self._names[component_id]] = cache
+        for *_, component in self.pipe:
+            if callable(getattr(component, 'get_caches', None)):
+                caches.update(component.get_caches())
+        return caches
+
+    @staticmethod
+    def _store(mem: list, out_slots: Tuple[int, ...], res) -> None:
+        if len(out_slots) == 1:
+            mem[out_slots[0]] = res
+        else:
+            for i, value in zip(out_slots, res):
+                mem[i] = value
+
+    def _run_parallel(self, plan: 'ExecutionPlan', mem: list, run: Callable) -> None:
+        """Runs components in a thread pool as soon as all components they depend on are finished.
+
+        Components appended with ``parallel=False`` are run in the calling thread when no other component is running.
+        Inputs are read and outputs are written to the memory in the calling thread only.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.n_workers)
+
+        steps = plan.steps
+        waiting = {i: plan.deps[i] for i in range(len(steps))}
+        finished = set()
+        running = {}
+        while waiting or running:
+            ready = [i for i in sorted(waiting) if waiting[i].issubset(finished)]
+            concurrent = [i for i in ready if not plan.sequential[i]]
+            if len(concurrent) == 1 and not running:
+                # nothing to run concurrently with, so avoid the thread switching overhead
+                ready = concurrent
+                concurrent = []
+            for i in concurrent:
+                component, in_keys, in_slots, out_slots, cache = steps[i]
+                x = [mem[j] for j in in_slots]
+                running[self._executor.submit(run, x, (component, in_keys, range(len(x)), out_slots, cache))] = i
+                del waiting[i]
+            if not running:
+                i = ready[0]
+                self._store(mem, steps[i][3], run(mem, steps[i]))
+                finished.add(i)
+                del waiting[i]
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = running.pop(future)
+                self._store(mem, steps[i][3], future.result())
+                finished.add(i)
+
     def get_main_component(self) -> Optional[Serializable]:
         try:
             return self.main or self.pipe[-1][-1]
@@ -207,6 +449,9 @@ class Chainer(Component):
             self.train_pipe.clear()
         if hasattr(self, 'pipe'):
             self.pipe.clear()
+        if getattr(self, '_executor', None) is not None:
+            self._executor.shutdown()
+            self._executor = None
         super().destroy()
 
     def serialize(self) -> bytes:
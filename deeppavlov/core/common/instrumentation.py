@@ -0,0 +1,189 @@
+# Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import time
+from collections import OrderedDict
+from logging import getLogger
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+log = getLogger(__name__)
+
+
+class ComponentStats:
+    """Accumulated statistics of a single pipeline component.
+
+    Attributes:
+        calls: number of calls
+        seconds: total wall time of calls
+        max_seconds: maximum wall time of a call
+        batch_items: total number of items in input batches
+        output_items: total number of items in output batches
+    """
+    __slots__ = ('calls', 'seconds', 'max_seconds', 'batch_items', 'output_items')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.
+        self.max_seconds = 0.
+        self.batch_items = 0
+        self.output_items = 0
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Instrumentation:
+    """Collects latency and throughput statistics of :class:`~deeppavlov.core.common.chainer.Chainer` components.
+
+    Statistics are keyed by a component class name and its ``id`` from the config (an empty string if it has none).
+
+    Args:
+        trace_path: path to a file to append per-call traces to in the JSON lines format, traces are not saved if
+            it is ``None``
+
+    Attributes:
+        stats: statistics of every component
+        calls: number of pipeline calls
+        seconds: total wall time of pipeline calls
+        trace_path: path to a file to append per-call traces to
+    """
+    def __init__(self, trace_path: Optional[Union[str, Path]] = None) -> None:
+        self.stats: Dict[Tuple[str, str], ComponentStats] = OrderedDict()
+        self.calls = 0
+        self.seconds = 0.
+        self.trace_path = Path(trace_path).expanduser().resolve() if trace_path else None
+        self._lock = Lock()
+
+    @staticmethod
+    def _batch_size(batch) -> int:
+        try:
+            return len(batch)
+        except TypeError:
+            return 0
+
+    def record(self, trace: List[dict], key: Tuple[str, str], start: float, seconds: float,
+               batch, output, n_outputs: int) -> None:
+        """Adds a component call to the statistics and to the call trace.
+
+        Args:
+            trace: trace of the current pipeline call
+            key: component class name and id
+            start: time of the call start
+            seconds: wall time of the call
+            batch: first input batch of the component
+            output: component output
+            n_outputs: number of the component outputs
+        """
+        batch_size = self._batch_size(batch)
+        output_size = self._batch_size(output if n_outputs == 1 else output[0])
+        with self._lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = ComponentStats()
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.batch_items += batch_size
+            stats.output_items += output_size
+        trace.append({'component': key[0], 'id': key[1], 'start': start, 'seconds': seconds,
+                      'batch_size': batch_size, 'output_size': output_size})
+
+    def finish(self, trace: List[dict], start: float) -> None:
+        """Adds a pipeline call to the statistics and saves its trace.
+
+        Args:
+            trace: trace of the pipeline call
+            start: time of the pipeline call start
+        """
+        seconds = time.perf_counter() - start
+        with self._lock:
+            self.calls += 1
+            self.seconds += seconds
+            if self.trace_path is not None:
+                for span in trace:
+                    span['start'] -= start
+                record = {'timestamp': time.time(), 'seconds': seconds, 'components': trace}
+                with self.trace_path.open('a', encoding='utf8') as f:
+                    f.write(json.dumps(record) + '\n')
+
+    def reset(self) -> None:
+        """Clears all the statistics."""
+        with self._lock:
+            self.stats.clear()
+            self.calls = 0
+            self.seconds = 0.
+
+    def to_dict(self) -> dict:
+        """Returns the statistics as a JSON serializable dict."""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'seconds': self.seconds,
+                'components': [dict(component=name, id=c_id, **stats.to_dict())
+                               for (name, c_id), stats in self.stats.items()]
+            }
+
+    @staticmethod
+    def _escape(label: str) -> str:
+        return label.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def to_prometheus(self, prefix: str = 'deeppavlov', caches: Optional[Dict[Tuple[str, str], Any]] = None) -> str:
+        """Returns the statistics in the Prometheus text exposition format.
+
+        Args:
+            prefix: prefix of the metrics names
+            caches: results and internal caches to add counters of, by component class names and ids
+        """
+        metrics = [
+            ('component_latency_seconds', 'summary', 'Wall time of component calls',
+             [('_sum', 'seconds'), ('_count', 'calls')]),
+            ('component_latency_seconds_max', 'gauge', 'Maximum wall time of a component call',
+             [('', 'max_seconds')]),
+            ('component_batch_items_total', 'counter', 'Number of items in component input batches',
+             [('', 'batch_items')]),
+            ('component_output_items_total', 'counter', 'Number of items in component output batches',
+             [('', 'output_items')])
+        ]
+        lines = [
+            f'# HELP {prefix}_pipeline_latency_seconds Wall time of pipeline calls',
+            f'# TYPE {prefix}_pipeline_latency_seconds summary'
+        ]
+        with self._lock:
+            lines.append(f'{prefix}_pipeline_latency_seconds_sum {self.seconds}')
+            lines.append(f'{prefix}_pipeline_latency_seconds_count {self.calls}')
+            for name, metric_type, description, values in metrics:
+                lines.append(f'# HELP {prefix}_{name} {description}')
+                lines.append(f'# TYPE {prefix}_{name} {metric_type}')
+                for (component, c_id), stats in self.stats.items():
+                    labels = f'component="{self._escape(component)}",id="{self._escape(c_id)}"'
+                    for suffix, attr in values:
+                        lines.append(f'{prefix}_{name}{suffix}{{{labels}}} {getattr(stats, attr)}')
+
+        cache_metrics = [
+            ('cache_hits_total', 'counter', 'Number of cache hits', 'hits'),
+            ('cache_misses_total', 'counter', 'Number of cache misses', 'misses'),
+            ('cache_entries', 'gauge', 'Number of cache entries', 'entries'),
+            ('cache_bytes', 'gauge', 'Approximate size of cache entries', 'bytes')
+        ]
+        caches_stats = {key: cache.stats() for key, cache in (caches or {}).items()}
+        for name, metric_type, description, stat in cache_metrics if caches_stats else []:
+            lines.append(f'# HELP {prefix}_{name} {description}')
+            lines.append(f'# TYPE {prefix}_{name} {metric_type}')
+            for (component, c_id), stats in caches_stats.items():
+                labels = f'component="{self._escape(component)}",id="{self._escape(c_id)}"'
+                lines.append(f'{prefix}_{name}{{{labels}}} {stats[stat]}')
+        return '\n'.join(lines) + '\n'
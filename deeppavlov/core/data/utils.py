@@ -25,7 +25,7 @@ from hashlib import md5
 from itertools import chain
 from logging import getLogger
 from pathlib import Path
-from typing import List, Union, Iterable, Optional, Sized, Sequence
+from typing import Any, Callable, List, Union, Iterable, Optional, Sized, Sequence
 from urllib.parse import urlencode, parse_qs, urlsplit, urlunsplit, urlparse
 
 import numpy as np
@@ -296,6 +296,57 @@ def zero_pad(batch, zp_batch=None, dtype=np.float32, padding=0):
     return zp_batch
 
 
+def length_buckets(lengths: Sequence[int], bucket_size: int) -> List[np.ndarray]:
+    """Split indexes of batch items sorted by their lengths on buckets of at most ``bucket_size`` items."""
+    order = np.argsort(lengths, kind='stable')
+    return [order[start:start + bucket_size] for start in range(0, len(order), bucket_size)]
+
+
+def predict_bucketed(predict: Callable, inputs: Sequence[np.ndarray], lengths: Sequence[np.ndarray],
+                     bucket_size: int) -> Any:
+    """Predict a batch in buckets of items of similar length with padding of every bucket cut off.
+
+    Items are split on buckets with :func:`length_buckets` by the first of ``lengths``. Every input is cut along
+    its second dimension to the longest of its lengths in a bucket. Outputs of all buckets are put back in
+    the order of the batch: array outputs are zero-padded to the widest bucket, other outputs are returned as lists.
+
+    Args:
+        predict: a function taking cut inputs and returning an output or a tuple of outputs for a bucket
+        inputs: batch inputs padded to the same length
+        lengths: lengths of items of every input
+        bucket_size: a maximum number of items in a bucket
+
+    Returns:
+        the output or the tuple of outputs of ``predict`` for the whole batch
+    """
+    buckets = length_buckets(lengths[0], bucket_size)
+    results = []
+    for ids in buckets:
+        results.append(predict(*[batch[ids, :batch_lengths[ids].max()]
+                                 for batch, batch_lengths in zip(inputs, lengths)]))
+
+    order = np.concatenate(buckets)
+    if not isinstance(results[0], tuple):
+        return _scatter(order, results)
+    return tuple(_scatter(order, outputs) for outputs in zip(*results))
+
+
+def _scatter(order: np.ndarray, outputs: Sequence[Any]) -> Any:
+    if not isinstance(outputs[0], np.ndarray):
+        result = [None] * len(order)
+        for i, item in zip(order, chain(*outputs)):
+            result[i] = item
+        return result
+
+    shape = np.max([output.shape[1:] for output in outputs], axis=0).astype(int)
+    result = np.zeros((len(order), *shape), dtype=outputs[0].dtype)
+    start = 0
+    for output in outputs:
+        result[(order[start:start + len(output)], *(slice(size) for size in output.shape[1:]))] = output
+        start += len(output)
+    return result
+
+
 def is_str_batch(batch):
     while True:
         if isinstance(batch, Iterable):
@@ -37,6 +37,7 @@ class TFModel(NNModel, metaclass=TfModelMeta):
     sess: tf.Session
 
     def __init__(self, *args, **kwargs) -> None:
+        self._assign_ops = {}
         super().__init__(*args, **kwargs)
 
     def load(self, exclude_scopes: tuple = ('Optimizer',)) -> None:
@@ -57,14 +58,19 @@ class TFModel(NNModel, metaclass=TfModelMeta):
         assign_ops = []
         feed_dict = {}
         for var_name, value in weights:
-            var = self.sess.graph.get_tensor_by_name(var_name)
-            value = np.asarray(value)
-            assign_placeholder = tf.placeholder(var.dtype, shape=value.shape)
-            assign_op = tf.assign(var, assign_placeholder)
+            assign_placeholder, assign_op = self._get_assign_op(var_name)
             assign_ops.append(assign_op)
-            feed_dict[assign_placeholder] = value
+            feed_dict[assign_placeholder] = np.asarray(value)
         self.sess.run(assign_ops, feed_dict=feed_dict)
 
+    def _get_assign_op(self, var_name: str) -> Tuple[tf.Tensor, tf.Operation]:
+        """Returns a placeholder and an op assigning its value to the variable, both are created once."""
+        if var_name not in self._assign_ops:
+            var = self.sess.graph.get_tensor_by_name(var_name)
+            assign_placeholder = tf.placeholder(var.dtype.base_dtype, shape=var.get_shape())
+            self._assign_ops[var_name] = assign_placeholder, tf.assign(var, assign_placeholder)
+        return self._assign_ops[var_name]
+
     def save(self, exclude_scopes: tuple = ('Optimizer',)) -> None:
         """Save model parameters to self.save_path"""
         if not hasattr(self, 'sess'):
@@ -215,11 +221,12 @@ class LRScheduledTFModel(TFModel, LRScheduledModel):
 
     @overrides
     def _update_graph_variables(self, learning_rate=None, momentum=None):
+        # Variable.load feeds the value to the variable initializer and does not add ops to the graph
         if learning_rate is not None:
-            self.sess.run(tf.assign(self._lr_var, learning_rate))
+            self._lr_var.load(learning_rate, self.sess)
             # log.info(f"Learning rate = {learning_rate}")
         if momentum is not None:
-            self.sess.run(tf.assign(self._mom_var, momentum))
+            self._mom_var.load(momentum, self.sess)
             # log.info(f"Momentum      = {momentum}")
 
     def get_train_op(self,
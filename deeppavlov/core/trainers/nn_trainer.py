@@ -18,11 +18,12 @@ import time
 from itertools import islice
 from logging import getLogger
 from pathlib import Path
-from typing import List, Tuple, Union, Optional, Iterable
+from typing import Any, Iterator, List, Tuple, Union, Optional, Iterable
 
 from deeppavlov.core.common.errors import ConfigError
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.data.data_learning_iterator import DataLearningIterator
+from deeppavlov.core.data.utils import length_buckets
 from deeppavlov.core.trainers.fit_trainer import FitTrainer
 from deeppavlov.core.trainers.utils import parse_metrics
 
@@ -72,6 +73,8 @@ class NNTrainer(FitTrainer):
         log_on_k_batches: count of random train batches to calculate metrics in log (default is ``1``)
         max_test_batches: maximum batches count for pipeline testing and evaluation, overrides ``log_on_k_batches``,
             ignored if negative (default is ``-1``)
+        bucket_pool_size: how many shuffled train batches are pooled together and regrouped into batches of examples
+            with similar lengths to reduce padding, ignored if less than ``2`` (default is ``0``)
         **kwargs: additional parameters whose names will be logged but otherwise ignored
     """
     def __init__(self, chainer_config: dict, *, batch_size: int = 1,
@@ -88,6 +91,7 @@ class NNTrainer(FitTrainer):
                  validate_first: bool = True,
                  validation_patience: int = 5, val_every_n_epochs: int = -1, val_every_n_batches: int = -1,
                  log_every_n_batches: int = -1, log_every_n_epochs: int = -1, log_on_k_batches: int = 1,
+                 bucket_pool_size: int = 0,
                  **kwargs) -> None:
         super().__init__(chainer_config, batch_size=batch_size, metrics=metrics, evaluation_targets=evaluation_targets,
                          show_examples=show_examples, tensorboard_log_dir=tensorboard_log_dir,
@@ -114,6 +118,7 @@ class NNTrainer(FitTrainer):
         self.log_every_n_epochs = log_every_n_epochs
         self.log_every_n_batches = log_every_n_batches
         self.log_on_k_batches = log_on_k_batches if log_on_k_batches >= 0 else None
+        self.bucket_pool_size = bucket_pool_size
 
         self.max_epochs = epochs
         self.epoch = start_epoch_num
@@ -227,6 +232,25 @@ class NNTrainer(FitTrainer):
             report.update(data)
         self._chainer.process_event(event_name=event_name, data=report)
 
+    @classmethod
+    def _example_length(cls, example: Any) -> int:
+        if isinstance(example, str):
+            return len(example)
+        if isinstance(example, (list, tuple)):
+            return sum(cls._example_length(item) for item in example)
+        return 1
+
+    def _gen_train_batches(self, iterator: DataLearningIterator) -> Iterator[Tuple[tuple, tuple]]:
+        if self.bucket_pool_size < 2 or self.batch_size <= 0:
+            yield from iterator.gen_batches(self.batch_size, data_type='train')
+            return
+
+        for x_pool, y_pool in iterator.gen_batches(self.batch_size * self.bucket_pool_size, data_type='train'):
+            buckets = length_buckets([self._example_length(x) for x in x_pool], self.batch_size)
+            iterator.random.shuffle(buckets)
+            for ids in buckets:
+                yield tuple(x_pool[i] for i in ids), tuple(y_pool[i] for i in ids)
+
     def train_on_batches(self, iterator: DataLearningIterator) -> None:
         """Train pipeline on batches using provided data iterator and initialization parameters"""
         self.start_time = time.time()
@@ -236,7 +260,7 @@ class NNTrainer(FitTrainer):
         while True:
             impatient = False
             self._send_event(event_name='before_train')
-            for x, y_true in iterator.gen_batches(self.batch_size, data_type='train'):
+            for x, y_true in self._gen_train_batches(iterator):
                 self.last_result = self._chainer.train_on_batch(x, y_true)
                 if self.last_result is None:
                     self.last_result = {}
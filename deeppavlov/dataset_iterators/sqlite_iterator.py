@@ -12,7 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import sqlite3
+import threading
 from logging import getLogger
 from pathlib import Path
 from random import Random
@@ -21,6 +23,7 @@ from typing import List, Any, Dict, Optional, Union, Generator, Tuple
 from overrides import overrides
 
 from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.core.common.cache import LRUCache
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.data.data_fitting_iterator import DataFittingIterator
 
@@ -38,25 +41,34 @@ class SQLiteDataIterator(DataFittingIterator):
         batch_size: a number of samples in a single batch
         shuffle: whether to shuffle data during batching
         seed: random seed for data shuffling
+        mmap_size: a maximum number of bytes of the DB file to access with memory mapping
+        cache_size: a number of most recently fetched documents to keep in memory, documents are not cached if
+            it is 0
 
     Attributes:
-        connect: a DB connection
+        connect: a read-only DB connection of the current thread
         db_name: a DB name
         doc_ids: DB document ids
         doc2index: a dictionary of document indices and their titles
         batch_size: a number of samples in a single batch
         shuffle: whether to shuffle data during batching
         random: an instance of :class:`Random` class.
+        cache: an LRU cache of documents contents by their ids or ``None``
 
     """
 
+    MAX_QUERY_PARAMS = 999
+
     def __init__(self, load_path: Union[str, Path], batch_size: Optional[int] = None,
-                 shuffle: Optional[bool] = None, seed: Optional[int] = None, **kwargs) -> None:
+                 shuffle: Optional[bool] = None, seed: Optional[int] = None, mmap_size: int = 2 ** 28,
+                 cache_size: int = 0, **kwargs) -> None:
 
-        load_path = str(expand_path(load_path))
-        logger.info("Connecting to database, path: {}".format(load_path))
+        self.load_path = expand_path(load_path)
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+        logger.info("Connecting to database, path: {}".format(self.load_path))
         try:
-            self.connect = sqlite3.connect(load_path, check_same_thread=False)
+            self.connect
         except sqlite3.OperationalError as e:
             e.args = e.args + ("Check that DB path exists and is a valid DB file",)
             raise e
@@ -69,9 +81,32 @@ class SQLiteDataIterator(DataFittingIterator):
             raise e
         self.doc_ids = self.get_doc_ids()
         self.doc2index = self.map_doc2idx()
+        # worker processes forked from this one (e.g. by the pre-fork server) must not reuse the connection
+        self.close()
         self.batch_size = batch_size
         self.shuffle = shuffle
         self.random = Random(seed)
+        self.cache = LRUCache(max_entries=cache_size) if cache_size > 0 else None
+
+    @property
+    def connect(self) -> sqlite3.Connection:
+        """A read-only connection of the current thread, opened on first access in every process."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(f'{self.load_path.as_uri()}?mode=ro', uri=True, check_same_thread=False)
+            connection.execute('PRAGMA query_only = ON')
+            connection.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+            connection.execute('PRAGMA temp_store = MEMORY')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def close(self) -> None:
+        """Close the DB connection of the current thread, a new one is opened on the next access."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            connection.close()
+        self._local.connection = None
 
     @overrides
     def get_doc_ids(self) -> List[Any]:
@@ -123,14 +158,39 @@ class SQLiteDataIterator(DataFittingIterator):
             document content if success, else raise Exception
 
         """
+        return self.get_doc_contents([doc_id])[0]
+
+    def get_doc_contents(self, doc_ids: List[Any]) -> List[Optional[str]]:
+        """Get contents of documents by their ids with one query per :attr:`MAX_QUERY_PARAMS` distinct ids.
+
+        Args:
+            doc_ids: documents ids, may contain duplicates
+
+        Returns:
+            documents contents in the order of ``doc_ids``, ``None`` for missing documents
+
+        """
+        contents = {}
+        if self.cache is not None:
+            for doc_id in set(doc_ids):
+                content = self.cache.get(doc_id)
+                if content is not None:
+                    contents[doc_id] = content
+
+        missing = list({doc_id: None for doc_id in doc_ids if doc_id not in contents})
         cursor = self.connect.cursor()
-        cursor.execute(
-            "SELECT text FROM {} WHERE id = ?".format(self.db_name),
-            (doc_id,)
-        )
-        result = cursor.fetchone()
+        for start in range(0, len(missing), self.MAX_QUERY_PARAMS):
+            chunk = missing[start:start + self.MAX_QUERY_PARAMS]
+            cursor.execute(
+                "SELECT id, text FROM {} WHERE id IN ({})".format(self.db_name, ', '.join('?' * len(chunk))),
+                chunk
+            )
+            for doc_id, content in cursor.fetchall():
+                contents[doc_id] = content
+                if self.cache is not None:
+                    self.cache.put(doc_id, content)
         cursor.close()
-        return result if result is None else result[0]
+        return [contents.get(doc_id) for doc_id in doc_ids]
 
     @overrides
     def gen_batches(self, batch_size: int, shuffle: bool = None) \
@@ -160,13 +220,13 @@ class SQLiteDataIterator(DataFittingIterator):
             batches = [_doc_ids]
 
         for i, doc_ids in enumerate(batches):
-            docs = [self.get_doc_content(doc_id) for doc_id in doc_ids]
+            docs = self.get_doc_contents(doc_ids)
             doc_nums = [self.doc2index[doc_id] for doc_id in doc_ids]
             yield docs, zip(doc_ids, doc_nums)
 
     def get_instances(self):
         """Get all data"""
         doc_ids = list(self.doc_ids)
-        docs = [self.get_doc_content(doc_id) for doc_id in doc_ids]
+        docs = self.get_doc_contents(doc_ids)
         doc_nums = [self.doc2index[doc_id] for doc_id in doc_ids]
         return docs, zip(doc_ids, doc_nums)
@@ -15,6 +15,7 @@
 from logging import getLogger
 from typing import List, Dict, Union
 
+import numpy as np
 import tensorflow as tf
 from bert_dp.modeling import BertConfig, BertModel
 from bert_dp.optimization import AdamWeightDecayOptimizer
@@ -22,6 +23,7 @@ from bert_dp.preprocessing import InputFeatures
 
 from deeppavlov.core.commands.utils import expand_path
 from deeppavlov.core.common.registry import register
+from deeppavlov.core.data.utils import predict_bucketed
 from deeppavlov.core.models.tf_model import LRScheduledTFModel
 
 logger = getLogger(__name__)
@@ -47,6 +49,8 @@ class BertClassifierModel(LRScheduledTFModel):
         weight_decay_rate: L2 weight decay for `AdamWeightDecayOptimizer`
         pretrained_bert: pretrained Bert checkpoint
         min_learning_rate: min value of learning rate if learning rate decay is used
+        bucket_size: if set, inference batches are sorted by length and processed in buckets of this size,
+            each cut to its longest sequence
     """
     # TODO: add warmup
     # TODO: add head-only pre-training
@@ -54,7 +58,7 @@ class BertClassifierModel(LRScheduledTFModel):
                  one_hot_labels=False, multilabel=False, return_probas=False,
                  attention_probs_keep_prob=None, hidden_keep_prob=None,
                  optimizer=None, num_warmup_steps=None, weight_decay_rate=0.01,
-                 pretrained_bert=None, min_learning_rate=1e-06, **kwargs) -> None:
+                 pretrained_bert=None, min_learning_rate=1e-06, bucket_size=None, **kwargs) -> None:
         super().__init__(**kwargs)
 
         self.return_probas = return_probas
@@ -66,6 +70,7 @@ class BertClassifierModel(LRScheduledTFModel):
         self.optimizer = optimizer
         self.num_warmup_steps = num_warmup_steps
         self.weight_decay_rate = weight_decay_rate
+        self.bucket_size = bucket_size
 
         if self.multilabel and not self.one_hot_labels:
             raise RuntimeError('Use one-hot encoded labels for multilabel classification!')
@@ -234,6 +239,13 @@ class BertClassifierModel(LRScheduledTFModel):
         input_masks = [f.input_mask for f in features]
         input_type_ids = [f.input_type_ids for f in features]
 
+        if self.bucket_size and len(features) > self.bucket_size:
+            lengths = np.sum(input_masks, axis=1)
+            return predict_bucketed(self._predict, [np.array(input_ids), np.array(input_masks),
+                                                    np.array(input_type_ids)], [lengths] * 3, self.bucket_size)
+        return self._predict(input_ids, input_masks, input_type_ids)
+
+    def _predict(self, input_ids, input_masks, input_type_ids) -> np.ndarray:
         feed_dict = self._build_feed_dict(input_ids, input_masks, input_type_ids)
         if not self.return_probas:
             pred = self.sess.run(self.y_predictions, feed_dict=feed_dict)
@@ -12,14 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from logging import getLogger
-from typing import List, Any
+from typing import List, Any, Optional
 
+import numpy as np
 import tensorflow as tf
 from bert_dp.modeling import BertConfig, BertModel
 from bert_dp.optimization import AdamWeightDecayOptimizer
 
 from deeppavlov.core.commands.utils import expand_path
 from deeppavlov.core.common.registry import register
+from deeppavlov.core.data.utils import predict_bucketed
 from deeppavlov.core.models.component import Component
 from deeppavlov.core.models.tf_model import LRScheduledTFModel
 
@@ -47,6 +49,8 @@ class BertNerModel(LRScheduledTFModel):
 ￼       weight_decay_rate: L2 weight decay for `AdamWeightDecayOptimizer`
 ￼       pretrained_bert: pretrained Bert checkpoint
 ￼       min_learning_rate: min value of learning rate if learning rate decay is used
+        bucket_size: if set, inference batches are sorted by length and processed in buckets of this size,
+            each cut to its longest sequence
 ￼   """
     # TODO: add warmup
     # TODO: add head-only pre-training
@@ -63,11 +67,13 @@ class BertNerModel(LRScheduledTFModel):
                  return_probas: bool = False,
                  pretrained_bert: str = None,
                  min_learning_rate: float = 1e-06,
+                 bucket_size: Optional[int] = None,
                  **kwargs) -> None:
         super().__init__(**kwargs)
 
         self.return_probas = return_probas
         self.n_tags = n_tags
+        self.bucket_size = bucket_size
         self.min_learning_rate = min_learning_rate
         self.keep_prob = keep_prob
         self.optimizer = optimizer
@@ -221,6 +227,16 @@ class BertNerModel(LRScheduledTFModel):
                 f"ids({len(ids)}) = {ids}, masks({len(masks)}) = {masks}"\
                 f" should have the same length."
 
+        if self.bucket_size and len(input_ids) > self.bucket_size:
+            input_ids = np.array(input_ids)
+            # subtokens mask is zero for [CLS], [SEP] and continuation subtokens, so lengths are taken from ids
+            nonzero = input_ids != 0
+            lengths = np.where(nonzero.any(axis=1), input_ids.shape[1] - np.argmax(nonzero[:, ::-1], axis=1), 0)
+            return predict_bucketed(self._predict, [input_ids, np.array(input_masks), np.array(input_type_ids)],
+                                    [lengths] * 3, self.bucket_size)
+        return self._predict(input_ids, input_masks, input_type_ids)
+
+    def _predict(self, input_ids, input_masks, input_type_ids) -> np.ndarray:
         feed_dict = self._build_feed_dict(input_ids, input_masks, input_type_ids)
         if not self.return_probas:
             pred = self.sess.run(self.y_predictions, feed_dict=feed_dict)
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
 import json
 import math
 from logging import getLogger
@@ -22,13 +23,15 @@ import tensorflow as tf
 from bert_dp.modeling import BertConfig, BertModel
 from bert_dp.optimization import AdamWeightDecayOptimizer
 from bert_dp.preprocessing import InputFeatures
-from bert_dp.tokenization import FullTokenizer
 
 from deeppavlov import build_model
 from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.core.common.cache import LRUCache
 from deeppavlov.core.common.registry import register
+from deeppavlov.core.data.utils import predict_bucketed
 from deeppavlov.core.models.estimator import Component
 from deeppavlov.core.models.tf_model import LRScheduledTFModel
+from deeppavlov.models.preprocessors.bert_tokenizer import BertTokenizer
 from deeppavlov.models.squad.utils import softmax_mask
 
 logger = getLogger(__name__)
@@ -54,6 +57,8 @@ class BertSQuADModel(LRScheduledTFModel):
         weight_decay_rate: L2 weight decay for `AdamWeightDecayOptimizer`
         pretrained_bert: pretrained Bert checkpoint
         min_learning_rate: min value of learning rate if learning rate decay is used
+        bucket_size: if set, inference batches are sorted by length and processed in buckets of this size,
+            each cut to its longest sequence
     """
 
     def __init__(self, bert_config_file: str,
@@ -63,13 +68,15 @@ class BertSQuADModel(LRScheduledTFModel):
                  optimizer: Optional[str] = None,
                  weight_decay_rate: Optional[float] = 0.01,
                  pretrained_bert: Optional[str] = None,
-                 min_learning_rate: float = 1e-06, **kwargs) -> None:
+                 min_learning_rate: float = 1e-06,
+                 bucket_size: Optional[int] = None, **kwargs) -> None:
         super().__init__(**kwargs)
 
         self.min_learning_rate = min_learning_rate
         self.keep_prob = keep_prob
         self.optimizer = optimizer
         self.weight_decay_rate = weight_decay_rate
+        self.bucket_size = bucket_size
 
         self.bert_config = BertConfig.from_json_file(str(expand_path(bert_config_file)))
 
@@ -257,6 +264,14 @@ class BertSQuADModel(LRScheduledTFModel):
         input_masks = [f.input_mask for f in features]
         input_type_ids = [f.input_type_ids for f in features]
 
+        if self.bucket_size and len(features) > self.bucket_size:
+            lengths = np.sum(input_masks, axis=1)
+            return predict_bucketed(self._predict, [np.array(input_ids), np.array(input_masks),
+                                                    np.array(input_type_ids)], [lengths] * 3, self.bucket_size)
+        return self._predict(input_ids, input_masks, input_type_ids)
+
+    def _predict(self, input_ids, input_masks,
+                 input_type_ids) -> Tuple[np.ndarray, np.ndarray, List[float], List[float]]:
         feed_dict = self._build_feed_dict(input_ids, input_masks, input_type_ids)
         st, end, logits, scores = self.sess.run([self.start_pred, self.end_pred, self.yp_logits, self.yp_score], feed_dict=feed_dict)
         return st, end, logits.tolist(), scores.tolist()
@@ -276,16 +291,23 @@ class BertSQuADInferModel(Component):
 
         we will create two batches with 5 chunks
 
+    Chunks are sorted by their length in subtokens before batching, so chunks of similar length are padded together.
+    Subtoken ids and sentences of recently seen contexts are cached, so popular contexts are not tokenized again:
+    chunks are encoded from the cached ids and passed to BertSQuADModel instead of raw texts.
+
     For each context the best answer is selected via logits or scores from BertSQuADModel.
 
 
     Args:
-        squad_model_config: path to DeepPavlov BertSQuADModel config file
+        squad_model_config: path to DeepPavlov BertSQuADModel config file, the first component of its pipe has to be
+            the Bert preprocessor, it is not built as chunks are encoded by this model
         vocab_file: path to Bert vocab file
         do_lower_case: set True if lowercasing is needed
         max_seq_length: max sequence length in subtokens, including [SEP] and [CLS] tokens
         batch_size: size of batch to use during inference
         lang: either `en` or `ru`, it is used to select sentence tokenizer
+        cache_size: number of most recently seen contexts to keep subtoken ids and sentences for, contexts are not
+            cached if it is 0
 
     """
     def __init__(self, squad_model_config: str,
@@ -293,14 +315,19 @@ class BertSQuADInferModel(Component):
                  do_lower_case: bool,
                  max_seq_length: int = 512,
                  batch_size: int = 10,
-                 lang='en', **kwargs) -> None:
+                 lang='en',
+                 cache_size: int = 10000, **kwargs) -> None:
         config = json.load(open(squad_model_config))
-        config['chainer']['pipe'][0]['max_seq_length'] = max_seq_length
+        # chunks are passed to the model as contexts and already computed preprocessor outputs
+        preprocessor = config['chainer']['pipe'].pop(0)
+        config['chainer']['in'] = [preprocessor['in'][1], preprocessor['out'][0]]
         self.model = build_model(config)
+        self.dynamic_padding = preprocessor.get('dynamic_padding', False)
         self.max_seq_length = max_seq_length
         vocab_file = str(expand_path(vocab_file))
-        self.tokenizer = FullTokenizer(vocab_file=vocab_file, do_lower_case=do_lower_case)
+        self.tokenizer = BertTokenizer(vocab_file=vocab_file, do_lower_case=do_lower_case)
         self.batch_size = batch_size
+        self.cache = LRUCache(max_entries=cache_size) if cache_size > 0 else None
 
         if lang == 'en':
             from nltk import sent_tokenize
@@ -311,6 +338,42 @@ class BertSQuADInferModel(Component):
         else:
             raise RuntimeError('en and ru languages are supported only')
 
+    def _tokenize_context(self, context: str) -> dict:
+        key = hashlib.sha1(context.encode('utf8')).digest()
+        tokenized = self.cache.get(key) if self.cache is not None else None
+        if tokenized is None:
+            tokenized = {'ids': np.array(self.tokenizer.tokenize_with_ids(context)[1], dtype=np.int32)}
+            if self.cache is not None:
+                self.cache.put(key, tokenized)
+        return tokenized
+
+    def _split_context(self, context: str, max_chunk_len: int) -> List[Tuple[str, np.ndarray]]:
+        """Split context on chunks of at most ``max_chunk_len`` subtokens, preserving sentences boundaries.
+
+        Returns:
+            chunks with their subtoken ids
+        """
+        tokenized = self._tokenize_context(context)
+        ids = tokenized['ids']
+        if max_chunk_len <= 0 or len(ids) <= max_chunk_len:
+            return [(context, ids)]
+
+        if 'sentences' not in tokenized:
+            # sentences are split on whitespaces, so subtokens of the context are the ones of its sentences
+            sentences = tuple(self.sent_tokenizer(context))
+            tokenized['sentences'] = sentences
+            tokenized['sentence_ends'] = np.cumsum([len(self.tokenizer.tokenize(s)) for s in sentences])
+        sentences, sentence_ends = tokenized['sentences'], tokenized['sentence_ends']
+
+        number_of_chunks = math.ceil(len(ids) / max_chunk_len)
+        chunks = []
+        start = 0
+        for chunk in np.array_split(np.arange(len(sentences)), number_of_chunks):
+            end = sentence_ends[chunk[-1]] if len(chunk) else start
+            chunks.append((' '.join(sentences[i] for i in chunk), ids[start:end]))
+            start = end
+        return chunks
+
     def __call__(self, contexts: List[str], questions: List[str], **kwargs) -> Tuple[List[str], List[int], List[float]]:
         """get predictions for given contexts and questions
 
@@ -324,34 +387,36 @@ class BertSQuADInferModel(Component):
         """
         batch_indices = []
         contexts_to_predict = []
-        questions_to_predict = []
-        predictions = {}
+        contexts_ids = []
+        questions_ids = []
         for i, (context, question) in enumerate(zip(contexts, questions)):
-            context_subtokens = self.tokenizer.tokenize(context)
-            question_subtokens = self.tokenizer.tokenize(question)
-            max_chunk_len = self.max_seq_length - len(question_subtokens) - 3
-            if max_chunk_len > 0 and len(context_subtokens) < max_chunk_len:
-                number_of_chunks = math.ceil(len(context_subtokens) / max_chunk_len)
-                sentences = self.sent_tokenizer(context)
-                for chunk in np.array_split(sentences, number_of_chunks):
-                    contexts_to_predict += [' '.join(chunk)]
-                    questions_to_predict += [question]
-                    batch_indices += [i]
-            else:
-                contexts_to_predict += [context]
-                questions_to_predict += [question]
+            question_ids = self.tokenizer.tokenize_with_ids(question)[1]
+            max_chunk_len = self.max_seq_length - len(question_ids) - 3
+            for chunk, chunk_ids in self._split_context(context, max_chunk_len):
+                contexts_to_predict += [chunk]
+                contexts_ids += [chunk_ids.tolist()]
+                questions_ids += [question_ids]
                 batch_indices += [i]
 
-        for j in range(0, len(contexts_to_predict), self.batch_size):
-            c_batch = contexts_to_predict[j: j + self.batch_size]
-            q_batch = questions_to_predict[j: j + self.batch_size]
-            ind_batch = batch_indices[j: j + self.batch_size]
-            a_batch, a_st_batch, logits_batch = self.model(c_batch, q_batch)
-            for a, a_st, logits, ind in zip(a_batch, a_st_batch, logits_batch, ind_batch):
-                if ind in predictions:
-                    predictions[ind] += [(a, a_st, logits)]
-                else:
-                    predictions[ind] = [(a, a_st, logits)]
+        order = sorted(range(len(contexts_to_predict)), key=lambda k: len(contexts_ids[k]) + len(questions_ids[k]))
+        chunk_predictions = [None] * len(contexts_to_predict)
+        for j in range(0, len(order), self.batch_size):
+            chunk_batch = order[j: j + self.batch_size]
+            tokens, input_ids, input_masks, input_type_ids = self.tokenizer.encode_ids_batch(
+                [questions_ids[k] for k in chunk_batch], [contexts_ids[k] for k in chunk_batch],
+                self.max_seq_length, self.dynamic_padding)
+            # unique_id is not used
+            features = [InputFeatures(unique_id=0, tokens=tokens[i], input_ids=input_ids[i], input_mask=input_masks[i],
+                                      input_type_ids=input_type_ids[i])
+                        for i in range(len(tokens))]
+            c_batch = [contexts_to_predict[k] for k in chunk_batch]
+            a_batch, a_st_batch, logits_batch = self.model(c_batch, features)
+            for k, a, a_st, logits in zip(chunk_batch, a_batch, a_st_batch, logits_batch):
+                chunk_predictions[k] = (a, a_st, logits)
+
+        predictions = {}
+        for ind, prediction in zip(batch_indices, chunk_predictions):
+            predictions.setdefault(ind, []).append(prediction)
 
         answers, answer_starts, logits = [], [], []
         for ind in sorted(predictions.keys()):
@@ -21,7 +21,7 @@ import numpy as np
 import keras.metrics
 import keras.optimizers
 from keras import backend as K
-from keras.layers import Dense, Input
+from keras.layers import Dense, Embedding, Input
 from keras.layers import concatenate, Activation, Concatenate, Reshape
 from keras.layers.convolutional import Conv1D
 from keras.layers.core import Dropout
@@ -36,6 +36,7 @@ from overrides import overrides
 from deeppavlov.core.common.errors import ConfigError
 from deeppavlov.core.common.file import save_json, read_json
 from deeppavlov.core.common.registry import register
+from deeppavlov.core.data.simple_vocab import SimpleVocabulary
 from deeppavlov.core.models.keras_model import LRScheduledKerasModel
 from deeppavlov.core.layers.keras_layers import additive_self_attention, multiplicative_self_attention
 
@@ -63,6 +64,12 @@ class KerasClassificationModel(LRScheduledKerasModel):
                 longer texts are cut,
                 shorter ones are padded with zeros (pre-padding)
         padding: ``pre`` or ``post`` padding to use
+        emb_matrix: embeddings matrix of a tokens vocabulary, e.g. from
+            :class:`~deeppavlov.models.preprocessors.assemble_embeddings_matrix.EmbeddingsMatrixAssembler`.
+            If given, the model takes token ids instead of embedded tokens and embeds them with a frozen
+            ``Embedding`` layer initialized from the matrix, the row of id 0 is used for padding and is set to zeros.
+        vocab: tokens vocabulary the ``emb_matrix`` is assembled for, used to check that id 0 is ``pad_token``
+        pad_token: token of the ``vocab`` expected to have id 0
 
     Attributes:
         opt: dictionary with all model parameters
@@ -75,6 +82,7 @@ class KerasClassificationModel(LRScheduledKerasModel):
         optimizer: keras.optimizers instance
         classes: list of considered classes
         padding: ``pre`` or ``post`` padding to use
+        emb_matrix: embeddings matrix of a tokens vocabulary or ``None``
     """
 
     def __init__(self, embedding_size: int, n_classes: int,
@@ -86,6 +94,9 @@ class KerasClassificationModel(LRScheduledKerasModel):
                  classes: Optional[Union[list, Generator]] = None,
                  text_size: Optional[int] = None,
                  padding: Optional[str] = "pre",
+                 emb_matrix: Optional[np.ndarray] = None,
+                 vocab: Optional[SimpleVocabulary] = None,
+                 pad_token: str = '<PAD>',
                  **kwargs):
         """
         Initialize model using parameters
@@ -117,6 +128,19 @@ class KerasClassificationModel(LRScheduledKerasModel):
                      **kwargs}
         self.opt = deepcopy(given_opt)
         self.model = None
+        self.emb_matrix = None
+        if emb_matrix is not None:
+            self.emb_matrix = np.array(emb_matrix, dtype=np.float32)
+            if vocab is None:
+                log.warning(f'No `vocab` is given to {self.__class__.__name__}, so it can not be checked that '
+                            f'token id 0 is the padding token. The embedding of id 0 is set to zeros.')
+                self.emb_matrix[0] = 0.
+            elif vocab[0] == pad_token:
+                self.emb_matrix[0] = 0.
+            else:
+                log.warning(f'Token id 0 of the vocabulary is `{vocab[0]}`, not the padding token `{pad_token}`: '
+                            f'padded positions are embedded as `{vocab[0]}`. Add `{pad_token}` as the first '
+                            f'of `special_tokens` of the vocabulary.')
 
         super().__init__(**given_opt)
 
@@ -157,17 +181,43 @@ class KerasClassificationModel(LRScheduledKerasModel):
             raise ConfigError("Padding type {} is not acceptable".format(self.opt['padding']))
         return np.asarray(cutted_batch)
 
-    def check_input(self, texts: List[List[np.ndarray]]) -> np.ndarray:
+    def pad_ids(self, ids: List[List[int]]) -> np.ndarray:
         """
-        Check and convert input to array of tokenized embedded samples
+        Cut token ids to self.opt["text_size"] tokens and pad them with zeros to the longest sample in the batch
 
         Args:
-            texts: list of tokenized embedded text samples
+            ids: list of token ids sequences
+
+        Returns:
+            array of token ids
+        """
+        if self.opt['text_size'] is not None:
+            ids = [sample[:self.opt['text_size']] for sample in ids]
+        features = np.zeros((len(ids), max(max(map(len, ids), default=0), 1)), dtype=np.int32)
+        for i, sample in enumerate(ids):
+            if not len(sample):
+                continue
+            if self.opt["padding"] == "pre":
+                features[i, -len(sample):] = sample
+            elif self.opt["padding"] == "post":
+                features[i, :len(sample)] = sample
+            else:
+                raise ConfigError("Padding type {} is not acceptable".format(self.opt['padding']))
+        return features
+
+    def check_input(self, texts: Union[List[List[np.ndarray]], List[List[int]]]) -> np.ndarray:
+        """
+        Check and convert input to array of tokenized embedded samples or token ids
+
+        Args:
+            texts: list of tokenized embedded text samples or token ids if ``emb_matrix`` is given
 
         Returns:
             array of tokenized embedded texts samples that are cut and padded
         """
-        if self.opt["text_size"] is not None:
+        if self.emb_matrix is not None:
+            features = self.pad_ids(texts)
+        elif self.opt["text_size"] is not None:
             features = self.pad_texts(texts)
         else:
             if len(texts[0]):
@@ -231,6 +281,22 @@ class KerasClassificationModel(LRScheduledKerasModel):
         preds = np.array(self.infer_on_batch(data), dtype="float64").tolist()
         return preds
 
+    def _input(self) -> tuple:
+        """
+        Build input of a model
+
+        Returns:
+            input layer and its embedded output, the same layer if the model takes embedded tokens
+        """
+        if self.emb_matrix is None:
+            inp = Input(shape=(self.opt['text_size'], self.opt['embedding_size']))
+            return inp, inp
+        # samples are padded to the longest one in a batch, so the input length is not fixed
+        inp = Input(shape=(None,), dtype='int32')
+        output = Embedding(*self.emb_matrix.shape, weights=[self.emb_matrix], trainable=False,
+                           name='embedding')(inp)
+        return inp, output
+
     def init_model_from_scratch(self, model_name: str) -> Model:
         """
         Initialize uncompiled model from scratch with given params
@@ -406,8 +472,7 @@ class KerasClassificationModel(LRScheduledKerasModel):
         Returns:
             keras.models.Model: uncompiled instance of Keras Model
         """
-        inp = Input(shape=(self.opt['text_size'], self.opt['embedding_size']))
-        output = inp
+        inp, output = self._input()
 
         if input_projection_size is not None:
             output = Dense(input_projection_size, activation='relu')(output)
@@ -459,8 +524,7 @@ class KerasClassificationModel(LRScheduledKerasModel):
         Returns:
             keras.models.Model: uncompiled instance of Keras Model
         """
-        inp = Input(shape=(self.opt['text_size'], self.opt['embedding_size']))
-        output = inp
+        inp, output = self._input()
 
         if input_projection_size is not None:
             output = Dense(input_projection_size, activation='relu')(output)
@@ -511,8 +575,7 @@ class KerasClassificationModel(LRScheduledKerasModel):
             keras.models.Model: uncompiled instance of Keras Model
         """
 
-        inp = Input(shape=(self.opt['text_size'], self.opt['embedding_size']))
-        output = inp
+        inp, output = self._input()
 
         if input_projection_size is not None:
             output = Dense(input_projection_size, activation='relu')(output)
@@ -568,8 +631,7 @@ class KerasClassificationModel(LRScheduledKerasModel):
             keras.models.Model: uncompiled instance of Keras Model
         """
 
-        inp = Input(shape=(self.opt['text_size'], self.opt['embedding_size']))
-        output = inp
+        inp, output = self._input()
 
         if input_projection_size is not None:
             output = Dense(input_projection_size, activation='relu')(output)
@@ -616,8 +678,7 @@ class KerasClassificationModel(LRScheduledKerasModel):
             keras.models.Model: uncompiled instance of Keras Model
         """
 
-        inp = Input(shape=(self.opt['text_size'], self.opt['embedding_size']))
-        output = inp
+        inp, output = self._input()
 
         if input_projection_size is not None:
             output = Dense(input_projection_size, activation='relu')(output)
@@ -674,8 +735,7 @@ class KerasClassificationModel(LRScheduledKerasModel):
             keras.models.Model: uncompiled instance of Keras Model
         """
 
-        inp = Input(shape=(self.opt['text_size'], self.opt['embedding_size']))
-        output = inp
+        inp, output = self._input()
 
         if input_projection_size is not None:
             output = Dense(input_projection_size, activation='relu')(output)
@@ -686,7 +746,7 @@ class KerasClassificationModel(LRScheduledKerasModel):
                                     dropout=dropout_rate,
                                     recurrent_dropout=rec_dropout_rate))(output)
 
-        output = Reshape(target_shape=(self.opt['text_size'], 2 * units_lstm))(output)
+        output = Reshape(target_shape=(-1, 2 * units_lstm))(output)
         outputs = []
         for i in range(len(kernel_sizes_cnn)):
             output_i = Conv1D(filters_cnn,
@@ -737,8 +797,7 @@ class KerasClassificationModel(LRScheduledKerasModel):
             keras.models.Model: uncompiled instance of Keras Model
         """
 
-        inp = Input(shape=(self.opt['text_size'], self.opt['embedding_size']))
-        output = inp
+        inp, output = self._input()
 
         if input_projection_size is not None:
             output = Dense(input_projection_size, activation='relu')(output)
@@ -800,8 +859,7 @@ class KerasClassificationModel(LRScheduledKerasModel):
             keras.models.Model: uncompiled instance of Keras Model
         """
 
-        inp = Input(shape=(self.opt['text_size'], self.opt['embedding_size']))
-        output = inp
+        inp, output = self._input()
 
         if input_projection_size is not None:
             output = Dense(input_projection_size, activation='relu')(output)
@@ -853,8 +911,7 @@ class KerasClassificationModel(LRScheduledKerasModel):
             keras.models.Model: uncompiled instance of Keras Model
         """
 
-        inp = Input(shape=(self.opt['text_size'], self.opt['embedding_size']))
-        output = inp
+        inp, output = self._input()
 
         if input_projection_size is not None:
             output = Dense(input_projection_size, activation='relu')(output)
@@ -904,8 +961,7 @@ class KerasClassificationModel(LRScheduledKerasModel):
             keras.models.Model: uncompiled instance of Keras Model
         """
 
-        inp = Input(shape=(self.opt['text_size'], self.opt['embedding_size']))
-        output = inp
+        inp, output = self._input()
 
         if input_projection_size is not None:
             output = Dense(input_projection_size, activation='relu')(output)
@@ -948,9 +1004,9 @@ class KerasClassificationModel(LRScheduledKerasModel):
             keras.models.Model: uncompiled instance of Keras Model
         """
 
-        inp = Input(shape=(self.opt['text_size'], self.opt['embedding_size']))
+        inp, output = self._input()
 
-        output = Dropout(rate=dropout_rate)(inp)
+        output = Dropout(rate=dropout_rate)(output)
 
         output, state1, state2 = Bidirectional(GRU(units_gru, activation='tanh',
                                                    return_sequences=True,
@@ -0,0 +1,547 @@
+# Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import json
+import shutil
+import tempfile
+from logging import getLogger
+from pathlib import Path
+from typing import List, Any, Tuple, Optional, Union, Dict
+
+import numpy as np
+from scipy import sparse
+
+from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.core.common.registry import register
+from deeppavlov.core.models.component import Component
+from deeppavlov.core.models.estimator import Estimator
+from deeppavlov.models.vectorizers.hashing_tfidf_vectorizer import HashingTfIdfVectorizer, hash_batch
+from deeppavlov.models.vectorizers.tfidf_index import StringArray, load_tfidf_index
+
+logger = getLogger(__name__)
+
+SCORINGS = ('tfidf', 'bm25')
+
+
+def varint_encode(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode non-negative integers with the variable length (LEB128) byte encoding.
+
+    Args:
+        values: an array of non-negative integers
+
+    Returns:
+        a tuple of encoded bytes and numbers of bytes used for every value
+
+    """
+    values = values.astype(np.uint64)
+    n_bytes = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        n_bytes += rest > 0
+        rest >>= np.uint64(7)
+    starts = np.cumsum(n_bytes) - n_bytes
+    positions = np.arange(n_bytes.sum()) - np.repeat(starts, n_bytes)
+    encoded = (np.repeat(values, n_bytes) >> (np.uint64(7) * positions.astype(np.uint64))) & np.uint64(0x7f)
+    encoded = encoded.astype(np.uint8)
+    encoded[positions != np.repeat(n_bytes - 1, n_bytes)] |= 0x80
+    return encoded, n_bytes
+
+
+def varint_decode(encoded: np.ndarray) -> np.ndarray:
+    """Decode integers encoded with :func:`varint_encode`.
+
+    Args:
+        encoded: encoded bytes
+
+    Returns:
+        an array of decoded integers
+
+    """
+    if not len(encoded):
+        return np.zeros(0, dtype=np.int64)
+    encoded = np.asarray(encoded)
+    ends = np.flatnonzero(encoded < 0x80)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    positions = np.arange(len(encoded)) - np.repeat(starts, ends - starts + 1)
+    values = (encoded & 0x7f).astype(np.int64) << (7 * positions)
+    return np.add.reduceat(values, starts)
+
+
+class InvertedIndex:
+    """Term to documents index with compressed postings stored in memory-mapped files.
+
+    Terms are hashes of n-grams. Postings of a term are its documents numbers sorted and delta-encoded with
+    :func:`varint_encode` and weights of the term in these documents quantized to one byte. Documents titles are
+    stored as a :class:`~deeppavlov.models.vectorizers.tfidf_index.StringArray`.
+
+    Args:
+        path: a path to the index directory
+
+    Attributes:
+        meta: index parameters: a number of documents, hash size, n-gram range and scoring function
+        terms: sorted hashes of the indexed terms
+        idfs: inverse document frequencies of the terms
+        max_weights: maximum weights of the terms, used for weights dequantization and for early termination
+        doc_offsets: offsets of the terms postings in :attr:`doc_bytes`
+        doc_bytes: delta-encoded documents numbers of all postings
+        weight_offsets: offsets of the terms postings in :attr:`weights`
+        weights: quantized weights of all postings
+
+    """
+    META_FILENAME = 'meta.json'
+    ARRAYS = ('terms', 'idfs', 'max_weights', 'doc_offsets', 'doc_bytes', 'weight_offsets', 'weights')
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        with (path / self.META_FILENAME).open(encoding='utf8') as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        for name in self.ARRAYS:
+            setattr(self, name, np.load(str(path / f'{name}.npy'), mmap_mode='r'))
+        self.titles = StringArray.load(path, 'title')
+
+    @property
+    def n_docs(self) -> int:
+        return self.meta['n_docs']
+
+    def title(self, doc_num: int) -> str:
+        """Get a title of a document by its number."""
+        return self.titles[doc_num]
+
+    def postings(self, term_num: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Decode postings of a term.
+
+        Args:
+            term_num: a position of the term in :attr:`terms`
+
+        Returns:
+            a tuple of sorted documents numbers and the term weights in these documents
+
+        """
+        docs = np.cumsum(varint_decode(self.doc_bytes[self.doc_offsets[term_num]:self.doc_offsets[term_num + 1]]))
+        weights = self.weights[self.weight_offsets[term_num]:self.weight_offsets[term_num + 1]]
+        return docs, weights * np.float32(self.max_weights[term_num] / 255)
+
+    def lookup(self, hashes: np.ndarray) -> np.ndarray:
+        """Get positions of terms in :attr:`terms` by their hashes, -1 for terms missing from the index."""
+        positions = np.searchsorted(self.terms, hashes)
+        positions[positions >= len(self.terms)] = 0
+        found = len(self.terms) > 0 and self.terms[positions] == hashes
+        return np.where(found, positions, -1)
+
+    def search(self, term_nums: np.ndarray, query_weights: np.ndarray, top_n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Find documents with the highest sums of query and document term weights products.
+
+        Terms are processed one by one in the order of their maximum score contributions (MaxScore). As soon as
+        the sum of contributions of the remaining terms can not lift a new document above the current
+        ``top_n``-th best score, the remaining postings are used only to update scores of already found documents,
+        and documents that can not get to the top any more are dropped.
+
+        Args:
+            term_nums: positions of the query terms in :attr:`terms`
+            query_weights: weights of the query terms
+            top_n: a number of documents to return
+
+        Returns:
+            a tuple of documents numbers and their scores sorted by score in descending order
+
+        """
+        upper_bounds = query_weights * np.asarray(self.max_weights)[term_nums]
+        order = np.argsort(-upper_bounds, kind='stable')
+        remaining = float(upper_bounds.sum())
+
+        cand_docs = np.zeros(0, dtype=np.int64)
+        cand_scores = np.zeros(0, dtype=np.float32)
+        threshold = 0.
+        adding = True
+
+        for i in order:
+            remaining = max(remaining - float(upper_bounds[i]), 0.)
+            docs, weights = self.postings(term_nums[i])
+            scores = weights * np.float32(query_weights[i])
+
+            if adding:
+                all_docs = np.concatenate([cand_docs, docs])
+                cand_docs, inverse = np.unique(all_docs, return_inverse=True)
+                cand_scores = np.bincount(inverse, weights=np.concatenate([cand_scores, scores])).astype(np.float32)
+            elif len(cand_docs):
+                positions = np.searchsorted(docs, cand_docs)
+                positions[positions >= len(docs)] = 0
+                found = docs[positions] == cand_docs
+                cand_scores[found] += scores[positions[found]]
+
+            if len(cand_scores) > top_n:
+                threshold = max(threshold, float(np.partition(cand_scores, -top_n)[-top_n]))
+                if remaining < threshold:
+                    adding = False
+                    keep = cand_scores + remaining >= threshold
+                    cand_docs, cand_scores = cand_docs[keep], cand_scores[keep]
+
+        if len(cand_scores) > top_n:
+            top = np.argpartition(-cand_scores, top_n)[:top_n]
+        else:
+            top = np.arange(len(cand_scores))
+        top = top[np.lexsort((cand_docs[top], -cand_scores[top]))]
+        return cand_docs[top], cand_scores[top]
+
+    @classmethod
+    def build(cls, path: Union[str, Path], count_matrix: sparse.csr_matrix, titles: List[str],
+              hash_size: int, ngram_range: List[int], scoring: str = 'tfidf', k1: float = 1.2,
+              b: float = 0.75, doc_lengths: Optional[np.ndarray] = None,
+              chunk_size: int = 2 ** 24) -> 'InvertedIndex':
+        """Build an index from a term counts matrix and save it.
+
+        The matrix is processed by chunks of terms, and postings of every chunk are written to disk right away,
+        so a memory-mapped matrix (e.g. merged with
+        :func:`~deeppavlov.models.vectorizers.tfidf_index.merge_counts`) is never loaded into memory as a whole.
+
+        Args:
+            path: a path to the index directory
+            count_matrix: a matrix of terms counts with shape [:attr:`hash_size` X n_documents]
+            titles: documents titles in the order of documents numbers
+            hash_size: a hash size used for terms
+            ngram_range: a range of n-grams used for terms
+            scoring: ``'tfidf'`` for the same scores as :class:`~deeppavlov.models.doc_retrieval.tfidf_ranker.TfidfRanker`
+             or ``'bm25'`` for Okapi BM25 scores
+            k1: BM25 term frequency saturation parameter
+            b: BM25 document length normalization parameter
+            doc_lengths: lengths of the documents in terms for BM25, sums of the ``count_matrix`` columns by default
+            chunk_size: an approximate number of matrix entries processed at once
+
+        Returns:
+            the loaded index
+
+        """
+        if scoring not in SCORINGS:
+            raise ValueError(f'Unknown scoring "{scoring}", use one of {SCORINGS}')
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        count_matrix = sparse.csr_matrix(count_matrix, copy=False)
+        n_terms, n_docs = count_matrix.shape
+        indptr = np.asarray(count_matrix.indptr)
+        # chunks start at terms of every chunk_size-th entry
+        starts = np.searchsorted(indptr, np.arange(0, indptr[-1], chunk_size), side='right') - 1
+        bounds = np.unique(np.concatenate([[0], starts, [n_terms]]))
+        chunks = list(zip(bounds[:-1], bounds[1:]))
+
+        norms = None
+        if scoring == 'bm25':
+            if doc_lengths is None:
+                doc_lengths = np.zeros(n_docs)
+                for start, end in chunks:
+                    chunk = count_matrix[start:end]
+                    doc_lengths += np.bincount(chunk.indices, weights=chunk.data, minlength=n_docs)
+            doc_lengths = np.asarray(doc_lengths, dtype=np.float64)
+            norms = k1 * (1 - b + b * doc_lengths / max(doc_lengths.mean() if n_docs else 0, 1e-9))
+
+        tmp_dir = Path(tempfile.mkdtemp(prefix='postings_', dir=str(path)))
+        try:
+            term_arrays = {name: [] for name in ('terms', 'idfs', 'max_weights', 'doc_freqs', 'n_bytes')}
+            for i, (start, end) in enumerate(chunks):
+                # a copy, so that sorting indices does not write to a memory-mapped matrix
+                chunk = sparse.csr_matrix(count_matrix[start:end], dtype=np.float32, copy=True)
+                postings = cls._chunk_postings(chunk, n_docs, scoring, k1, norms)
+                for name, array in postings.items():
+                    if name in term_arrays:
+                        term_arrays[name].append(array + start if name == 'terms' else array)
+                    else:
+                        np.save(str(tmp_dir / f'{i}_{name}.npy'), array)
+            term_arrays = {name: np.concatenate(arrays) if arrays else np.zeros(0)
+                           for name, arrays in term_arrays.items()}
+
+            weight_offsets = np.concatenate([[0], np.cumsum(term_arrays['doc_freqs'])]).astype(np.int64)
+            doc_offsets = np.concatenate([[0], np.cumsum(term_arrays['n_bytes'])]).astype(np.int64)
+            for name, size in (('doc_bytes', doc_offsets[-1]), ('weights', weight_offsets[-1])):
+                # chunks postings are concatenated right in the memory-mapped output file
+                out = np.lib.format.open_memmap(str(path / f'{name}.npy'), mode='w+', dtype=np.uint8,
+                                                shape=(int(size),))
+                position = 0
+                for i in range(len(chunks)):
+                    array = np.load(str(tmp_dir / f'{i}_{name}.npy'), mmap_mode='r')
+                    out[position:position + len(array)] = array
+                    position += len(array)
+                out.flush()
+                del out
+        finally:
+            shutil.rmtree(str(tmp_dir), ignore_errors=True)
+
+        arrays = {
+            'terms': term_arrays['terms'].astype(np.int64),
+            'idfs': term_arrays['idfs'].astype(np.float32),
+            'max_weights': term_arrays['max_weights'].astype(np.float32),
+            'doc_offsets': doc_offsets,
+            'weight_offsets': weight_offsets
+        }
+        for name, array in arrays.items():
+            np.save(str(path / f'{name}.npy'), array)
+        StringArray.from_strings(titles).save(path, 'title')
+        meta = {'n_docs': n_docs, 'hash_size': hash_size, 'ngram_range': list(ngram_range), 'scoring': scoring,
+                'k1': k1, 'b': b}
+        with (path / cls.META_FILENAME).open('w', encoding='utf8') as f:
+            json.dump(meta, f)
+        logger.info(f'Saved inverted index with {len(arrays["terms"])} terms and {weight_offsets[-1]} postings '
+                    f'to {path}')
+        return cls(path)
+
+    @staticmethod
+    def _chunk_postings(chunk: sparse.csr_matrix, n_docs: int, scoring: str, k1: float,
+                        norms: Optional[np.ndarray]) -> Dict[str, np.ndarray]:
+        """Compute compressed postings of terms of a counts matrix chunk, terms are numbered from the chunk start."""
+        chunk.sum_duplicates()
+        chunk.eliminate_zeros()
+        doc_freqs = np.diff(chunk.indptr)
+        idfs = np.log((n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5))
+        idfs[idfs < 0] = 0
+        term_of_posting = np.repeat(np.arange(chunk.shape[0]), doc_freqs)
+        counts = chunk.data
+        if scoring == 'tfidf':
+            weights = np.log1p(counts) * idfs[term_of_posting]
+        else:
+            weights = idfs[term_of_posting] * counts * (k1 + 1) / (counts + norms[chunk.indices])
+
+        # drop terms that can not contribute to scores
+        nonzero = weights > 0
+        indices = chunk.indices[nonzero].astype(np.int64)
+        weights = weights[nonzero]
+        term_of_posting = term_of_posting[nonzero]
+        terms, doc_freqs = np.unique(term_of_posting, return_counts=True)
+        starts = np.cumsum(doc_freqs) - doc_freqs
+
+        deltas = indices.copy()
+        deltas[1:] -= indices[:-1]
+        deltas[starts] = indices[starts]
+        doc_bytes, n_bytes = varint_encode(deltas)
+
+        if len(weights):
+            n_bytes = np.add.reduceat(n_bytes, starts)
+            max_weights = np.maximum.reduceat(weights, starts)
+        else:
+            n_bytes = max_weights = np.zeros(0)
+        quantized = np.rint(weights / np.repeat(max_weights, doc_freqs) * 255).astype(np.uint8)
+        return {'terms': terms, 'idfs': idfs[terms], 'max_weights': max_weights, 'doc_freqs': doc_freqs,
+                'n_bytes': n_bytes, 'doc_bytes': doc_bytes, 'weights': quantized}
+
+
+@register('inverted_index_ranker')
+class InvertedIndexRanker(Estimator):
+    """Rank documents according to input strings using an inverted index.
+
+    A drop-in replacement for :class:`~deeppavlov.models.doc_retrieval.tfidf_ranker.TfidfRanker` with
+    :class:`~deeppavlov.models.vectorizers.hashing_tfidf_vectorizer.HashingTfIdfVectorizer`, that loads instantly
+    via memory mapping and retrieves top documents with early termination. It can be fitted on documents the same way
+    as the vectorizer or converted from a saved vectorizer matrix with :func:`convert_tfidf_matrix`.
+
+    Args:
+        tokenizer: a tokenizer class, the same as for the documents when fitting
+        top_n: a number of doc ids to return
+        active: whether to return a number specified by :attr:`top_n` (``True``) or all ids
+         (``False``)
+        hash_size: a hash size, power of two
+        scoring: a scoring function to build an index with, ``'tfidf'`` or ``'bm25'``
+        k1: BM25 term frequency saturation parameter
+        b: BM25 document length normalization parameter
+        n_workers: a number of processes to tokenize and count documents in while fitting
+        spill_dir: a directory to keep terms counts of fitted batches and the merged counts matrix in until the
+         index is built, they are kept in memory if it is not set
+        save_path: a path to the index directory to save to
+        load_path: a path to the index directory to load from
+
+    Attributes:
+        tokenizer: instance of a tokenizer class
+        top_n: a number of doc ids to return
+        active: whether to return a number specified by :attr:`top_n` or all ids
+        index: the loaded inverted index
+        counter: a vectorizer counting terms of the fitted documents in the ``train`` mode, the same way as
+         :class:`~deeppavlov.models.vectorizers.hashing_tfidf_vectorizer.HashingTfIdfVectorizer` does
+
+    """
+
+    def __init__(self, tokenizer: Component, top_n: int = 5, active: bool = True, hash_size: int = 2 ** 24,
+                 scoring: str = 'tfidf', k1: float = 1.2, b: float = 0.75, n_workers: int = 0,
+                 spill_dir: Optional[str] = None, save_path: Optional[str] = None, load_path: Optional[str] = None,
+                 **kwargs) -> None:
+        super().__init__(save_path=save_path, load_path=load_path, mode=kwargs.get('mode', 'infer'))
+        if scoring not in SCORINGS:
+            raise ValueError(f'Unknown scoring "{scoring}", use one of {SCORINGS}')
+
+        self.tokenizer = tokenizer
+        self.top_n = top_n
+        self.active = active
+        self.hash_size = hash_size
+        self.scoring = scoring
+        self.k1 = k1
+        self.b = b
+
+        self.index: Optional[InvertedIndex] = None
+        self.counter: Optional[HashingTfIdfVectorizer] = None
+
+        if kwargs.get('mode', 'infer') == 'infer':
+            self.load()
+        else:
+            self.counter = HashingTfIdfVectorizer(tokenizer, hash_size, n_workers=n_workers, spill_dir=spill_dir,
+                                                  mode='train')
+
+    def __call__(self, questions: List[str]) -> Tuple[List[List[Any]], List[np.ndarray]]:
+        """Rank documents and return top n document titles with scores.
+
+        Args:
+            questions: list of queries used in ranking
+
+        Returns:
+            a tuple of selected doc ids and their scores
+
+        """
+        thresh = min(self.top_n if self.active else self.index.n_docs, self.index.n_docs)
+        batch_doc_ids, batch_docs_scores = [], []
+        batch_hashes, lengths = hash_batch(list(self.tokenizer(questions)), self.hash_size)
+        for hashes in np.split(batch_hashes, np.cumsum(lengths)[:-1]):
+            hashes, q_counts = np.unique(hashes, return_counts=True)
+            term_nums = self.index.lookup(hashes)
+            found = term_nums >= 0
+            term_nums, q_counts = term_nums[found], q_counts[found]
+            if self.index.meta['scoring'] == 'tfidf':
+                query_weights = np.log1p(q_counts) * np.asarray(self.index.idfs)[term_nums]
+            else:
+                query_weights = q_counts.astype(np.float32)
+
+            docs, scores = self.index.search(term_nums, query_weights, thresh)
+            if len(docs) < thresh:
+                # fill the rest with documents having zero scores
+                candidates = np.arange(thresh + len(docs))
+                zero_docs = candidates[~np.isin(candidates, docs)][:thresh - len(docs)]
+                docs = np.concatenate([docs, zero_docs])
+                scores = np.concatenate([scores, np.zeros(len(zero_docs), dtype=np.float32)])
+
+            # add a small value to eliminate zero scores
+            batch_docs_scores.append(scores + 0.0001)
+            batch_doc_ids.append([self.index.title(i) for i in docs])
+        return batch_doc_ids, batch_docs_scores
+
+    def partial_fit(self, docs: List[str], doc_ids: List[Any], doc_nums: List[int]) -> None:
+        """Partially fit on one batch.
+
+        Args:
+            docs: a list of input documents
+            doc_ids: a list of document ids corresponding to input documents
+            doc_nums: a list of document integer ids as they appear in a database
+
+        Returns:
+            None
+
+        Raises:
+            ValueError if a document is fitted more than once.
+
+        """
+        self.counter.partial_fit(docs, doc_ids, doc_nums)
+
+    def fit(self, docs: List[str], doc_ids: List[Any], doc_nums: List[int]) -> None:
+        """Fit the ranker.
+
+        Args:
+            docs: a list of input documents
+            doc_ids: a list of document ids corresponding to input documents
+            doc_nums: a list of document integer ids as they appear in a database
+
+        Returns:
+            None
+
+        """
+        self.counter.fit(docs, doc_ids, doc_nums)
+
+    def save(self) -> None:
+        """Merge counts of the fitted documents, build the inverted index from them and save it."""
+        logger.info(f'Saving inverted index to {self.save_path}')
+        spill_dir = self.counter.spill_dir
+        counts_dir = Path(tempfile.mkdtemp(prefix='count_matrix_', dir=str(spill_dir))) if spill_dir else None
+        titles = [''] * len(self.counter.doc_index)
+        for title, i in self.counter.doc_index.items():
+            titles[i] = str(title)
+        try:
+            count_matrix, _, doc_lengths = self.counter.merge_batches(out_dir=counts_dir, tfidf=False)
+            self.index = InvertedIndex.build(self.save_path, count_matrix, titles, self.hash_size,
+                                             self.tokenizer.ngram_range, self.scoring, self.k1, self.b, doc_lengths)
+        finally:
+            self.counter.reset()
+            if counts_dir is not None:
+                shutil.rmtree(str(counts_dir), ignore_errors=True)
+
+    def load(self) -> None:
+        """Memory-map the inverted index.
+
+        Raises:
+            FileNotFoundError if :attr:`load_path` doesn't exist.
+
+        """
+        if not self.load_path or not (self.load_path / InvertedIndex.META_FILENAME).exists():
+            raise FileNotFoundError(f'Inverted index is not found in {self.load_path}')
+        logger.info(f'Loading inverted index from {self.load_path}')
+        self.index = InvertedIndex(self.load_path)
+        self.hash_size = self.index.meta['hash_size']
+        self.scoring = self.index.meta['scoring']
+
+
+def convert_tfidf_matrix(tfidf_path: Union[str, Path], index_path: Union[str, Path], scoring: str = 'tfidf',
+                         k1: float = 1.2, b: float = 0.75) -> InvertedIndex:
+    """Build an inverted index from a matrix saved by
+    :class:`~deeppavlov.models.vectorizers.hashing_tfidf_vectorizer.HashingTfIdfVectorizer`.
+
+    Terms counts are recovered from the tf-idf values. Counts of terms with zero idf can not be recovered, so BM25
+    scoring needs documents lengths saved with the matrix, which matrices saved by older versions do not have.
+
+    Args:
+        tfidf_path: a path to the **.npz** tf-idf matrix or to a tf-idf index directory
+        index_path: a path to the index directory
+        scoring: ``'tfidf'`` or ``'bm25'``
+        k1: BM25 term frequency saturation parameter
+        b: BM25 document length normalization parameter
+
+    Returns:
+        the built index
+
+    Raises:
+        ValueError if BM25 scoring is requested for a matrix saved without documents lengths.
+
+    """
+    tfidf_matrix, opts = load_tfidf_index(expand_path(tfidf_path))
+    if scoring == 'bm25' and opts['doc_lengths'] is None:
+        raise ValueError(f'{tfidf_path} has no documents lengths needed for BM25 scoring, fit the vectorizer again '
+                         f'or use tf-idf scoring')
+
+    n_docs = tfidf_matrix.shape[1]
+    term_freqs = np.asarray(opts['term_freqs']).squeeze()
+    idfs = np.log((n_docs - term_freqs + 0.5) / (term_freqs + 0.5))
+    idfs[idfs < 0] = 0
+    row_idfs = np.repeat(idfs, np.diff(tfidf_matrix.indptr))
+    counts = np.zeros(len(tfidf_matrix.data), dtype=np.float32)
+    positive = row_idfs > 0
+    counts[positive] = np.rint(np.expm1(tfidf_matrix.data[positive] / row_idfs[positive]))
+    count_matrix = sparse.csr_matrix((counts, tfidf_matrix.indices, tfidf_matrix.indptr), shape=tfidf_matrix.shape)
+
+    titles = [''] * n_docs
+    for title, i in opts['doc_index'].items():
+        titles[i] = str(title)
+    return InvertedIndex.build(expand_path(index_path), count_matrix, titles, opts['hash_size'],
+                               opts['ngram_range'], scoring, k1, b, opts['doc_lengths'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert a HashingTfIdfVectorizer matrix to an inverted index')
+    parser.add_argument('tfidf_path', help='path to the .npz tf-idf matrix or to a tf-idf index directory', type=str)
+    parser.add_argument('index_path', help='path to the index directory', type=str)
+    parser.add_argument('--scoring', help='scoring function', type=str, default='tfidf', choices=SCORINGS)
+    parser.add_argument('--k1', help='BM25 k1 parameter', type=float, default=1.2)
+    parser.add_argument('--b', help='BM25 b parameter', type=float, default=0.75)
+    args = parser.parse_args()
+    convert_tfidf_matrix(args.tfidf_path, args.index_path, args.scoring, args.k1, args.b)
@@ -26,8 +26,9 @@ logger = getLogger(__name__)
 
 @register("logit_ranker")
 class LogitRanker(Component):
-    """Select best answer using squad model logits. Make several batches for a single batch, send each batch
-     to the squad model separately and get a single best answer for each batch.
+    """Select best answer using squad model logits. Contexts of all the questions of a batch are sorted by length
+     and sent to the squad model in batches of :attr:`batch_size`, then a single best answer is selected for every
+     question.
 
      Args:
         squad_model: a loaded squad model
@@ -64,15 +65,23 @@ class LogitRanker(Component):
                       ' Instead of returning Tuple(List[str], List[float] will return'
                       ' Tuple(List[List[str]], List[List[float]]).', FutureWarning)
 
+        flat_contexts = [context for contexts in contexts_batch for context in contexts]
+        flat_questions = [question for questions in questions_batch for question in questions]
+        # contexts of similar length go to the same squad model batch to reduce padding
+        order = sorted(range(len(flat_contexts)), key=lambda j: len(flat_contexts[j]))
+        flat_results = [None] * len(flat_contexts)
+        for i in range(0, len(order), self.batch_size):
+            ids = order[i: i + self.batch_size]
+            batch_predict = zip(*self.squad_model([flat_contexts[j] for j in ids], [flat_questions[j] for j in ids]))
+            for j, result in zip(ids, batch_predict):
+                flat_results[j] = result
+
         batch_best_answers = []
         batch_best_answers_scores = []
-        for contexts, questions in zip(contexts_batch, questions_batch):
-            results = []
-            for i in range(0, len(contexts), self.batch_size):
-                c_batch = contexts[i: i + self.batch_size]
-                q_batch = questions[i: i + self.batch_size]
-                batch_predict = zip(*self.squad_model(c_batch, q_batch))
-                results += batch_predict
+        start = 0
+        for contexts in contexts_batch:
+            results = flat_results[start: start + len(contexts)]
+            start += len(contexts)
             if self.sort_noans:
                 results = sorted(results, key=lambda x: (x[0] != '', x[2]), reverse=True)
             else:
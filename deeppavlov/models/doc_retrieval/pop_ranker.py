@@ -13,16 +13,18 @@
 # limitations under the License.
 
 from logging import getLogger
-from operator import itemgetter
-from typing import List, Any, Tuple
+from typing import List, Any, Tuple, Optional
 
 import numpy as np
+from scipy.special import expit
 from sklearn.externals import joblib
 
 from deeppavlov.core.commands.utils import expand_path
 from deeppavlov.core.common.file import read_json
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.estimator import Component
+from deeppavlov.models.vectorizers.hashing_tfidf_vectorizer import HashingTfIdfVectorizer
+from deeppavlov.models.vectorizers.tfidf_index import StringIndex
 
 logger = getLogger(__name__)
 
@@ -44,9 +46,13 @@ class PopRanker(Component):
         top_n: a number of doc ids to return
         active: whether to return a number specified by :attr:`top_n` (``True``) or all ids
          (``False``)
+        vectorizer: a vectorizer of the TF-IDF Ranker, if it is given, popularities are stored in an array
+         aligned with its documents index instead of the json map
 
     Attributes:
-        pop_dict: a map of article titles to their popularity
+        pop_dict: a map of article titles to their popularity, ``None`` if :attr:`pops` are used
+        pops: popularities of articles by their numbers in the vectorizer documents index or ``None``
+        doc_index: the vectorizer documents index or ``None``
         mean_pop: mean popularity of all popularities in :attr:`pop_dict`, use it when popularity is not found
         clf: a loaded logistic regression classifier
         top_n: a number of doc ids to return
@@ -55,16 +61,64 @@ class PopRanker(Component):
     """
 
     def __init__(self, pop_dict_path: str, load_path: str, top_n: int = 3, active: bool = True,
-                 **kwargs) -> None:
+                 vectorizer: Optional[HashingTfIdfVectorizer] = None, **kwargs) -> None:
         pop_dict_path = expand_path(pop_dict_path)
         logger.info(f"Reading popularity dictionary from {pop_dict_path}")
         self.pop_dict = read_json(pop_dict_path)
         self.mean_pop = np.mean(list(self.pop_dict.values()))
+        self.pops = None
+        self.doc_index = None
+        if vectorizer is not None:
+            self.doc_index = vectorizer.doc_index
+            self.pops = np.full(len(self.doc_index), self.mean_pop)
+            nums = self._get_doc_nums(list(self.pop_dict))
+            found = nums >= 0
+            self.pops[nums[found]] = np.fromiter(self.pop_dict.values(), dtype=float, count=len(nums))[found]
+            self.pop_dict = None
         load_path = expand_path(load_path)
         logger.info(f"Loading popularity ranker from {load_path}")
         self.clf = joblib.load(load_path)
         self.top_n = top_n
         self.active = active
+        self._logistic = self._is_logistic()
+
+    def _get_pops(self, doc_ids: List[Any]) -> np.ndarray:
+        if self.pops is None:
+            return np.fromiter((self.pop_dict.get(idx, self.mean_pop) for idx in doc_ids), dtype=float,
+                               count=len(doc_ids))
+        nums = self._get_doc_nums(doc_ids)
+        found = nums >= 0
+        pops = np.full(len(doc_ids), self.mean_pop)
+        pops[found] = self.pops[nums[found]]
+        return pops
+
+    def _get_doc_nums(self, doc_ids: List[Any]) -> np.ndarray:
+        if isinstance(self.doc_index, StringIndex):
+            return self.doc_index.find(doc_ids)
+        return np.fromiter((self.doc_index.get(idx, -1) for idx in doc_ids), dtype=np.int64, count=len(doc_ids))
+
+    def _is_logistic(self) -> bool:
+        """Check on probe features that ``predict_proba`` of the classifier is the logistic function of its
+        linear decision function, as for a binary one-vs-rest logistic regression."""
+        coef = getattr(self.clf, 'coef_', None)
+        if coef is None or coef.shape[0] != 1 or not hasattr(self.clf, 'intercept_'):
+            return False
+        scores, pops = np.meshgrid([0., 0.01, 0.5, 1., 10.], [0., 1., 100., 1e4, 1e6])
+        features = np.stack([scores.ravel(), pops.ravel(), (scores * pops).ravel()], axis=1)
+        try:
+            probas = self.clf.predict_proba(features)[:, 1]
+        except AttributeError:
+            return False
+        return np.allclose(self._logistic_proba(features), probas, rtol=1e-6, atol=1e-9)
+
+    def _logistic_proba(self, features: np.ndarray) -> np.ndarray:
+        return expit(features @ self.clf.coef_[0] + self.clf.intercept_[0])
+
+    def _predict_proba(self, features: np.ndarray) -> np.ndarray:
+        if self._logistic:
+            # binary logistic regression evaluated without the sklearn per-call overhead
+            return self._logistic_proba(features)
+        return self.clf.predict_proba(features)[:, 1]
 
     def __call__(self, input_doc_ids: List[List[Any]], input_doc_scores: List[List[float]]) -> \
             Tuple[List[List], List[List]]:
@@ -79,25 +133,26 @@ class PopRanker(Component):
             top doc ids of pop ranker and their corresponding scores
 
         """
+        lengths = [len(instance_ids) for instance_ids in input_doc_ids]
+        flat_ids = [idx for instance_ids in input_doc_ids for idx in instance_ids]
+        scores = np.fromiter((score for instance_scores in input_doc_scores for score in instance_scores),
+                             dtype=float, count=len(flat_ids))
+        pops = self._get_pops(flat_ids)
+        features = np.stack([scores, pops, scores * pops], axis=1)
+        probas = self._predict_proba(features) if len(flat_ids) else np.zeros(0)
+
         batch_ids = []
         batch_scores = []
-        for instance_ids, instance_scores in zip(input_doc_ids, input_doc_scores):
-            instance_probas = []
-            for idx, score in zip(instance_ids, instance_scores):
-                pop = self.pop_dict.get(idx, self.mean_pop)
-                features = [score, pop, score * pop]
-                prob = self.clf.predict_proba([features])
-                instance_probas.append(prob[0][1])
-
-            sort = sorted(enumerate(instance_probas), key=itemgetter(1), reverse=True)
-            sorted_probas = [item[1] for item in sort]
-            sorted_ids = [instance_ids[item[0]] for item in sort]
-
+        start = 0
+        for length in lengths:
+            instance_probas = probas[start:start + length]
+            # sort by descending probability keeping the input order of equal ones, also at the top_n cut
+            top = np.argsort(-instance_probas, kind='stable')
             if self.active:
-                sorted_ids = sorted_ids[:self.top_n]
-                sorted_probas = sorted_probas[:self.top_n]
+                top = top[:self.top_n]
 
-            batch_ids.append(sorted_ids)
-            batch_scores.append(sorted_probas)
+            batch_ids.append([flat_ids[start + i] for i in top])
+            batch_scores.append(instance_probas[top].tolist())
+            start += length
 
         return batch_ids, batch_scores
@@ -62,26 +62,47 @@ class TfidfRanker(Component):
         batch_doc_ids, batch_docs_scores = [], []
 
         q_tfidfs = self.vectorizer(questions)
-
-        for q_tfidf in q_tfidfs:
-            scores = q_tfidf * self.vectorizer.tfidf_matrix
-            scores = np.squeeze(
-                scores.toarray() + 0.0001)  # add a small value to eliminate zero scores
-
-            if self.active:
-                thresh = self.top_n
+        # a single sparse product for the whole batch, scores of every question are a sparse row
+        scores = (q_tfidfs * self.vectorizer.tfidf_matrix).tocsr()
+        n_docs = scores.shape[1]
+
+        if self.active:
+            thresh = self.top_n
+        else:
+            thresh = len(self.vectorizer.doc_index)
+        thresh = min(thresh, n_docs)
+
+        for i in range(scores.shape[0]):
+            row_scores = scores.data[scores.indptr[i]:scores.indptr[i + 1]]
+            row_ids = scores.indices[scores.indptr[i]:scores.indptr[i + 1]]
+
+            if thresh < len(row_scores):
+                o = np.argpartition(-row_scores, thresh)[:thresh]
             else:
-                thresh = len(self.vectorizer.doc_index)
+                o = np.arange(len(row_scores))
+            o = o[np.argsort(-row_scores[o], kind='stable')]
+            o_sort = row_ids[o]
+            doc_scores = row_scores[o]
 
-            if thresh >= len(scores):
-                o = np.argpartition(-scores, len(scores) - 1)[0:thresh]
-            else:
-                o = np.argpartition(-scores, thresh)[0:thresh]
-            o_sort = o[np.argsort(-scores[o])]
+            if len(o_sort) < thresh:
+                o_sort, doc_scores = self._fill_with_zero_scored(o_sort, doc_scores, row_ids, thresh)
 
-            doc_scores = scores[o_sort]
+            # add a small value to eliminate zero scores
+            doc_scores = doc_scores + 0.0001
             doc_ids = [self.vectorizer.index2doc[i] for i in o_sort]
             batch_doc_ids.append(doc_ids)
             batch_docs_scores.append(doc_scores)
 
         return batch_doc_ids, batch_docs_scores
+
+    @staticmethod
+    def _fill_with_zero_scored(o_sort: np.ndarray, doc_scores: np.ndarray, nonzero_ids: np.ndarray,
+                               thresh: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Append ids of documents with zero scores to get :attr:`top_n` documents in total."""
+        n_missing = thresh - len(o_sort)
+        # there are at least n_missing documents without score among the first n_missing + n_nonzero ones
+        candidates = np.arange(n_missing + len(nonzero_ids))
+        zero_ids = candidates[~np.isin(candidates, nonzero_ids)][:n_missing]
+        o_sort = np.concatenate([o_sort, zero_ids])
+        doc_scores = np.concatenate([doc_scores, np.zeros(len(zero_ids), dtype=doc_scores.dtype)])
+        return o_sort, doc_scores
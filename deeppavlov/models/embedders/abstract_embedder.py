@@ -15,12 +15,12 @@
 from abc import ABCMeta, abstractmethod
 from logging import getLogger
 from pathlib import Path
-from typing import List, Union, Iterator
+from typing import Dict, Iterator, List, Tuple, Union
 
 import numpy as np
 from overrides import overrides
 
-from deeppavlov.core.data.utils import zero_pad
+from deeppavlov.core.common.cache import LRUCache
 from deeppavlov.core.models.component import Component
 from deeppavlov.core.models.serializable import Serializable
 
@@ -34,21 +34,24 @@ class Embedder(Component, Serializable, metaclass=ABCMeta):
     Args:
         load_path: path where to load pre-trained embedding model from
         pad_zero: whether to pad samples or not
+        cache_bytes: maximum approximate size of cached tokens embeddings in bytes, embeddings are not cached
+            if it is 0
 
     Attributes:
         model: model instance
-        tok2emb: dictionary with already embedded tokens
+        tok2emb: LRU cache of already embedded tokens or ``None``
         dim: dimension of embeddings
         pad_zero: whether to pad sequence of tokens with zeros or not
         mean: whether to return one mean embedding vector per sample
         load_path: path with pre-trained fastText binary model
     """
-    def __init__(self, load_path: Union[str, Path], pad_zero: bool = False, mean: bool = False, **kwargs) -> None:
+    def __init__(self, load_path: Union[str, Path], pad_zero: bool = False, mean: bool = False,
+                 cache_bytes: int = 2 ** 27, **kwargs) -> None:
         """
         Initialize embedder with given parameters
         """
         super().__init__(save_path=None, load_path=load_path)
-        self.tok2emb = {}
+        self.tok2emb = LRUCache(max_entries=None, max_bytes=cache_bytes) if cache_bytes > 0 else None
         self.pad_zero = pad_zero
         self.mean = mean
         self.dim = None
@@ -63,21 +66,64 @@ class Embedder(Component, Serializable, metaclass=ABCMeta):
         raise NotImplementedError
 
     @overrides
-    def __call__(self, batch: List[List[str]], mean: bool = None) -> List[Union[list, np.ndarray]]:
+    def __call__(self, batch: List[List[str]], mean: bool = None) -> Union[List[Union[list, np.ndarray]], np.ndarray]:
         """
         Embed sentences from batch
 
+        Unique tokens of the whole batch are embedded at once and gathered into a zero padded
+        ``[batch_size, max_len, dim]`` array.
+
         Args:
             batch: list of tokenized text samples
             mean: whether to return mean embedding of tokens per sample
 
         Returns:
-            embedded batch
+            embedded batch, an array if ``pad_zero`` is True
         """
-        batch = [self._encode(sample, mean) for sample in batch]
+        if mean is None:
+            mean = self.mean
+        if not batch:
+            return []
+
+        index = {}
+        ids = np.zeros((len(batch), max(map(len, batch))), dtype=np.int64)
+        for i, sample in enumerate(batch):
+            ids[i, :len(sample)] = [index.setdefault(t, len(index) + 1) for t in sample]
+        # row 0 is a zero vector of padding
+        vectors = np.zeros((len(index) + 1, self.dim), dtype=np.float32)
+        vectors[1:] = self._get_cached_vectors(list(index))
+        embedded = vectors[ids]
+
+        if mean:
+            nonzero = vectors.any(axis=1)[ids].sum(axis=1, keepdims=True, dtype=np.float32)
+            means = embedded.sum(axis=1) / np.maximum(nonzero, 1)
+            return means if self.pad_zero else list(means)
         if self.pad_zero:
-            batch = zero_pad(batch)
-        return batch
+            return embedded
+        return [list(sample[:len(tokens)]) for sample, tokens in zip(embedded, batch)]
+
+    def _get_cached_vectors(self, tokens: List[str]) -> np.ndarray:
+        """Get embeddings of unique tokens from the cache and embed the missing ones with one call."""
+        if self.tok2emb is None:
+            return self._get_word_vectors(tokens)
+        vectors = np.empty((len(tokens), self.dim), dtype=np.float32)
+        missing = []
+        for i, t in enumerate(tokens):
+            emb = self.tok2emb.get(t)
+            if emb is None:
+                missing.append(i)
+            else:
+                vectors[i] = emb
+        if missing:
+            missing_tokens = [tokens[i] for i in missing]
+            vectors[missing] = self._get_word_vectors(missing_tokens)
+            for i, t in zip(missing, missing_tokens):
+                self.tok2emb.put(t, vectors[i].copy())
+        return vectors
+
+    def get_caches(self) -> Dict[Tuple[str, str], LRUCache]:
+        """Returns the tokens embeddings cache to report its hit rate and size with pipeline metrics."""
+        return {(type(self).__name__, 'tok2emb'): self.tok2emb} if self.tok2emb is not None else {}
 
     @abstractmethod
     def __iter__(self) -> Iterator[str]:
@@ -100,36 +146,20 @@ class Embedder(Component, Serializable, metaclass=ABCMeta):
             embedding vector
         """
 
-    def _encode(self, tokens: List[str], mean: bool) -> Union[List[np.ndarray], np.ndarray]:
+    def _get_word_vectors(self, tokens: List[str]) -> np.ndarray:
         """
-        Embed one text sample
+        Embed words using ``self.model``, unknown words get zero vectors
 
         Args:
-            tokens: tokenized text sample
-            mean: whether to return mean embedding of tokens per sample
+            tokens: list of words
 
         Returns:
-            list of embedded tokens or array of mean values
+            embeddings matrix with shape [len(tokens), dim]
         """
-        embedded_tokens = []
-        for t in tokens:
+        vectors = np.zeros((len(tokens), self.dim), dtype=np.float32)
+        for i, t in enumerate(tokens):
             try:
-                emb = self.tok2emb[t]
+                vectors[i] = self._get_word_vector(t)
             except KeyError:
-                try:
-                    emb = self._get_word_vector(t)
-                except KeyError:
-                    emb = np.zeros(self.dim, dtype=np.float32)
-                self.tok2emb[t] = emb
-            embedded_tokens.append(emb)
-
-        if mean is None:
-            mean = self.mean
-
-        if mean:
-            filtered = [et for et in embedded_tokens if np.any(et)]
-            if filtered:
-                return np.mean(filtered, axis=0)
-            return np.zeros(self.dim, dtype=np.float32)
-
-        return embedded_tokens
+                pass
+        return vectors
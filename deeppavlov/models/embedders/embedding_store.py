@@ -0,0 +1,294 @@
+# Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import json
+from logging import getLogger
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
+from tqdm import tqdm
+
+from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.models.vectorizers.tfidf_index import StringArray, StringIndex
+
+log = getLogger(__name__)
+
+META_FILENAME = 'meta.json'
+
+_FNV_OFFSET = 2166136261
+_FNV_PRIME = 16777619
+
+
+def fasttext_hash(ngram: bytes) -> int:
+    """Hash a character n-gram the same way as fastText does."""
+    h = _FNV_OFFSET
+    for byte in ngram:
+        # fastText xors bytes cast to int8 and then to uint32, so non-ASCII bytes are sign-extended
+        h = ((h ^ (byte | 0xFFFFFF00 if byte & 0x80 else byte)) * _FNV_PRIME) & 0xFFFFFFFF
+    return h
+
+
+def fasttext_subword_ids(word: str, minn: int, maxn: int, bucket: int) -> List[int]:
+    """Get buckets of character n-grams of a word the same way as fastText does for out-of-vocabulary words."""
+    encoded = f'<{word}>'.encode('utf8')
+    ids = []
+    for i in range(len(encoded)):
+        if encoded[i] & 0xC0 == 0x80:
+            continue
+        j, n = i, 1
+        while j < len(encoded) and n <= maxn:
+            j += 1
+            while j < len(encoded) and encoded[j] & 0xC0 == 0x80:
+                j += 1
+            if n >= minn and not (n == 1 and (i == 0 or j == len(encoded))):
+                ids.append(fasttext_hash(encoded[i:j]) % bucket)
+            n += 1
+    return ids
+
+
+class EmbeddingStore:
+    """Embeddings stored in a directory of raw arrays which are memory-mapped on loading.
+
+    Vectors of all tokens are rows of one float32 or float16 matrix, and tokens are looked up in a sorted index,
+    so a store loads in milliseconds and processes using the same store share it in the page cache.
+    Vectors of out-of-vocabulary words are built from character n-grams if the store is converted from a fastText
+    model with subwords.
+
+    A store can be used in place of both gensim ``KeyedVectors`` and a fastText model by embedders.
+
+    Args:
+        path: a path to the store directory
+
+    Attributes:
+        path: a path to the store directory
+        vocab: a mapping of tokens to rows of ``vectors``
+        vectors: a matrix of tokens vectors
+        subword_vectors: a matrix of character n-grams vectors or ``None``
+        dim: a dimension of vectors
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self._load()
+
+    def _load(self) -> None:
+        with (self.path / META_FILENAME).open(encoding='utf8') as f:
+            meta = json.load(f)
+        self.dim = meta['dim']
+        self.subwords = meta.get('subwords')
+        tokens = StringArray.load(self.path, 'tokens')
+        self.vocab = StringIndex(tokens, np.load(str(self.path / 'tokens_order.npy'), mmap_mode='r'))
+        self.vectors = np.load(str(self.path / 'vectors.npy'), mmap_mode='r')
+        self.subword_vectors = None
+        if self.subwords is not None:
+            self.subword_vectors = np.load(str(self.path / 'subword_vectors.npy'), mmap_mode='r')
+
+    @property
+    def vector_size(self) -> int:
+        return self.dim
+
+    def __len__(self) -> int:
+        return len(self.vocab)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.vocab)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self.vocab
+
+    def __getitem__(self, token: str) -> np.ndarray:
+        """Get a vector of a token, raise ``KeyError`` for unknown tokens without n-grams in the store."""
+        row = self.vocab.get(token)
+        if row is not None:
+            return np.array(self.vectors[row], dtype=np.float32)
+        if self.subword_vectors is None:
+            raise KeyError(token)
+        ids = fasttext_subword_ids(token, self.subwords['minn'], self.subwords['maxn'], self.subwords['bucket'])
+        if not ids:
+            return np.zeros(self.dim, dtype=np.float32)
+        return self.subword_vectors[np.array(ids)].astype(np.float32).mean(axis=0)
+
+    def get_vectors(self, tokens: List[str]) -> np.ndarray:
+        """Get vectors of tokens with one gather from the matrix, unknown tokens without n-grams get zero vectors.
+
+        Args:
+            tokens: list of tokens
+
+        Returns:
+            float32 matrix with shape [len(tokens), dim]
+        """
+        result = np.zeros((len(tokens), self.dim), dtype=np.float32)
+        rows = [self.vocab.get(token) for token in tokens]
+        known = [i for i, row in enumerate(rows) if row is not None]
+        if known:
+            result[known] = self.vectors[[rows[i] for i in known]]
+        if self.subword_vectors is not None and len(known) < len(tokens):
+            for i in set(range(len(tokens))).difference(known):
+                result[i] = self[tokens[i]]
+        return result
+
+    def get_dimension(self) -> int:
+        return self.dim
+
+    def get_words(self) -> Iterator[str]:
+        return iter(self.vocab)
+
+    def get_word_vector(self, word: str) -> np.ndarray:
+        """Get a vector of a word, it is zero for unknown words without n-grams in the store as in fastText."""
+        try:
+            return self[word]
+        except KeyError:
+            return np.zeros(self.dim, dtype=np.float32)
+
+    def __getstate__(self) -> dict:
+        return {'path': self.path}
+
+    def __setstate__(self, state: dict) -> None:
+        self.path = state['path']
+        self._load()
+
+    @staticmethod
+    def is_store(path: Union[str, Path]) -> bool:
+        """Check whether a path is an embeddings store directory."""
+        return (Path(path) / META_FILENAME).is_file()
+
+    @staticmethod
+    def _save_tokens(path: Path, tokens: List[str]) -> None:
+        StringArray.from_strings(tokens).save(path, 'tokens')
+        np.save(str(path / 'tokens_order.npy'), StringIndex.sort_order(tokens))
+
+    @staticmethod
+    def _save_meta(path: Path, meta: dict) -> None:
+        with (path / META_FILENAME).open('w', encoding='utf8') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def from_word2vec_text(cls, src: Union[str, Path], path: Union[str, Path],
+                           dtype: str = 'float32') -> 'EmbeddingStore':
+        """Convert embeddings in the word2vec text format with a header line to a store.
+
+        Args:
+            src: a path to the text file
+            path: a path to the store directory
+            dtype: a type of stored vectors, ``float32`` or ``float16``
+
+        Returns:
+            the converted store
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        with open(str(src), encoding='utf8', errors='ignore') as f:
+            n_tokens, dim = map(int, f.readline().split())
+            vectors = np.lib.format.open_memmap(str(path / 'vectors.npy'), mode='w+', dtype=dtype,
+                                                shape=(n_tokens, dim))
+            tokens, seen = [], set()
+            for line in tqdm(f, total=n_tokens, desc=f'Converting {src}'):
+                parts = line.rstrip().split(' ')
+                if len(parts) != dim + 1 or parts[0] in seen:
+                    continue
+                if len(tokens) == n_tokens:
+                    raise ValueError(f'{src} has more vectors than {n_tokens} stated in its header')
+                vectors[len(tokens)] = np.array(parts[1:], dtype=np.float32)
+                seen.add(parts[0])
+                tokens.append(parts[0])
+        vectors.flush()
+        del vectors
+        if len(tokens) < n_tokens:
+            # duplicated and malformed lines are skipped, so the preallocated matrix is truncated
+            vectors = np.load(str(path / 'vectors.npy'))[:len(tokens)]
+            np.save(str(path / 'vectors.npy'), vectors)
+
+        cls._save_tokens(path, tokens)
+        cls._save_meta(path, {'dim': dim, 'dtype': dtype, 'subwords': None})
+        return cls(path)
+
+    @classmethod
+    def from_fasttext(cls, src: Union[str, Path], path: Union[str, Path], dtype: str = 'float32') -> 'EmbeddingStore':
+        """Convert a fastText binary model to a store.
+
+        Vectors of the model words and of character n-grams are saved, so vectors of out-of-vocabulary words
+        are the same as the ones computed by fastText.
+
+        Args:
+            src: a path to the **.bin** model
+            path: a path to the store directory
+            dtype: a type of stored vectors, ``float32`` or ``float16``
+
+        Returns:
+            the converted store
+        """
+        import fastText
+
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        model = fastText.load_model(str(src))
+        words = model.get_words()
+        dim = model.get_dimension()
+
+        vectors = np.lib.format.open_memmap(str(path / 'vectors.npy'), mode='w+', dtype=dtype,
+                                            shape=(len(words), dim))
+        for i, word in enumerate(tqdm(words, desc=f'Converting {src}')):
+            vectors[i] = model.get_word_vector(word)
+        vectors.flush()
+        del vectors
+
+        # n-grams of a word which is surely not in the vocabulary have all the lengths from minn to maxn
+        probe = 'abcdefghijklmnopqrstuvwxyz' * 4
+        ngrams = [ngram for ngram in model.get_subwords(probe)[0] if ngram != probe]
+        subwords = None
+        if ngrams:
+            input_matrix = model.get_input_matrix()
+            subwords = {'minn': min(map(len, ngrams)), 'maxn': max(map(len, ngrams)),
+                        'bucket': input_matrix.shape[0] - len(words)}
+            np.save(str(path / 'subword_vectors.npy'), input_matrix[len(words):].astype(dtype))
+
+        cls._save_tokens(path, words)
+        cls._save_meta(path, {'dim': dim, 'dtype': dtype, 'subwords': subwords})
+        return cls(path)
+
+
+def convert_embeddings(src: Union[str, Path], path: Union[str, Path], fmt: Optional[str] = None,
+                       dtype: str = 'float32') -> None:
+    """Convert embeddings to an :class:`EmbeddingStore` directory.
+
+    Args:
+        src: a path to embeddings in the word2vec text format or to a fastText binary model
+        path: a path to the store directory
+        fmt: ``'word2vec'`` or ``'fasttext'``, fastText is assumed for files with the **.bin** suffix by default
+        dtype: a type of stored vectors, ``float32`` or ``float16``
+
+    """
+    src, path = expand_path(src), expand_path(path)
+    if fmt is None:
+        fmt = 'fasttext' if src.suffix == '.bin' else 'word2vec'
+    if fmt == 'fasttext':
+        EmbeddingStore.from_fasttext(src, path, dtype)
+    elif fmt == 'word2vec':
+        EmbeddingStore.from_word2vec_text(src, path, dtype)
+    else:
+        raise ValueError(f'Unknown embeddings format {fmt}')
+    log.info(f'Converted {src} to {path}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert embeddings to a memory-mapped store directory')
+    parser.add_argument('src', help='path to embeddings in the word2vec text format or to a fastText .bin model',
+                        type=str)
+    parser.add_argument('path', help='path to the store directory', type=str)
+    parser.add_argument('--format', help='format of the embeddings', choices=['word2vec', 'fasttext'], default=None)
+    parser.add_argument('--dtype', help='type of stored vectors', choices=['float32', 'float16'], default='float32')
+    args = parser.parse_args()
+    convert_embeddings(args.src, args.path, args.format, args.dtype)
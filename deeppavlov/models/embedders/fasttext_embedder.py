@@ -13,14 +13,14 @@
 # limitations under the License.
 
 from logging import getLogger
-from typing import Iterator
+from typing import Iterator, List
 
-import fastText
 import numpy as np
 from overrides import overrides
 
 from deeppavlov.core.common.registry import register
 from deeppavlov.models.embedders.abstract_embedder import Embedder
+from deeppavlov.models.embedders.embedding_store import EmbeddingStore
 
 log = getLogger(__name__)
 
@@ -31,12 +31,15 @@ class FasttextEmbedder(Embedder):
     Class implements fastText embedding model
 
     Args:
-        load_path: path where to load pre-trained embedding model from
+        load_path: path where to load pre-trained embedding model from, either a fastText binary model
+            or a directory converted to :class:`~deeppavlov.models.embedders.embedding_store.EmbeddingStore`
         pad_zero: whether to pad samples or not
+        cache_bytes: maximum approximate size of cached tokens embeddings in bytes, embeddings are not cached
+            if it is 0
 
     Attributes:
-        model: fastText model instance
-        tok2emb: dictionary with already embedded tokens
+        model: fastText model instance or a memory-mapped embeddings store
+        tok2emb: LRU cache of already embedded tokens or ``None``
         dim: dimension of embeddings
         pad_zero: whether to pad sequence of tokens with zeros or not
         load_path: path with pre-trained fastText binary model
@@ -45,12 +48,21 @@ class FasttextEmbedder(Embedder):
     def _get_word_vector(self, w: str) -> np.ndarray:
         return self.model.get_word_vector(w)
 
+    def _get_word_vectors(self, tokens: List[str]) -> np.ndarray:
+        if isinstance(self.model, EmbeddingStore):
+            return self.model.get_vectors(tokens)
+        return super()._get_word_vectors(tokens)
+
     def load(self) -> None:
         """
         Load fastText binary model from self.load_path
         """
         log.info(f"[loading fastText embeddings from `{self.load_path}`]")
-        self.model = fastText.load_model(str(self.load_path))
+        if EmbeddingStore.is_store(self.load_path):
+            self.model = EmbeddingStore(self.load_path)
+        else:
+            import fastText
+            self.model = fastText.load_model(str(self.load_path))
         self.dim = self.model.get_dimension()
 
     @overrides
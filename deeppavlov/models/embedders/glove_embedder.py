@@ -13,14 +13,14 @@
 # limitations under the License.
 import pickle
 from logging import getLogger
-from typing import Iterator
+from typing import Iterator, List
 
 import numpy as np
-from gensim.models import KeyedVectors
 from overrides import overrides
 
 from deeppavlov.core.common.registry import register
 from deeppavlov.models.embedders.abstract_embedder import Embedder
+from deeppavlov.models.embedders.embedding_store import EmbeddingStore
 
 log = getLogger(__name__)
 
@@ -31,12 +31,15 @@ class GloVeEmbedder(Embedder):
     Class implements GloVe embedding model
 
     Args:
-        load_path: path where to load pre-trained embedding model from
+        load_path: path where to load pre-trained embedding model from, either a file in the word2vec text format
+            or a directory converted to :class:`~deeppavlov.models.embedders.embedding_store.EmbeddingStore`
         pad_zero: whether to pad samples or not
+        cache_bytes: maximum approximate size of cached tokens embeddings in bytes, embeddings are not cached
+            if it is 0
 
     Attributes:
-        model: GloVe model instance
-        tok2emb: dictionary with already embedded tokens
+        model: GloVe model instance or a memory-mapped embeddings store
+        tok2emb: LRU cache of already embedded tokens or ``None``
         dim: dimension of embeddings
         pad_zero: whether to pad sequence of tokens with zeros or not
         load_path: path with pre-trained GloVe model
@@ -45,6 +48,11 @@ class GloVeEmbedder(Embedder):
     def _get_word_vector(self, w: str) -> np.ndarray:
         return self.model[w]
 
+    def _get_word_vectors(self, tokens: List[str]) -> np.ndarray:
+        if isinstance(self.model, EmbeddingStore):
+            return self.model.get_vectors(tokens)
+        return super()._get_word_vectors(tokens)
+
     def load(self) -> None:
         """
         Load dict of embeddings from given file
@@ -53,7 +61,11 @@ class GloVeEmbedder(Embedder):
         if not self.load_path.exists():
             log.warning(f'{self.load_path} does not exist, cannot load embeddings from it!')
             return
-        self.model = KeyedVectors.load_word2vec_format(str(self.load_path))
+        if EmbeddingStore.is_store(self.load_path):
+            self.model = EmbeddingStore(self.load_path)
+        else:
+            from gensim.models import KeyedVectors
+            self.model = KeyedVectors.load_word2vec_format(str(self.load_path))
         self.dim = self.model.vector_size
 
     @overrides
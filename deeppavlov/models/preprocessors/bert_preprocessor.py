@@ -14,13 +14,13 @@
 from logging import getLogger
 from typing import Tuple, List, Optional
 
-from bert_dp.preprocessing import convert_examples_to_features, InputExample, InputFeatures
-from bert_dp.tokenization import FullTokenizer
+from bert_dp.preprocessing import InputFeatures
 
 from deeppavlov.core.commands.utils import expand_path
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.data.utils import zero_pad
 from deeppavlov.core.models.component import Component
+from deeppavlov.models.preprocessors.bert_tokenizer import BertTokenizer
 
 logger = getLogger(__name__)
 
@@ -29,30 +29,34 @@ logger = getLogger(__name__)
 class BertPreprocessor(Component):
     """Tokenize text on subtokens, encode subtokens with their indices, create tokens and segment masks.
 
-    Check details in convert_examples_to_features function.
+    Subtokens, masks and ids are the same as the ones of Bert convert_examples_to_features function.
 
     Args:
         vocab_file: path to vocabulary
         do_lower_case: set True if lowercasing is needed
         max_seq_length: max sequence length in subtokens, including [SEP] and [CLS] tokens
+        dynamic_padding: pad subtokens only to the longest sequence in a batch instead of ``max_seq_length``
 
     Attributes:
         max_seq_length: max sequence length in subtokens, including [SEP] and [CLS] tokens
-        tokenizer: instance of Bert FullTokenizer
+        dynamic_padding: whether subtokens are padded only to the longest sequence in a batch
+        tokenizer: instance of BertTokenizer
     """
 
     def __init__(self,
                  vocab_file: str,
                  do_lower_case: bool = True,
                  max_seq_length: int = 512,
+                 dynamic_padding: bool = False,
                  **kwargs) -> None:
         self.max_seq_length = max_seq_length
+        self.dynamic_padding = dynamic_padding
         vocab_file = str(expand_path(vocab_file))
-        self.tokenizer = FullTokenizer(vocab_file=vocab_file,
+        self.tokenizer = BertTokenizer(vocab_file=vocab_file,
                                        do_lower_case=do_lower_case)
 
     def __call__(self, texts_a: List[str], texts_b: Optional[List[str]] = None) -> List[InputFeatures]:
-        """Call Bert convert_examples_to_features function to tokenize and create masks.
+        """Tokenize texts and create masks.
 
         texts_a and texts_b are separated by [SEP] token
 
@@ -65,12 +69,13 @@ class BertPreprocessor(Component):
 
         """
 
-        if texts_b is None:
-            texts_b = [None] * len(texts_a)
+        tokens, input_ids, input_masks, input_type_ids = self.tokenizer.encode_batch(texts_a, texts_b,
+                                                                                   self.max_seq_length,
+                                                                                   self.dynamic_padding)
         # unique_id is not used
-        examples = [InputExample(unique_id=0, text_a=text_a, text_b=text_b)
-                    for text_a, text_b in zip(texts_a, texts_b)]
-        return convert_examples_to_features(examples, self.max_seq_length, self.tokenizer)
+        return [InputFeatures(unique_id=0, tokens=tokens[i], input_ids=input_ids[i], input_mask=input_masks[i],
+                              input_type_ids=input_type_ids[i])
+                for i in range(len(tokens))]
 
 
 @register('bert_ner_preprocessor')
@@ -90,7 +95,7 @@ class BertNerPreprocessor(Component):
     Attributes:
         max_seq_length: max sequence length in subtokens, including [SEP] and [CLS] tokens
         max_subword_length: rmax lenght of a bert subtoken
-        tokenizer: instance of Bert FullTokenizer
+        tokenizer: instance of BertTokenizer
     """
 
     def __init__(self,
@@ -102,7 +107,7 @@ class BertNerPreprocessor(Component):
         self.max_seq_length = max_seq_length
         self.max_subword_length = max_subword_length
         vocab_file = str(expand_path(vocab_file))
-        self.tokenizer = FullTokenizer(vocab_file=vocab_file,
+        self.tokenizer = BertTokenizer(vocab_file=vocab_file,
                                        do_lower_case=do_lower_case)
 
     def __call__(self,
@@ -149,7 +154,7 @@ class BertNerPreprocessor(Component):
     def _ner_bert_tokenize(tokens: List[str],
                            mask: List[int],
                            tags: List[str],
-                           tokenizer: FullTokenizer,
+                           tokenizer: BertTokenizer,
                            max_subword_len: int = None) -> Tuple[List[str], List[str]]:
         tokens_subword = ['[CLS]']
         mask_subword = [0]
@@ -0,0 +1,300 @@
+# Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unicodedata
+from logging import getLogger
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = getLogger(__name__)
+
+# characters which are whitespace for str.split but are removed as control characters by Bert tokenizer
+_REMOVED_SPACES = frozenset('\x0b\x0c\x1c\x1d\x1e\x1f\x85')
+
+_CHINESE_RANGES = ((0x4E00, 0x9FFF), (0x3400, 0x4DBF), (0x20000, 0x2A6DF), (0x2A700, 0x2B73F),
+                   (0x2B740, 0x2B81F), (0x2B820, 0x2CEAF), (0xF900, 0xFAFF), (0x2F800, 0x2FA1F))
+
+
+def _is_whitespace(char: str) -> bool:
+    return char in ' \t\n\r' or unicodedata.category(char) == 'Zs'
+
+
+def _is_control(char: str) -> bool:
+    return char not in '\t\n\r' and unicodedata.category(char) in ('Cc', 'Cf')
+
+
+def _is_punctuation(char: str) -> bool:
+    cp = ord(char)
+    if 33 <= cp <= 47 or 58 <= cp <= 64 or 91 <= cp <= 96 or 123 <= cp <= 126:
+        return True
+    return unicodedata.category(char).startswith('P')
+
+
+def _is_chinese_char(char: str) -> bool:
+    cp = ord(char)
+    return any(start <= cp <= end for start, end in _CHINESE_RANGES)
+
+
+def load_vocab(vocab_file: str) -> Dict[str, int]:
+    """Load Bert vocabulary with one subtoken per line, the same way as Bert ``FullTokenizer`` does."""
+    vocab = {}
+    with open(vocab_file, encoding='utf8') as f:
+        for index, token in enumerate(f):
+            vocab[token.strip()] = index
+    return vocab
+
+
+class WordpieceTrie:
+    """Prefix tree of subtokens for greedy longest-match-first WordPiece tokenization.
+
+    Word-initial subtokens and ``##`` continuation subtokens are kept in separate trees, so a word is split
+    in a single pass over its characters instead of looking up all its substrings in the vocabulary.
+
+    Args:
+        vocab: a dictionary of subtokens and their ids
+    """
+
+    _ID = ''
+
+    def __init__(self, vocab: Dict[str, int]) -> None:
+        self.initial = {}
+        self.continuation = {}
+        for token, token_id in vocab.items():
+            if token.startswith('##') and len(token) > 2:
+                self._insert(self.continuation, token[2:], token_id)
+            if token:
+                self._insert(self.initial, token, token_id)
+
+    @classmethod
+    def _insert(cls, root: dict, token: str, token_id: int) -> None:
+        node = root
+        for char in token:
+            node = node.setdefault(char, {})
+        node[cls._ID] = token_id
+
+    def split(self, word: str) -> Optional[List[Tuple[int, int]]]:
+        """Split a word on the longest subtokens from left to right.
+
+        Returns:
+            ends of subtokens in the word and their ids or ``None`` if the word can not be split
+        """
+        pieces = []
+        start, length = 0, len(word)
+        root = self.initial
+        while start < length:
+            node, end, token_id = root, start, None
+            for i in range(start, length):
+                node = node.get(word[i])
+                if node is None:
+                    break
+                if self._ID in node:
+                    end, token_id = i + 1, node[self._ID]
+            if token_id is None:
+                return None
+            pieces.append((end, token_id))
+            start = end
+            root = self.continuation
+        return pieces
+
+
+class BertTokenizer:
+    """Fast drop-in replacement of Bert ``FullTokenizer`` with batch encoding to NumPy arrays.
+
+    Texts are split on whitespace and every chunk is tokenized into subtokens once: results are memoized
+    in a dictionary which is cleared when it grows larger than ``cache_size``. Chunks are processed the same way
+    as by Bert ``BasicTokenizer`` and ``WordpieceTokenizer``, so subtokens and their ids are exactly the same,
+    but WordPiece splits are looked up in a :class:`WordpieceTrie`.
+
+    Args:
+        vocab_file: path to Bert vocabulary
+        do_lower_case: set True if lowercasing is needed
+        cache_size: maximum number of memoized chunks
+        unk_token: subtoken for words which can not be split
+        max_input_chars_per_word: words longer than this are replaced with ``unk_token``
+
+    Attributes:
+        vocab: a dictionary of subtokens and their ids
+        inv_vocab: a dictionary of ids and their subtokens
+    """
+
+    def __init__(self, vocab_file: str, do_lower_case: bool = True, cache_size: int = 100000,
+                 unk_token: str = '[UNK]', max_input_chars_per_word: int = 200) -> None:
+        self.vocab = load_vocab(vocab_file)
+        self.inv_vocab = {v: k for k, v in self.vocab.items()}
+        self.do_lower_case = do_lower_case
+        self.cache_size = cache_size
+        self.unk_token = unk_token
+        self.max_input_chars_per_word = max_input_chars_per_word
+        self.trie = WordpieceTrie(self.vocab)
+        self._cache = {}
+
+    def tokenize(self, text: str) -> List[str]:
+        """Split text on subtokens."""
+        tokens = []
+        for chunk in self._chunks(text):
+            tokens.extend(self._encode_chunk(chunk)[0])
+        return tokens
+
+    def tokenize_with_ids(self, text: str) -> Tuple[List[str], List[int]]:
+        """Split text on subtokens and get their ids."""
+        tokens, ids = [], []
+        for chunk in self._chunks(text):
+            chunk_tokens, chunk_ids = self._encode_chunk(chunk)
+            tokens.extend(chunk_tokens)
+            ids.extend(chunk_ids)
+        return tokens, ids
+
+    def convert_tokens_to_ids(self, tokens: List[str]) -> List[int]:
+        return [self.vocab[token] for token in tokens]
+
+    def convert_ids_to_tokens(self, ids: List[int]) -> List[str]:
+        return [self.inv_vocab[i] for i in ids]
+
+    def encode_batch(self, texts_a: List[str], texts_b: Optional[List[Optional[str]]] = None,
+                     max_seq_length: int = 512,
+                     dynamic_padding: bool = False) -> Tuple[List[List[str]], np.ndarray, np.ndarray, np.ndarray]:
+        """Tokenize texts or pairs of texts and encode them as Bert inputs.
+
+        Texts are truncated and joined with ``[CLS]`` and ``[SEP]`` subtokens exactly as in Bert
+        ``convert_examples_to_features``.
+
+        Args:
+            texts_a: batch of texts
+            texts_b: batch of second texts of pairs, they could be None, e.g. for single sentence classification
+            max_seq_length: max sequence length in subtokens, including [SEP] and [CLS] tokens, inputs are padded
+                to this length
+            dynamic_padding: pad inputs only to the longest sequence in the batch instead of ``max_seq_length``
+
+        Returns:
+            subtokens, their ids, subtokens mask and segment ids, the last three with shape
+            [batch_size, max_seq_length] or [batch_size, longest sequence length]
+        """
+        ids_a = [self.tokenize_with_ids(text)[1] for text in texts_a]
+        ids_b = None
+        if texts_b is not None:
+            ids_b = [self.tokenize_with_ids(text)[1] if text else None for text in texts_b]
+        return self.encode_ids_batch(ids_a, ids_b, max_seq_length, dynamic_padding)
+
+    def encode_ids_batch(self, ids_a: List[List[int]], ids_b: Optional[List[Optional[List[int]]]] = None,
+                         max_seq_length: int = 512, dynamic_padding: bool = False) \
+            -> Tuple[List[List[str]], np.ndarray, np.ndarray, np.ndarray]:
+        """Encode already tokenized texts or pairs of texts as Bert inputs, the same way as :meth:`encode_batch`.
+
+        Args:
+            ids_a: batch of subtoken ids of texts
+            ids_b: batch of subtoken ids of second texts of pairs, they could be None
+            max_seq_length: max sequence length in subtokens, including [SEP] and [CLS] tokens, inputs are padded
+                to this length
+            dynamic_padding: pad inputs only to the longest sequence in the batch instead of ``max_seq_length``
+
+        Returns:
+            subtokens, their ids, subtokens mask and segment ids, the last three with shape
+            [batch_size, max_seq_length] or [batch_size, longest sequence length]
+        """
+        if ids_b is None:
+            ids_b = [None] * len(ids_a)
+        cls_id, sep_id = self.vocab['[CLS]'], self.vocab['[SEP]']
+        batch_ids, segment_starts = [], []
+        for text_ids_a, text_ids_b in zip(ids_a, ids_b):
+            text_ids_a = list(text_ids_a)
+            text_ids_b = list(text_ids_b) if text_ids_b is not None else []
+            len_a, len_b = len(text_ids_a), len(text_ids_b)
+            if text_ids_b:
+                while len_a + len_b > max_seq_length - 3:
+                    if len_a > len_b:
+                        len_a -= 1
+                    else:
+                        len_b -= 1
+            else:
+                len_a = min(len_a, max_seq_length - 2)
+
+            ids = [cls_id] + text_ids_a[:len_a] + [sep_id]
+            if text_ids_b:
+                ids += text_ids_b[:len_b] + [sep_id]
+            batch_ids.append(ids)
+            segment_starts.append(len_a + 2)
+
+        seq_length = max(map(len, batch_ids), default=0) if dynamic_padding else max_seq_length
+        input_ids = np.zeros((len(batch_ids), seq_length), dtype=np.int32)
+        input_masks = np.zeros((len(batch_ids), seq_length), dtype=np.int32)
+        input_type_ids = np.zeros((len(batch_ids), seq_length), dtype=np.int32)
+        for i, (ids, segment_start) in enumerate(zip(batch_ids, segment_starts)):
+            input_ids[i, :len(ids)] = ids
+            input_masks[i, :len(ids)] = 1
+            input_type_ids[i, segment_start:len(ids)] = 1
+        return [self.convert_ids_to_tokens(ids) for ids in batch_ids], input_ids, input_masks, input_type_ids
+
+    @staticmethod
+    def _chunks(text: str) -> List[str]:
+        if isinstance(text, bytes):
+            text = text.decode('utf-8', 'ignore')
+        if not _REMOVED_SPACES.isdisjoint(text):
+            text = ''.join(char for char in text if char not in _REMOVED_SPACES)
+        return text.split()
+
+    def _encode_chunk(self, chunk: str) -> Tuple[List[str], List[int]]:
+        result = self._cache.get(chunk)
+        if result is None:
+            tokens, ids = [], []
+            for word in self._basic_tokenize(chunk):
+                self._wordpiece(word, tokens, ids)
+            result = tokens, ids
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[chunk] = result
+        return result
+
+    def _basic_tokenize(self, chunk: str) -> List[str]:
+        """Split a chunk without whitespaces on words as Bert ``BasicTokenizer`` does."""
+        chars = []
+        for char in chunk:
+            if ord(char) == 0 or ord(char) == 0xfffd or _is_control(char):
+                continue
+            if _is_chinese_char(char):
+                chars += [' ', char, ' ']
+            else:
+                chars.append(char)
+
+        words = []
+        for token in ''.join(chars).split():
+            if self.do_lower_case:
+                token = unicodedata.normalize('NFD', token.lower())
+                token = ''.join(char for char in token if unicodedata.category(char) != 'Mn')
+            start_new_word = True
+            for char in token:
+                if _is_punctuation(char):
+                    words.append(char)
+                    start_new_word = True
+                elif start_new_word:
+                    words.append(char)
+                    start_new_word = False
+                else:
+                    words[-1] += char
+        return ' '.join(words).split()
+
+    def _wordpiece(self, word: str, tokens: List[str], ids: List[int]) -> None:
+        pieces = self.trie.split(word) if len(word) <= self.max_input_chars_per_word else None
+        if pieces is None:
+            tokens.append(self.unk_token)
+            ids.append(self.vocab[self.unk_token])
+            return
+        for _, token_id in pieces:
+            tokens.append(self.inv_vocab[token_id])
+            ids.append(token_id)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['_cache'] = {}
+        return state
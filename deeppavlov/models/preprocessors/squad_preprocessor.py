@@ -207,8 +207,12 @@ class SquadVocabEmbedder(Estimator):
             question_limit: max question length in tokens
             char_limit: max number of characters in token
             level: token or char
+
+        Contexts and questions are padded to the longest ones in a batch rather than to the limits.
         """
 
+    MAX_LOOKUP_CACHE_SIZE = 10 ** 6
+
     def __init__(self, emb_folder: str, emb_url: str, save_path: str, load_path: str,
                  context_limit: int = 450, question_limit: int = 150, char_limit: int = 16,
                  level: str = 'token', *args, **kwargs):
@@ -229,6 +233,7 @@ class SquadVocabEmbedder(Estimator):
         self.emb_folder.mkdir(parents=True, exist_ok=True)
 
         self.emb_dim = self.emb_mat = self.token2idx_dict = None
+        self._idx_cache = {}
 
         if self.load_path.exists():
             self.load()
@@ -244,30 +249,45 @@ class SquadVocabEmbedder(Estimator):
             transformed contexts and questions
         """
         if self.level == 'token':
-            c_idxs = np.zeros([len(contexts), self.context_limit], dtype=np.int32)
-            q_idxs = np.zeros([len(questions), self.question_limit], dtype=np.int32)
-            for i, context in enumerate(contexts):
-                for j, token in enumerate(context):
-                    c_idxs[i, j] = self._get_idx(token)
-
-            for i, question in enumerate(questions):
-                for j, token in enumerate(question):
-                    q_idxs[i, j] = self._get_idx(token)
-
+            return self._tokens_to_idxs(contexts), self._tokens_to_idxs(questions)
         elif self.level == 'char':
-            c_idxs = np.zeros([len(contexts), self.context_limit, self.char_limit], dtype=np.int32)
-            q_idxs = np.zeros([len(questions), self.question_limit, self.char_limit], dtype=np.int32)
-            for i, context in enumerate(contexts):
-                for j, token in enumerate(context):
-                    for k, char in enumerate(token):
-                        c_idxs[i, j, k] = self._get_idx(char)
-
-            for i, question in enumerate(questions):
-                for j, token in enumerate(question):
-                    for k, char in enumerate(token):
-                        q_idxs[i, j, k] = self._get_idx(char)
+            return self._chars_to_idxs(contexts), self._chars_to_idxs(questions)
+
+    def _lookup(self, els: List[str]) -> np.ndarray:
+        """ Returns indices of tokens or chars, resolving every distinct one with :meth:`_get_idx` once. """
+        cache = self._idx_cache
+        if len(cache) > self.MAX_LOOKUP_CACHE_SIZE:
+            cache.clear()
+        idxs = np.empty(len(els), dtype=np.int32)
+        for i, el in enumerate(els):
+            idx = cache.get(el)
+            if idx is None:
+                idx = cache[el] = self._get_idx(el)
+            idxs[i] = idx
+        return idxs
 
-        return c_idxs, q_idxs
+    @staticmethod
+    def _positions(lengths: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """ Returns row and column indices of all elements of rows with given lengths. """
+        lengths = np.array(lengths, dtype=np.int64)
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        cols = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return rows, cols
+
+    def _tokens_to_idxs(self, batch: List[List[str]]) -> np.ndarray:
+        lengths = [len(tokens) for tokens in batch]
+        idxs = np.zeros([len(batch), max(max(lengths, default=0), 1)], dtype=np.int32)
+        idxs[self._positions(lengths)] = self._lookup([token for tokens in batch for token in tokens])
+        return idxs
+
+    def _chars_to_idxs(self, batch: List[List[List[str]]]) -> np.ndarray:
+        lengths = [len(tokens) for tokens in batch]
+        idxs = np.zeros([len(batch), max(max(lengths, default=0), 1), self.char_limit], dtype=np.int32)
+        tokens = [chars for tokens in batch for chars in tokens]
+        if tokens:
+            chars_idxs = self._tokens_to_idxs(tokens)
+            idxs[self._positions(lengths) + (slice(0, chars_idxs.shape[1]),)] = chars_idxs
+        return idxs
 
     def fit(self, contexts: Tuple[List[str], ...], questions: Tuple[List[str]], *args, **kwargs):
         self.vocab = Counter()
@@ -305,15 +325,18 @@ class SquadVocabEmbedder(Estimator):
             idx2emb_dict = {idx: self.embedding_dict[token]
                             for token, idx in self.token2idx_dict.items()}
             self.emb_mat = np.array([idx2emb_dict[idx] for idx in range(len(idx2emb_dict))])
+            self._idx_cache = {}
 
     def load(self) -> None:
         logger.info('SquadVocabEmbedder: loading saved {}s vocab from {}'.format(self.level, self.load_path))
         with self.load_path.open('rb') as f:
             self.emb_dim, self.emb_mat, self.token2idx_dict = pickle.load(f)
+        self._idx_cache = {}
         self.loaded = True
 
     def deserialize(self, data: bytes) -> None:
         self.emb_dim, self.emb_mat, self.token2idx_dict = pickle.loads(data)
+        self._idx_cache = {}
         self.loaded = True
 
     def save(self) -> None:
@@ -92,7 +92,7 @@ class ErrorModel(Estimator):
                     heappushpop(candidates, (res[-1], prefix))
                 potential = max(res)
                 if potential > threshold:
-                    heappush(prefixes_heap, (-potential, self.dictionary.words_trie[prefix]))
+                    heappush(prefixes_heap, (-potential, self.dictionary.words_trie.continuations(prefix)))
         return [(w.strip('⟬⟭'), score) for score, w in sorted(candidates, reverse=True) if
                 score > threshold]
 
@@ -103,7 +103,7 @@ class ErrorModel(Estimator):
         inf = float('-inf')
         d = defaultdict(list)
         d[''] = [0.] + [inf] * (word_len - 1)
-        prefixes_heap = [(0, self.dictionary.words_trie[''])]
+        prefixes_heap = [(0, self.dictionary.words_trie.continuations(''))]
         candidates = [(inf, '')] * self.candidates_count
         while prefixes_heap and -prefixes_heap[0][0] > candidates[0][0]:
             _, prefixes = heappop(prefixes_heap)
@@ -127,7 +127,7 @@ class ErrorModel(Estimator):
                 # potential = max(
                 #     [e for i in range(self.window + 2) for e in d[prefix[:prefix_len - i]]])
                 if potential > threshold:
-                    heappush(prefixes_heap, (-potential, self.dictionary.words_trie[prefix]))
+                    heappush(prefixes_heap, (-potential, self.dictionary.words_trie.continuations(prefix)))
         return [(w.strip('⟬⟭'), score) for score, w in sorted(candidates, reverse=True) if
                 score > threshold]
 
@@ -0,0 +1,394 @@
+# Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+from collections import deque
+from logging import getLogger
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from .tabled_trie import Trie
+
+log = getLogger(__name__)
+
+META_FILENAME = 'meta.json'
+
+
+def _build_dawg(words: Iterable[str], codes: Dict[str, int]) -> Tuple[List[Optional[dict]], List[bool]]:
+    """Build a minimal acyclic automaton of words with the incremental algorithm for sorted input by Daciuk et al.
+
+    Only the states of the minimal automaton and of the path of the last added word are kept in memory, states
+    merged with equivalent ones are replaced with ``None``.
+    """
+    transitions, final = [{}], [False]
+    register = {}
+    # (parent, code, child) transitions along the path of the previously added word which are not minimized yet
+    unchecked = []
+
+    def minimize(down_to):
+        while len(unchecked) > down_to:
+            parent, code, child = unchecked.pop()
+            # words are added in the order of codes, so transitions of a state are sorted by codes
+            key = (final[child], tuple(transitions[child].items()))
+            state = register.get(key)
+            if state is None:
+                register[key] = child
+            else:
+                transitions[parent][code] = state
+                transitions[child] = None
+
+    previous = None
+    for word in sorted(set(words)):
+        common = 0
+        if previous is not None:
+            for a, b in zip(word, previous):
+                if a != b:
+                    break
+                common += 1
+        minimize(common)
+        state = unchecked[-1][2] if unchecked else 0
+        for a in word[common:]:
+            child = len(transitions)
+            transitions.append({})
+            final.append(False)
+            transitions[state][codes[a]] = child
+            unchecked.append((state, codes[a], child))
+            state = child
+        final[state] = True
+        previous = word
+    minimize(0)
+    return transitions, final
+
+
+def _find_base(used: bytearray, codes: List[int], first_free: int) -> int:
+    """Find the smallest base which places all the sorted codes to free slots not before ``first_free``."""
+    lo = max(first_free, codes[0]) - codes[0]
+    if len(codes) == 1:
+        pos = used.find(0, lo + codes[0])
+        return (pos if pos >= 0 else max(len(used), codes[0])) - codes[0]
+    # bases from len(used) - codes[0] on place all the codes after the used slots
+    n = max(len(used) - codes[0] - lo + 1, 1)
+    free = np.ones(n + codes[-1], dtype=bool)
+    m = min(max(len(used) - lo, 0), len(free))
+    free[:m] = np.frombuffer(used, dtype=np.uint8, count=m, offset=lo) == 0
+    fits = free[codes[0]:codes[0] + n].copy()
+    for c in codes[1:]:
+        fits &= free[c:c + n]
+    return lo + int(fits.argmax())
+
+
+def _build_double_array(transitions: Sequence[Dict[int, int]],
+                        alphabet_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Place transitions of states to a double array with the first fit strategy.
+
+    A transition from a state ``s`` by a symbol with code ``c`` occupies the slot ``base[s] + c``,
+    ``check`` of the slot is ``s`` and ``next`` of the slot is the target state.
+    """
+    base = np.zeros(len(transitions), dtype=np.int32)
+    used = bytearray()
+    slots, owners, targets = [], [], []
+    first_free = 0
+    for state, children in enumerate(transitions):
+        if not children:
+            continue
+        codes = sorted(children)
+        b = _find_base(used, codes, first_free)
+        if b + codes[-1] >= len(used):
+            used.extend(bytes(b + codes[-1] + 1 - len(used)))
+        for c in codes:
+            used[b + c] = 1
+            slots.append(b + c)
+            owners.append(state)
+            targets.append(children[c])
+        base[state] = b
+        first_free = used.find(0, first_free)
+        if first_free < 0:
+            first_free = len(used)
+    # every state may be followed by any symbol without checking bounds
+    size = max(len(used), int(base.max(initial=0)) + alphabet_size)
+    check = np.full(size, Trie.NO_NODE, dtype=np.int32)
+    next_ = np.full(size, Trie.NO_NODE, dtype=np.int32)
+    check[slots] = owners
+    next_[slots] = targets
+    return base, check, next_
+
+
+class FutureSymbols(Sequence):
+    """Symbols which may be read in the nearest steps from every state of an :class:`ArrayTrie`.
+
+    The symbols are stored as bit masks and are decoded on access to the format of ``Trie.data``:
+    a list of sets of symbols read in 1, 2, ... steps from a state.
+    """
+
+    def __init__(self, masks: Optional[np.ndarray], symbols: List[str], length: int) -> None:
+        self.masks = masks
+        self.symbols = symbols
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int) -> Optional[List[Set[str]]]:
+        if self.masks is None:
+            if not -self.length <= index < self.length:
+                raise IndexError(index)
+            return None
+        bits = np.unpackbits(self.masks[index], axis=-1)[:, :len(self.symbols)]
+        return [{self.symbols[i] for i in np.flatnonzero(row)} for row in bits]
+
+
+class ArrayTrie:
+    """Immutable prefix automaton of words stored in flat arrays of a double array.
+
+    The automaton is minimal, so it shares common suffixes of words as well as prefixes. A transition from a state
+    ``s`` by a symbol with code ``c`` leads to ``next[base[s] + c]`` if ``check[base[s] + c] == s``, so a step
+    takes three array lookups. The arrays are memory-mapped on loading, so a saved trie loads instantly and
+    processes using the same trie share it in the page cache.
+
+    A trie can be used in place of :class:`~deeppavlov.models.spelling_correction.levenshtein.tabled_trie.Trie`
+    by :class:`~deeppavlov.models.spelling_correction.levenshtein.levenshtein_searcher.LevenshteinSearcher`
+    and as a dictionary of :class:`~deeppavlov.vocabs.typos.StaticDictionary`.
+
+    Args:
+        alphabet: sorted list of symbols
+        base: offsets of transitions of states in ``check`` and ``next``
+        check: states owning slots or ``-1`` for free slots
+        next_: targets of transitions in slots
+        final: indicators of final states
+        future: packed bit masks of symbols which may be read in the nearest steps from states or ``None``
+        allow_spaces: whether a space leads from final states to the root in ``future``
+        path: a path to the directory the arrays are loaded from
+
+    Attributes:
+        alphabet: sorted list of symbols
+        alphabet_codes: a mapping of symbols to their codes
+        root: the root state
+        precompute_symbols: number of steps in ``data`` or ``None``
+        data: symbols which may be read in the nearest steps from every state, see :class:`FutureSymbols`
+    """
+
+    NO_NODE = Trie.NO_NODE
+
+    def __init__(self, alphabet: List[str], base: np.ndarray, check: np.ndarray, next_: np.ndarray,
+                 final: np.ndarray, future: Optional[np.ndarray] = None, allow_spaces: bool = False,
+                 path: Optional[Union[str, Path]] = None) -> None:
+        self.alphabet = list(alphabet)
+        self.alphabet_codes = {a: i for i, a in enumerate(self.alphabet)}
+        self.root = 0
+        self.base, self.check, self.next, self.final = base, check, next_, final
+        self.future = future
+        self.allow_spaces = allow_spaces
+        self.path = path
+        self._init_views()
+
+    def _init_views(self) -> None:
+        self.precompute_symbols = self.future.shape[1] if self.future is not None else None
+        self.data = FutureSymbols(self.future, self.alphabet + [' '], len(self.base))
+        # items of memoryviews are python objects, which is several times faster than indexing numpy arrays
+        self._base, self._check, self._next = (memoryview(np.ascontiguousarray(a, dtype=np.int32))
+                                               for a in (self.base, self.check, self.next))
+        self._final = memoryview(np.ascontiguousarray(self.final, dtype=bool))
+
+    def __len__(self) -> int:
+        return len(self.base)
+
+    def __contains__(self, s: str) -> bool:
+        index = self.descend(self.root, s)
+        return index != ArrayTrie.NO_NODE and self._final[index]
+
+    def descend(self, index: int, s: str) -> int:
+        """Follow symbols of ``s`` from the state ``index``.
+
+        Returns:
+            the reached state or ``NO_NODE`` if there is no such path
+        """
+        for a in s:
+            code = self.alphabet_codes.get(a)
+            if code is None:
+                return ArrayTrie.NO_NODE
+            slot = self._base[index] + code
+            if self._check[slot] != index:
+                return ArrayTrie.NO_NODE
+            index = self._next[slot]
+        return index
+
+    def is_final(self, index: int) -> bool:
+        return self._final[index]
+
+    def continuations(self, prefix: str) -> List[str]:
+        """Get prefixes of words one symbol longer than ``prefix``, raise ``KeyError`` if no word starts with it."""
+        index = self.descend(self.root, prefix)
+        if index == ArrayTrie.NO_NODE:
+            raise KeyError(prefix)
+        start = self._base[index]
+        check = self._check[start:start + len(self.alphabet)]
+        return [prefix + self.alphabet[code] for code, owner in enumerate(check) if owner == index]
+
+    def words(self) -> Iterator[str]:
+        """Iterate over words of the trie in the alphabetical order."""
+        stack = [(self.root, '')]
+        while stack:
+            index, word = stack.pop()
+            if self._final[index]:
+                yield word
+            stack.extend((child, word + a) for a, child in reversed(self._get_children_and_letters(index)))
+
+    def _get_children_and_letters(self, index: int, return_indexes: bool = False) -> List[Tuple[Union[str, int],
+                                                                                               int]]:
+        start = self._base[index]
+        check = self._check[start:start + len(self.alphabet)]
+        return [(code if return_indexes else self.alphabet[code], self._next[start + code])
+                for code, owner in enumerate(check) if owner == index]
+
+    def _get_letters(self, index: int, return_indexes: bool = False) -> List[Union[str, int]]:
+        return [letter for letter, _ in self._get_children_and_letters(index, return_indexes)]
+
+    def _get_children(self, index: int) -> List[int]:
+        return [child for _, child in self._get_children_and_letters(index)]
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Save arrays of the trie to a directory."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in ('base', 'check', 'next', 'final'):
+            np.save(str(path / f'{name}.npy'), getattr(self, name))
+        if self.future is not None:
+            np.save(str(path / 'future.npy'), self.future)
+        with (path / META_FILENAME).open('w', encoding='utf8') as f:
+            json.dump({'alphabet': self.alphabet, 'allow_spaces': self.allow_spaces}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'ArrayTrie':
+        """Load a trie saved to a directory with memory-mapped arrays."""
+        path = Path(path)
+        with (path / META_FILENAME).open(encoding='utf8') as f:
+            meta = json.load(f)
+        arrays = [np.load(str(path / f'{name}.npy'), mmap_mode='r') for name in ('base', 'check', 'next', 'final')]
+        future = None
+        if (path / 'future.npy').is_file():
+            future = np.load(str(path / 'future.npy'), mmap_mode='r')
+        return cls(meta['alphabet'], *arrays, future=future, allow_spaces=meta['allow_spaces'], path=path)
+
+    @staticmethod
+    def is_trie(path: Union[str, Path]) -> bool:
+        """Check whether a path is a directory with a saved trie."""
+        return (Path(path) / META_FILENAME).is_file()
+
+    def __getstate__(self) -> dict:
+        if self.path is not None:
+            return {'path': self.path}
+        state = self.__dict__.copy()
+        for name in ('data', '_base', '_check', '_next', '_final'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        if 'base' not in state:
+            state = self.load(state['path']).__dict__
+        self.__dict__.update(state)
+        self._init_views()
+
+    @classmethod
+    def from_words(cls, words: Iterable[str], alphabet: Optional[Iterable[str]] = None,
+                   precompute_symbols: Optional[int] = None, allow_spaces: bool = False) -> 'ArrayTrie':
+        """Build a minimal trie of words.
+
+        Args:
+            words: words of the trie
+            alphabet: symbols of the words, they are collected from the words by default
+            precompute_symbols: number of steps to collect symbols which may be read from every state in
+             ``data`` for
+            allow_spaces: whether a space leads from final states to the root in ``data``
+
+        Returns:
+            the built trie
+        """
+        words = set(words)
+        if alphabet is None:
+            alphabet = {a for word in words for a in word}
+        alphabet = sorted(alphabet)
+        transitions, final = _build_dawg(words, {a: i for i, a in enumerate(alphabet)})
+        return cls._from_transitions(alphabet, transitions, final, 0, precompute_symbols, allow_spaces)
+
+    @classmethod
+    def from_trie(cls, trie: Trie, precompute_symbols: Optional[int] = None,
+                  allow_spaces: Optional[bool] = None) -> 'ArrayTrie':
+        """Convert a :class:`~deeppavlov.models.spelling_correction.levenshtein.tabled_trie.Trie`.
+
+        Args:
+            trie: the trie to convert
+            precompute_symbols: number of steps to collect symbols which may be read from every state in
+             ``data`` for, the same as in ``trie`` by default
+            allow_spaces: whether a space leads from final states to the root in ``data``, the same as in ``trie``
+             by default
+
+        Returns:
+            the converted trie
+        """
+        if precompute_symbols is None:
+            precompute_symbols = trie.precompute_symbols
+        if allow_spaces is None:
+            allow_spaces = trie.allow_spaces
+        transitions = [{int(code): int(child) for code, child in trie._get_children_and_letters(i, True)}
+                       for i in range(len(trie))]
+        final = [bool(trie.is_final(i)) for i in range(len(trie))]
+        return cls._from_transitions(trie.alphabet, transitions, final, trie.root, precompute_symbols, allow_spaces)
+
+    @classmethod
+    def _from_transitions(cls, alphabet: List[str], transitions: List[Optional[Dict[int, int]]], final: List[bool],
+                          root: int, precompute_symbols: Optional[int], allow_spaces: bool) -> 'ArrayTrie':
+        # states are renumbered in the breadth-first order, so the root is 0 and removed states are dropped
+        order, numbers = [root], {root: 0}
+        queue = deque(order)
+        while queue:
+            for child in transitions[queue.popleft()].values():
+                if child not in numbers:
+                    numbers[child] = len(order)
+                    order.append(child)
+                    queue.append(child)
+        transitions = [{code: numbers[child] for code, child in transitions[state].items()} for state in order]
+        final = np.array([final[state] for state in order], dtype=bool)
+        base, check, next_ = _build_double_array(transitions, len(alphabet))
+        future = None
+        if precompute_symbols:
+            future = cls._precompute_future_symbols(base, check, next_, final, len(alphabet),
+                                                    precompute_symbols, allow_spaces)
+        return cls(alphabet, base, check, next_, final, future=future, allow_spaces=allow_spaces)
+
+    @staticmethod
+    def _precompute_future_symbols(base: np.ndarray, check: np.ndarray, next_: np.ndarray, final: np.ndarray,
+                                   alphabet_size: int, n: int, allow_spaces: bool) -> np.ndarray:
+        """Collect symbols which may be read in 1, ..., n steps from every state as ``precompute_future_symbols``
+        does for ``Trie``, the last bit of masks stands for a space."""
+        slots = np.flatnonzero(check != Trie.NO_NODE)
+        # transitions are grouped by source states to merge masks of targets with one reduceat
+        slots = slots[np.argsort(check[slots], kind='stable')]
+        sources, targets = check[slots], next_[slots]
+        codes = slots - base[sources]
+        sources_with_children, starts = np.unique(sources, return_index=True)
+
+        masks = np.zeros((len(base), alphabet_size + 1), dtype=bool)
+        masks[sources, codes] = True
+        if allow_spaces:
+            masks[final, alphabet_size] = True
+        future = np.zeros((len(base), n, (alphabet_size + 8) // 8), dtype=np.uint8)
+        future[:, 0] = np.packbits(masks, axis=1)
+        for d in range(1, n):
+            if len(sources):
+                future[sources_with_children, d] = np.bitwise_or.reduceat(future[targets, d - 1], starts, axis=0)
+            if allow_spaces:
+                future[final, d] |= future[0, d - 1]
+        return future
@@ -1,10 +1,26 @@
 import copy
 import itertools
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 from sortedcontainers import SortedListWithKey
 
-from .tabled_trie import Trie, make_trie
+from deeppavlov.core.common.cache import LRUCache
+from .array_trie import ArrayTrie
+from .tabled_trie import Trie
+
+_worker_searcher = None
+
+
+def _init_searcher(searcher):
+    """Sets the searcher in a process pool worker."""
+    global _worker_searcher
+    _worker_searcher = searcher
+
+
+def _search_in_worker(words, d, allow_spaces):
+    """Searches words in a process pool worker initialized with :func:`_init_searcher`."""
+    return [_worker_searcher._search(word, d, allow_spaces) for word in words]
 
 
 class LevenshteinSearcher:
@@ -12,9 +28,14 @@ class LevenshteinSearcher:
     Класс для поиска близких слов
     в соответствии с расстоянием Левенштейна
 
+    Результаты поиска запоминаются в LRU-кэше размера cache_size,
+    search_batch ищет каждое слово пакета один раз и может распределять
+    поиск ненайденных в кэше слов по n_workers процессам
+
+    Словарь, переданный списком слов, хранится в виде ArrayTrie
     """
     def __init__(self, alphabet, dictionary, operation_costs=None,
-                 allow_spaces=False, euristics='none'):
+                 allow_spaces=False, euristics='none', cache_size=0, n_workers=0):
         self.alphabet = alphabet
         self.allow_spaces = allow_spaces
         if isinstance(euristics, int):
@@ -26,17 +47,20 @@ class LevenshteinSearcher:
             self.euristics = None
         else:
             raise ValueError("Euristics should be non-negative integer or None")
-        if isinstance(dictionary, Trie):
+        if isinstance(dictionary, (Trie, ArrayTrie)):
             # словарь передан уже в виде бора
             self.dictionary = dictionary
         else:
-            self.dictionary = make_trie(alphabet, dictionary, make_cashed=True,
-                                        precompute_symbols=self.euristics,
-                                        allow_spaces=self.allow_spaces)
+            self.dictionary = ArrayTrie.from_words(dictionary, alphabet,
+                                                   precompute_symbols=self.euristics,
+                                                   allow_spaces=self.allow_spaces)
         self.transducer = SegmentTransducer(
             alphabet, operation_costs=operation_costs, allow_spaces=allow_spaces)
         self._precompute_euristics()
         self._define_h_function()
+        self.cache = LRUCache(max_entries=cache_size) if cache_size > 0 else None
+        self.n_workers = n_workers
+        self._pool = None
 
     def __contains__(self, word):
         return word in self.dictionary
@@ -45,12 +69,75 @@ class LevenshteinSearcher:
         """
         Finds all dictionary words in d-window from word
         """
+        key = (word, d, allow_spaces)
+        answer = self.cache.get(key) if self.cache is not None else None
+        if answer is None:
+            answer = self._search(word, d, allow_spaces)
+            if self.cache is not None:
+                self.cache.put(key, answer)
+        return self._format_answer(answer, return_cost)
+
+    def search_batch(self, words, d, allow_spaces=True, return_cost=True):
+        """
+        Finds all dictionary words in d-window from every word of a batch,
+        each distinct word is searched once and the ones missing from the cache
+        are searched in a process pool if n_workers > 1
+        """
+        answers = {}
+        misses = []
+        for word in dict.fromkeys(words):
+            answer = self.cache.get((word, d, allow_spaces)) if self.cache is not None else None
+            if answer is None:
+                misses.append(word)
+            else:
+                answers[word] = answer
+        if self.n_workers > 1 and len(misses) > 1:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.n_workers, initializer=_init_searcher, initargs=(self,))
+            chunk_size = -(-len(misses) // self.n_workers)
+            futures = [self._pool.submit(_search_in_worker, misses[start:start + chunk_size], d, allow_spaces)
+                       for start in range(0, len(misses), chunk_size)]
+            found = [answer for future in futures for answer in future.result()]
+        else:
+            found = [self._search(word, d, allow_spaces) for word in misses]
+        for word, answer in zip(misses, found):
+            answers[word] = answer
+            if self.cache is not None:
+                self.cache.put((word, d, allow_spaces), answer)
+        return [self._format_answer(answers[word], return_cost) for word in words]
+
+    def close(self):
+        """
+        Stops the process pool workers
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _search(self, word, d, allow_spaces):
         if not all((c in self.alphabet
                     or (c == " " and self.allow_spaces)) for c in word):
             return []
             # raise ValueError("{0} contains an incorrect symbol".format(word))
-        return self._trie_search(
-            word, d, allow_spaces=allow_spaces, return_cost=return_cost)
+        return self._trie_search(word, d, allow_spaces=allow_spaces)
+
+    @staticmethod
+    def _format_answer(answer, return_cost):
+        # cached answers are shared, so a new list is returned
+        if return_cost:
+            return list(answer)
+        return [elem[0] for elem in answer]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['cache'] = None
+        state['_pool'] = None
+        del state['h_func']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._define_h_function()
 
     def _trie_search(self, word, d, transducer=None,
                      allow_spaces=True, return_cost=True):
@@ -189,7 +276,6 @@ class LevenshteinSearcher:
             return cost
         # извлечение нужных данных из массивов
         absense_costs = self._absense_costs_by_node[index]
-        data = self.dictionary.data[index]
         costs = np.zeros(dtype=np.float64, shape=(self.euristics,))
         # costs[j] --- оценка штрафа при предпросмотре вперёд на j символов
         for i, a in enumerate(suffix):
@@ -32,6 +32,10 @@ class LevenshteinSearcherComponent(Component):
         max_distance: maximum allowed Damerau-Levenshtein distance between source words and candidates
         error_probability: assigned probability for every edit
         vocab_penalty: assigned probability of an out of vocabulary token being the correct one without changes
+        cache_size: number of most recently searched words to keep candidates for, candidates are not cached
+         if it is 0
+        n_workers: number of processes to search words missing from the cache in, words are searched
+         in the main process if it is less than 2
 
     Attributes:
         max_distance: maximum allowed Damerau-Levenshtein distance between source words and candidates
@@ -43,25 +47,19 @@ class LevenshteinSearcherComponent(Component):
     _punctuation = frozenset(string.punctuation)
 
     def __init__(self, words: Iterable[str], max_distance: int = 1, error_probability: float = 1e-4,
-                 vocab_penalty: Optional[float] = None, **kwargs):
+                 vocab_penalty: Optional[float] = None, cache_size: int = 100000, n_workers: int = 0, **kwargs):
         words = list({word.strip().lower().replace('ё', 'е') for word in words})
         alphabet = sorted({letter for word in words for letter in word})
         self.max_distance = max_distance
         self.error_probability = log10(error_probability)
         self.vocab_penalty = self.error_probability if vocab_penalty is None else log10(vocab_penalty)
-        self.searcher = LevenshteinSearcher(alphabet, words, allow_spaces=True, euristics=2)
+        self.searcher = LevenshteinSearcher(alphabet, words, allow_spaces=True, euristics=2,
+                                            cache_size=cache_size, n_workers=n_workers)
 
-    def _infer_instance(self, tokens: Iterable[str]) -> List[List[Tuple[float, str]]]:
-        candidates = []
-        for word in tokens:
-            if word in self._punctuation:
-                candidates.append([(0, word)])
-            else:
-                c = {candidate: self.error_probability * distance
-                     for candidate, distance in self.searcher.search(word, d=self.max_distance)}
-                c[word] = c.get(word, self.vocab_penalty)
-                candidates.append([(score, candidate) for candidate, score in c.items()])
-        return candidates
+    def _candidates(self, word: str, found: List[Tuple[str, float]]) -> List[Tuple[float, str]]:
+        c = {candidate: self.error_probability * distance for candidate, distance in found}
+        c[word] = c.get(word, self.vocab_penalty)
+        return [(score, candidate) for candidate, score in c.items()]
 
     def __call__(self, batch: Iterable[Iterable[str]], *args, **kwargs) -> List[List[List[Tuple[float, str]]]]:
         """Propose candidates for tokens in sentences
@@ -72,4 +70,12 @@ class LevenshteinSearcherComponent(Component):
         Returns:
             batch of lists of probabilities and candidates for every token
         """
-        return [self._infer_instance(tokens) for tokens in batch]
+        batch = [list(tokens) for tokens in batch]
+        words = list(dict.fromkeys(word for tokens in batch for word in tokens if word not in self._punctuation))
+        found = dict(zip(words, self.searcher.search_batch(words, d=self.max_distance)))
+        return [[[(0, word)] if word in self._punctuation else self._candidates(word, found[word]) for word in tokens]
+                for tokens in batch]
+
+    def destroy(self) -> None:
+        self.searcher.close()
+        super().destroy()
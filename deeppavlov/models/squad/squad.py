@@ -13,13 +13,14 @@
 # limitations under the License.
 
 from logging import getLogger
-from typing import List, Tuple
+from typing import Any, List, Optional, Tuple
 
 import numpy as np
 import tensorflow as tf
 
 from deeppavlov.core.common.check_gpu import check_gpu_existence
 from deeppavlov.core.common.registry import register
+from deeppavlov.core.data.utils import predict_bucketed
 from deeppavlov.core.layers.tf_layers import cudnn_bi_gru, variational_dropout
 from deeppavlov.core.models.tf_model import LRScheduledTFModel
 from deeppavlov.models.squad.utils import dot_attention, simple_attention, PtrNet, CudnnGRU, CudnnCompatibleGRU
@@ -50,11 +51,14 @@ class SquadModel(LRScheduledTFModel):
         keep_prob: dropout keep probability
         min_learning_rate: minimal learning rate, is used in learning rate decay
         noans_token: boolean, flags whether to use special no_ans token to make model able not to answer on question
+        bucket_size: if set, inference batches are sorted by context length and processed in buckets of this size,
+            each padded to its longest context and question
     """
     def __init__(self, word_emb: np.ndarray, char_emb: np.ndarray, context_limit: int = 450, question_limit: int = 150,
                  char_limit: int = 16, train_char_emb: bool = True, char_hidden_size: int = 100,
                  encoder_hidden_size: int = 75, attention_hidden_size: int = 75, keep_prob: float = 0.7,
-                 min_learning_rate: float = 0.001, noans_token: bool = False, **kwargs) -> None:
+                 min_learning_rate: float = 0.001, noans_token: bool = False, bucket_size: Optional[int] = None,
+                 **kwargs) -> None:
         super().__init__(**kwargs)
 
         self.init_word_emb = word_emb
@@ -69,6 +73,7 @@ class SquadModel(LRScheduledTFModel):
         self.keep_prob = keep_prob
         self.min_learning_rate = min_learning_rate
         self.noans_token = noans_token
+        self.bucket_size = bucket_size
 
         self.word_emb_dim = self.init_word_emb.shape[1]
         self.char_emb_dim = self.init_char_emb.shape[1]
@@ -301,6 +306,15 @@ class SquadModel(LRScheduledTFModel):
                 return noanswers, noanswers, zero_probs, zero_probs
             return noanswers, noanswers, zero_probs
 
+        if self.bucket_size and len(c_tokens) > self.bucket_size:
+            c_lens = np.count_nonzero(c_tokens, axis=-1)
+            q_lens = np.count_nonzero(q_tokens, axis=-1)
+            return predict_bucketed(self._predict, [c_tokens, c_chars, q_tokens, q_chars],
+                                    [c_lens, c_lens, q_lens, q_lens], self.bucket_size)
+        return self._predict(c_tokens, c_chars, q_tokens, q_chars)
+
+    def _predict(self, c_tokens: np.ndarray, c_chars: np.ndarray, q_tokens: np.ndarray,
+                 q_chars: np.ndarray) -> Tuple[Any, ...]:
         feed_dict = self._build_feed_dict(c_tokens, c_chars, q_tokens, q_chars)
 
         if self.noans_token:
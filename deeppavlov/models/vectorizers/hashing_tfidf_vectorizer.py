@@ -12,18 +12,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from collections import Counter
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 from logging import getLogger
-from typing import List, Any, Generator, Tuple, KeysView, ValuesView, Dict, Optional
+from pathlib import Path
+from typing import List, Any, Tuple, Dict, Optional, Generator
 
 import numpy as np
 import scipy as sp
 from scipy import sparse
 from sklearn.utils import murmurhash3_32
 
+from deeppavlov.core.commands.utils import expand_path
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.component import Component
 from deeppavlov.core.models.estimator import Estimator
+from deeppavlov.models.vectorizers.tfidf_index import load_tfidf_index, save_tfidf_index, merge_counts
 
 logger = getLogger(__name__)
 
@@ -43,6 +50,61 @@ def hash_(token: str, hash_size: int) -> int:
     return murmurhash3_32(token, positive=True) % hash_size
 
 
+def hash_batch(batch_ngrams: List[List[str]], hash_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Convert n-grams of a batch of documents to hashes of given size, hashing every distinct n-gram once.
+
+    Args:
+        batch_ngrams: lists of n-grams of the documents
+        hash_size: hash size
+
+    Returns:
+        a tuple of a flat array of the hashes and an array of numbers of n-grams in every document
+
+    """
+    lengths = np.fromiter((len(ngrams) for ngrams in batch_ngrams), dtype=np.int64, count=len(batch_ngrams))
+    vocab = {}
+    ids = np.fromiter((vocab.setdefault(ngram, len(vocab)) for ngram in chain.from_iterable(batch_ngrams)),
+                      dtype=np.int64, count=int(lengths.sum()))
+    vocab_hashes = np.fromiter((murmurhash3_32(ngram, positive=True) for ngram in vocab),
+                               dtype=np.int64, count=len(vocab))
+    return vocab_hashes[ids] % hash_size, lengths
+
+
+def count_ngrams(batch_ngrams: List[List[str]], hash_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Count hashes of n-grams of every document in a batch.
+
+    Args:
+        batch_ngrams: lists of n-grams of the documents
+        hash_size: hash size
+
+    Returns:
+        a tuple of sorted distinct hashes of every document as a flat array, their counts and numbers of distinct
+        hashes in every document
+
+    """
+    hashes, lengths = hash_batch(batch_ngrams, hash_size)
+    docs = np.repeat(np.arange(len(lengths)), lengths)
+    # count (document, hash) pairs at once, keys come out sorted by document and then by hash
+    keys, counts = np.unique(docs * hash_size + hashes, return_counts=True)
+    docs, hashes = np.divmod(keys, hash_size)
+    return hashes, counts, np.bincount(docs, minlength=len(lengths))
+
+
+_worker_tokenizer: Optional[Component] = None
+_worker_hash_size: Optional[int] = None
+
+
+def _init_counter(tokenizer: Component, hash_size: int) -> None:
+    """Sets the tokenizer and the hash size in a process pool worker."""
+    global _worker_tokenizer, _worker_hash_size
+    _worker_tokenizer, _worker_hash_size = tokenizer, hash_size
+
+
+def _count_in_worker(docs: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Counts n-grams hashes of documents in a process pool worker initialized with :func:`_init_counter`."""
+    return count_ngrams(list(_worker_tokenizer(docs)), _worker_hash_size)
+
+
 @register('hashing_tfidf_vectorizer')
 class HashingTfIdfVectorizer(Estimator):
     """Create a tfidf matrix from collection of documents of size [n_documents X n_features(hash_size)].
@@ -51,22 +113,29 @@ class HashingTfIdfVectorizer(Estimator):
         tokenizer: a tokenizer class
         hash_size: a hash size, power of two
         doc_index: a dictionary of document ids and their titles
-        save_path: a path to **.npz** file where tfidf matrix is saved
-        load_path: a path to **.npz** file where tfidf matrix is loaded from
+        save_path: a path to **.npz** file or to a directory where tfidf matrix is saved
+        load_path: a path to **.npz** file or to a directory where tfidf matrix is loaded from
+        n_workers: a number of processes to tokenize and count documents in while fitting, documents are
+         processed in the main process if it is less than 2
+        spill_dir: a directory to keep terms counts of fitted batches in until saving, they are kept in memory
+         if it is not set
 
     Attributes:
         hash_size: a hash size
         tokenizer: instance of a tokenizer class
         term_freqs: a dictionary with tfidf terms and their frequences
         doc_index: provided by a user ids or generated automatically ids
-        rows: tfidf matrix rows corresponding to terms
-        cols: tfidf matrix cols corresponding to docs
-        data: tfidf matrix data corresponding to tfidf values
+        rows: terms hashes of every fitted batch
+        cols: documents numbers of every fitted batch
+        data: terms counts of every fitted batch
+        n_workers: a number of processes to tokenize and count documents in
+        spill_dir: a directory to keep terms counts of fitted batches in
 
     """
 
     def __init__(self, tokenizer: Component, hash_size=2 ** 24, doc_index: Optional[dict] = None,
-                 save_path: Optional[str] = None, load_path: Optional[str] = None, **kwargs):
+                 save_path: Optional[str] = None, load_path: Optional[str] = None, n_workers: int = 0,
+                 spill_dir: Optional[str] = None, **kwargs):
 
         super().__init__(save_path=save_path, load_path=load_path, mode=kwargs.get('mode', 'infer'))
 
@@ -75,6 +144,13 @@ class HashingTfIdfVectorizer(Estimator):
         self.rows = []
         self.cols = []
         self.data = []
+        self.n_workers = n_workers
+        self.spill_dir = expand_path(spill_dir) if spill_dir else None
+        self._spill_path: Optional[Path] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending = deque()
+        self._n_counted = 0
+        self._fitted = np.zeros(0, dtype=bool)
 
         if kwargs.get('mode', 'infer') == 'infer':
             self.tfidf_matrix, opts = self.load()
@@ -82,7 +158,7 @@ class HashingTfIdfVectorizer(Estimator):
             self.hash_size = opts['hash_size']
             self.term_freqs = opts['term_freqs'].squeeze()
             self.doc_index = opts['doc_index']
-            self.index2doc = self.get_index2doc()
+            self.index2doc = opts['index2doc']
         else:
             self.term_freqs = None
             self.doc_index = doc_index or {}
@@ -97,34 +173,19 @@ class HashingTfIdfVectorizer(Estimator):
             transformed documents as a csr_matrix with shape [n_documents X :attr:`hash_size`]
 
         """
+        hashes_unique, q_hashes, lengths = count_ngrams(list(self.tokenizer(questions)), self.hash_size)
+        tfs = np.log1p(q_hashes)
 
-        sp_tfidfs = []
-
-        for question in questions:
-            ngrams = list(self.tokenizer([question]))
-            hashes = [hash_(ngram, self.hash_size) for ngram in ngrams[0]]
-
-            hashes_unique, q_hashes = np.unique(hashes, return_counts=True)
-            tfs = np.log1p(q_hashes)
-
-            if len(q_hashes) == 0:
-                sp_tfidfs.append(Sparse((1, self.hash_size)))
-                continue
-
-            size = len(self.doc_index)
-            Ns = self.term_freqs[hashes_unique]
-            idfs = np.log((size - Ns + 0.5) / (Ns + 0.5))
-            idfs[idfs < 0] = 0
-
-            tfidf = np.multiply(tfs, idfs)
+        size = len(self.doc_index)
+        Ns = self.term_freqs[hashes_unique]
+        idfs = np.log((size - Ns + 0.5) / (Ns + 0.5))
+        idfs[idfs < 0] = 0
 
-            indptr = np.array([0, len(hashes_unique)])
-            sp_tfidf = Sparse((tfidf, hashes_unique, indptr), shape=(1, self.hash_size)
-                              )
-            sp_tfidfs.append(sp_tfidf)
+        tfidf = np.multiply(tfs, idfs)
 
-        transformed = sp.sparse.vstack(sp_tfidfs)
-        return transformed
+        indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        return Sparse((tfidf, hashes_unique, indptr), shape=(len(lengths), self.hash_size))
 
     def get_index2doc(self) -> Dict[Any, int]:
         """Invert doc_index.
@@ -136,7 +197,7 @@ class HashingTfIdfVectorizer(Estimator):
         return dict(zip(self.doc_index.values(), self.doc_index.keys()))
 
     def get_counts(self, docs: List[str], doc_ids: List[Any]) \
-            -> Generator[Tuple[KeysView, ValuesView, List[int]], Any, None]:
+            -> Generator[Tuple[np.ndarray, np.ndarray, List[int]], Any, None]:
         """Get term counts for a list of documents.
 
         Args:
@@ -150,20 +211,10 @@ class HashingTfIdfVectorizer(Estimator):
             None
 
         """
-        logger.info("Tokenizing batch...")
-        batch_ngrams = list(self.tokenizer(docs))
-        logger.info("Counting hash...")
-        doc_id = iter(doc_ids)
-        for ngrams in batch_ngrams:
-            counts = Counter([hash_(gram, self.hash_size) for gram in ngrams])
-            hashes = counts.keys()
-            values = counts.values()
-            _id = self.doc_index[next(doc_id)]
-            if values:
-                col_id = [_id] * len(values)
-            else:
-                col_id = []
-            yield hashes, values, col_id
+        hashes, counts, lengths = count_ngrams(list(self.tokenizer(docs)), self.hash_size)
+        bounds = np.cumsum(lengths)[:-1]
+        for doc_hashes, doc_counts, doc_id in zip(np.split(hashes, bounds), np.split(counts, bounds), doc_ids):
+            yield doc_hashes, doc_counts, [self.doc_index[doc_id]] * len(doc_counts)
 
     def get_count_matrix(self, row: List[int], col: List[int], data: List[int], size: int) \
             -> Sparse:
@@ -194,33 +245,37 @@ class HashingTfIdfVectorizer(Estimator):
             a tuple of tfidf matrix and term frequences
 
         """
-
-        binary = (count_matrix > 0).astype(int)
-        term_freqs = np.array(binary.sum(1)).squeeze()
-        idfs = np.log((count_matrix.shape[1] - term_freqs + 0.5) / (term_freqs + 0.5))
-        idfs[idfs < 0] = 0
-        idfs = sp.sparse.diags(idfs, 0)
-        tfs = count_matrix.log1p()
-        tfidfs = idfs.dot(tfs)
-        return tfidfs, term_freqs
+        count_matrix = sparse.coo_matrix(count_matrix)
+        count_matrix.sum_duplicates()
+        count_matrix.eliminate_zeros()
+        tfidf_matrix, term_freqs, _ = merge_counts([count_matrix.row], [count_matrix.col], [count_matrix.data],
+                                                   *count_matrix.shape)
+        return tfidf_matrix, term_freqs
 
     def save(self) -> None:
-        """Save tfidf matrix into **.npz** format.
+        """Save tfidf matrix into **.npz** format or, if :attr:`save_path` has no **.npz** suffix, into a directory
+        of arrays that are memory-mapped on loading.
 
         Returns:
             None
 
         """
         logger.info("Saving tfidf matrix to {}".format(self.save_path))
-        count_matrix = self.get_count_matrix(self.rows, self.cols, self.data,
-                                             size=len(self.doc_index))
-        tfidf_matrix, term_freqs = self.get_tfidf_matrix(count_matrix)
+        to_dir = self.save_path.suffix != '.npz'
+        tfidf_matrix, term_freqs, doc_lengths = self.merge_batches(out_dir=self.save_path if to_dir else None)
         self.term_freqs = term_freqs
 
+        if to_dir:
+            save_tfidf_index(self.save_path, tfidf_matrix, self.term_freqs, self.doc_index, self.hash_size,
+                             self.tokenizer.ngram_range, doc_lengths, write_matrix=False)
+            self.reset()
+            return
+
         opts = {'hash_size': self.hash_size,
                 'ngram_range': self.tokenizer.ngram_range,
                 'doc_index': self.doc_index,
-                'term_freqs': self.term_freqs}
+                'term_freqs': self.term_freqs,
+                'doc_lengths': doc_lengths}
 
         data = {
             'data': tfidf_matrix.data,
@@ -234,8 +289,26 @@ class HashingTfIdfVectorizer(Estimator):
         # release memory
         self.reset()
 
+    def merge_batches(self, out_dir: Optional[Path] = None, tfidf: bool = True) \
+            -> Tuple[Sparse, np.ndarray, np.ndarray]:
+        """Merge terms counts of the fitted batches into a matrix with
+        :func:`~deeppavlov.models.vectorizers.tfidf_index.merge_counts`.
+
+        Args:
+            out_dir: a directory to write the matrix arrays to, they are memory-mapped from there
+            tfidf: whether to convert the counts to tf-idf values
+
+        Returns:
+            a tuple of the matrix with shape [:attr:`hash_size` X n_documents], documents frequencies of the terms and
+            lengths of the documents in terms
+
+        """
+        self._collect_pending(0)
+        return merge_counts(self.rows, self.cols, self.data, self.hash_size, len(self.doc_index), out_dir=out_dir,
+                            tfidf=tfidf)
+
     def reset(self) -> None:
-        """Clear :attr:`rows`, :attr:`cols` and :attr:`data`
+        """Clear :attr:`rows`, :attr:`cols` and :attr:`data`, stop the workers and remove spilled counts
 
         Returns:
             None
@@ -244,10 +317,21 @@ class HashingTfIdfVectorizer(Estimator):
         self.rows.clear()
         self.cols.clear()
         self.data.clear()
+        self._pending.clear()
+        self._n_counted = 0
+        self._fitted = np.zeros(0, dtype=bool)
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self._spill_path is not None:
+            shutil.rmtree(str(self._spill_path), ignore_errors=True)
+            self._spill_path = None
 
     def load(self) -> Tuple[Sparse, Dict]:
         """Load a tfidf matrix as csr_matrix.
 
+        Matrices saved into a directory are memory-mapped instead of being read into memory.
+
         Returns:
             a tuple of tfidf matrix and csr data.
 
@@ -262,14 +346,14 @@ class HashingTfIdfVectorizer(Estimator):
             raise FileNotFoundError("HashingTfIdfVectorizer path doesn't exist!")
 
         logger.info("Loading tfidf matrix from {}".format(self.load_path))
-        loader = np.load(self.load_path)
-        matrix = Sparse((loader['data'], loader['indices'],
-                         loader['indptr']), shape=loader['shape'])
-        return matrix, loader['opts'].item(0)
+        return load_tfidf_index(self.load_path)
 
     def partial_fit(self, docs: List[str], doc_ids: List[Any], doc_nums: List[int]) -> None:
         """Partially fit on one batch.
 
+        Terms counts of batches are merged without summing, so every document has to be fitted only once
+        since the last :meth:`fit` or :meth:`save`.
+
         Args:
             docs: a list of input documents
             doc_ids: a list of document ids corresponding to input documents
@@ -278,14 +362,67 @@ class HashingTfIdfVectorizer(Estimator):
         Returns:
             None
 
+        Raises:
+            ValueError if a document is fitted more than once.
+
         """
         for doc_id, i in zip(doc_ids, doc_nums):
             self.doc_index[doc_id] = i
-
-        for batch_rows, batch_data, batch_cols in self.get_counts(docs, doc_ids):
-            self.rows.extend(batch_rows)
-            self.cols.extend(batch_cols)
-            self.data.extend(batch_data)
+        cols = np.array([self.doc_index[doc_id] for doc_id in doc_ids], dtype=np.int32)
+        self._mark_fitted(cols)
+
+        if self.n_workers < 2:
+            self._add_counts([count_ngrams(list(self.tokenizer(docs)), self.hash_size)], cols)
+            return
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.n_workers, initializer=_init_counter,
+                                             initargs=(self.tokenizer, self.hash_size))
+        chunk_size = -(-len(docs) // self.n_workers)
+        futures = [self._pool.submit(_count_in_worker, docs[start:start + chunk_size])
+                   for start in range(0, len(docs), chunk_size)]
+        self._pending.append((futures, cols))
+        # let the workers count the next batch while the current one is collected
+        self._collect_pending(1)
+
+    def _mark_fitted(self, cols: np.ndarray) -> None:
+        if not len(cols):
+            return
+        if cols.max() >= len(self._fitted):
+            fitted = np.zeros(max(cols.max() + 1, 2 * len(self._fitted)), dtype=bool)
+            fitted[:len(self._fitted)] = self._fitted
+            self._fitted = fitted
+        if self._fitted[cols].any() or len(np.unique(cols)) < len(cols):
+            raise ValueError('Every document has to be fitted only once, but some documents numbers of the batch '
+                             'have already been fitted')
+        self._fitted[cols] = True
+
+    def _collect_pending(self, max_pending: int) -> None:
+        while len(self._pending) > max_pending:
+            futures, cols = self._pending.popleft()
+            self._add_counts([future.result() for future in futures], cols)
+
+    def _add_counts(self, counts: List[Tuple[np.ndarray, np.ndarray, np.ndarray]], cols: np.ndarray) -> None:
+        rows = np.concatenate([hashes for hashes, _, _ in counts]).astype(np.int32)
+        data = np.concatenate([values for _, values, _ in counts]).astype(np.float32)
+        self._n_counted += len(cols)
+        cols = np.repeat(cols, np.concatenate([lengths for _, _, lengths in counts]))
+
+        if self.spill_dir is not None:
+            if self._spill_path is None:
+                self.spill_dir.mkdir(parents=True, exist_ok=True)
+                self._spill_path = Path(tempfile.mkdtemp(prefix='tfidf_counts_', dir=str(self.spill_dir)))
+            arrays = []
+            for name, array in (('rows', rows), ('cols', cols), ('data', data)):
+                path = self._spill_path / f'{len(self.rows)}_{name}.npy'
+                np.save(str(path), array)
+                arrays.append(np.load(str(path), mmap_mode='r'))
+            rows, cols, data = arrays
+
+        self.rows.append(rows)
+        self.cols.append(cols)
+        self.data.append(data)
+        logger.info(f'Counted terms of {self._n_counted} documents')
 
     def fit(self, docs: List[str], doc_ids: List[Any], doc_nums: List[int]) -> None:
         """Fit the vectorizer.
@@ -300,7 +437,5 @@ class HashingTfIdfVectorizer(Estimator):
 
         """
         self.doc_index = {}
-        self.rows = []
-        self.cols = []
-        self.data = []
+        self.reset()
         return self.partial_fit(docs, doc_ids, doc_nums)
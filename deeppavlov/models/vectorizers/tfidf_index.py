@@ -0,0 +1,345 @@
+# Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import json
+from collections.abc import Mapping, Sequence
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+from tqdm import tqdm
+
+from deeppavlov.core.commands.utils import expand_path
+
+logger = getLogger(__name__)
+
+META_FILENAME = 'meta.json'
+
+
+class StringArray(Sequence):
+    """Read-only sequence of strings stored as concatenated UTF-8 bytes with offsets.
+
+    Args:
+        offsets: offsets of the strings in ``data``, one more than a number of strings
+        data: concatenated UTF-8 encoded strings
+
+    """
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray) -> None:
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f'string index {i} out of range')
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode('utf8')
+
+    @classmethod
+    def from_strings(cls, strings: List[str]) -> 'StringArray':
+        encoded = [s.encode('utf8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(s) for s in encoded], out=offsets[1:])
+        return cls(offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8))
+
+    def save(self, path: Union[str, Path], name: str) -> None:
+        """Save the strings to ``{name}_offsets.npy`` and ``{name}_bytes.npy`` files in the ``path`` directory."""
+        np.save(str(Path(path) / f'{name}_offsets.npy'), np.asarray(self.offsets))
+        np.save(str(Path(path) / f'{name}_bytes.npy'), np.asarray(self.data))
+
+    @classmethod
+    def load(cls, path: Union[str, Path], name: str, mmap_mode: Optional[str] = 'r') -> 'StringArray':
+        """Load strings saved with :meth:`save`, memory-mapped by default."""
+        return cls(np.load(str(Path(path) / f'{name}_offsets.npy'), mmap_mode=mmap_mode),
+                   np.load(str(Path(path) / f'{name}_bytes.npy'), mmap_mode=mmap_mode))
+
+
+class StringIndex(Mapping):
+    """Read-only mapping of strings from a :class:`StringArray` to their positions.
+
+    Keys are looked up with a binary search over positions of the strings sorted by their UTF-8 bytes.
+
+    Args:
+        strings: indexed strings
+        order: positions of the strings in sorted order
+
+    """
+
+    def __init__(self, strings: StringArray, order: np.ndarray) -> None:
+        self.strings = strings
+        self.order = order
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.strings)
+
+    def _key(self, i: int) -> bytes:
+        return bytes(self.strings.data[self.strings.offsets[i]:self.strings.offsets[i + 1]])
+
+    def __getitem__(self, key: str) -> int:
+        if not isinstance(key, str):
+            raise KeyError(key)
+        encoded = key.encode('utf8')
+        lo, hi = 0, len(self.order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(self.order[mid]) < encoded:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.order) and self._key(self.order[lo]) == encoded:
+            return int(self.order[lo])
+        raise KeyError(key)
+
+    def find(self, keys: List[str]) -> np.ndarray:
+        """Get positions of many keys at once.
+
+        A few keys are binary searched one by one, otherwise the sorted keys are merged with the sorted index
+        strings in one pass over the index.
+
+        Args:
+            keys: strings to look up, may contain duplicates
+
+        Returns:
+            positions of the keys, ``-1`` for missing ones
+
+        """
+        positions = np.full(len(keys), -1, dtype=np.int64)
+        n = len(self.order)
+        if not keys or not n:
+            return positions
+        if len(keys) * n.bit_length() < n:
+            for i, key in enumerate(keys):
+                positions[i] = self.get(key, -1)
+            return positions
+
+        encoded = [key.encode('utf8') if isinstance(key, str) else None for key in keys]
+        queries = sorted((i for i, key in enumerate(encoded) if key is not None), key=encoded.__getitem__)
+        index_keys = self._iter_sorted()
+        index_key, position = next(index_keys)
+        for i in queries:
+            key = encoded[i]
+            while index_key < key:
+                index_key, position = next(index_keys, (None, None))
+                if index_key is None:
+                    return positions
+            if index_key == key:
+                positions[i] = position
+        return positions
+
+    def _iter_sorted(self, chunk_size: int = 2 ** 16) -> Iterator[Tuple[bytes, int]]:
+        buffer = memoryview(np.ascontiguousarray(self.strings.data))
+        offsets = self.strings.offsets
+        for start in range(0, len(self.order), chunk_size):
+            chunk = np.asarray(self.order[start:start + chunk_size])
+            begins = offsets[chunk].tolist()
+            ends = offsets[chunk + 1].tolist()
+            for begin, end, position in zip(begins, ends, chunk.tolist()):
+                yield bytes(buffer[begin:end]), position
+
+    def items(self):
+        return zip(self.strings, range(len(self.strings)))
+
+    def values(self):
+        return range(len(self.strings))
+
+    @staticmethod
+    def sort_order(strings: List[str]) -> np.ndarray:
+        """Get positions of strings in the order of their UTF-8 bytes."""
+        return np.array(sorted(range(len(strings)), key=lambda i: strings[i].encode('utf8')), dtype=np.int64)
+
+
+def _empty(out_dir: Optional[Path], name: str, size: int, dtype: type) -> np.ndarray:
+    if out_dir is None:
+        return np.empty(size, dtype=dtype)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return np.lib.format.open_memmap(str(out_dir / f'{name}.npy'), mode='w+', dtype=dtype, shape=(size,))
+
+
+def merge_counts(rows: List[np.ndarray], cols: List[np.ndarray], data: List[np.ndarray], hash_size: int,
+                 n_docs: int, out_dir: Optional[Union[str, Path]] = None, tfidf: bool = True) \
+        -> Tuple[sparse.csr_matrix, np.ndarray, np.ndarray]:
+    """Merge terms counts of documents batches into a tf-idf matrix.
+
+    Batches are written one by one right to their places in the matrix arrays, so only the matrix and one batch
+    are kept in memory, or only one batch if ``out_dir`` is given. Every document must be counted in one batch only.
+
+    Args:
+        rows: terms hashes of every batch
+        cols: documents numbers of every batch
+        data: terms counts of every batch
+        hash_size: a hash size
+        n_docs: a number of documents
+        out_dir: a directory to write ``data.npy``, ``indices.npy`` and ``indptr.npy`` arrays of the matrix to,
+            the matrix arrays are memory-mapped from these files if it is given
+        tfidf: whether to convert the counts to tf-idf values, the matrix keeps raw counts otherwise
+
+    Returns:
+        a tuple of the tf-idf (or counts) matrix with shape [hash_size X n_docs], documents frequencies of the terms and
+        lengths of the documents in terms
+
+    """
+    out_dir = Path(out_dir) if out_dir is not None else None
+    term_freqs = np.zeros(hash_size, dtype=np.int64)
+    doc_lengths = np.zeros(n_docs, dtype=np.int64)
+    for batch_rows, batch_cols, batch_data in zip(rows, cols, data):
+        terms, counts = np.unique(batch_rows, return_counts=True)
+        term_freqs[terms] += counts
+        np.add.at(doc_lengths, batch_cols, batch_data.astype(np.int64))
+    # scipy needs the same dtype for indices and indptr and would copy them to cast
+    index_dtype = np.int32 if max(term_freqs.sum(), n_docs) < 2 ** 31 else np.int64
+    indptr = np.zeros(hash_size + 1, dtype=index_dtype)
+    np.cumsum(term_freqs, out=indptr[1:])
+
+    indices = _empty(out_dir, 'indices', int(indptr[-1]), index_dtype)
+    values = _empty(out_dir, 'data', int(indptr[-1]), np.float64)
+    cursor = indptr[:-1].copy()
+    for batch_rows, batch_cols, batch_data in tqdm(zip(rows, cols, data), total=len(rows),
+                                                   desc='Merging terms counts'):
+        order = np.argsort(batch_rows, kind='stable')
+        terms, starts, counts = np.unique(batch_rows[order], return_index=True, return_counts=True)
+        positions = np.arange(len(order)) - np.repeat(starts - cursor[terms], counts)
+        indices[positions] = batch_cols[order]
+        values[positions] = batch_data[order]
+        cursor[terms] += counts
+
+    if tfidf:
+        idfs = np.log((n_docs - term_freqs + 0.5) / (term_freqs + 0.5))
+        idfs[idfs < 0] = 0
+        chunk = 2 ** 20
+        for start in range(0, hash_size, chunk):
+            end = min(start + chunk, hash_size)
+            chunk_values = values[indptr[start]:indptr[end]]
+            np.log1p(chunk_values, out=chunk_values)
+            chunk_values *= np.repeat(idfs[start:end], term_freqs[start:end])
+
+    if out_dir is not None:
+        np.save(str(out_dir / 'indptr.npy'), indptr)
+        values.flush()
+        indices.flush()
+    matrix = sparse.csr_matrix((values, indices, indptr), shape=(hash_size, n_docs), copy=False)
+    return matrix, term_freqs, doc_lengths
+
+
+def save_tfidf_index(path: Union[str, Path], tfidf_matrix: sparse.csr_matrix, term_freqs: np.ndarray,
+                     doc_index: Dict[Any, int], hash_size: int, ngram_range: List[int],
+                     doc_lengths: Optional[np.ndarray] = None, write_matrix: bool = True) -> None:
+    """Save a tf-idf matrix as a directory of raw arrays to be memory-mapped with :func:`load_tfidf_index`.
+
+    Args:
+        path: a path to the index directory
+        tfidf_matrix: a tf-idf matrix with shape [hash_size X n_documents]
+        term_freqs: documents frequencies of the terms
+        doc_index: a dictionary of documents titles and their numbers, titles are converted to strings
+        hash_size: a hash size
+        ngram_range: a range of n-grams used for terms
+        doc_lengths: lengths of the documents in terms, needed to convert the matrix to a BM25 inverted index
+        write_matrix: whether to write the matrix arrays, ``False`` if they are already written by
+            :func:`merge_counts`
+
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    titles = [''] * tfidf_matrix.shape[1]
+    for title, i in doc_index.items():
+        titles[i] = str(title)
+
+    if write_matrix:
+        np.save(str(path / 'data.npy'), tfidf_matrix.data)
+        np.save(str(path / 'indices.npy'), tfidf_matrix.indices)
+        np.save(str(path / 'indptr.npy'), tfidf_matrix.indptr)
+    np.save(str(path / 'term_freqs.npy'), np.asarray(term_freqs).squeeze())
+    if doc_lengths is not None:
+        np.save(str(path / 'doc_lengths.npy'), np.asarray(doc_lengths))
+    StringArray.from_strings(titles).save(path, 'titles')
+    np.save(str(path / 'titles_order.npy'), StringIndex.sort_order(titles))
+
+    meta = {'shape': list(tfidf_matrix.shape), 'hash_size': hash_size, 'ngram_range': list(ngram_range)}
+    with (path / META_FILENAME).open('w', encoding='utf8') as f:
+        json.dump(meta, f)
+
+
+def load_tfidf_index(path: Union[str, Path]) -> Tuple[sparse.csr_matrix, Dict[str, Any]]:
+    """Load a tf-idf matrix saved with :func:`save_tfidf_index` or as a **.npz** file.
+
+    Arrays of an index directory are memory-mapped, so loading takes milliseconds, only the used pages are read
+    from disk, and processes serving the same index share them in the page cache.
+
+    Args:
+        path: a path to an index directory or to a **.npz** file
+
+    Returns:
+        a tuple of the tf-idf matrix and a dictionary with ``hash_size``, ``ngram_range``, ``term_freqs``,
+        ``doc_lengths`` (``None`` for matrices saved without them), ``doc_index`` and ``index2doc`` keys
+
+    """
+    path = Path(path)
+    if not path.is_dir():
+        loader = np.load(str(path), allow_pickle=True)
+        matrix = sparse.csr_matrix((loader['data'], loader['indices'], loader['indptr']),
+                                   shape=tuple(loader['shape']))
+        opts = loader['opts'].item(0)
+        opts.setdefault('doc_lengths', None)
+        opts['index2doc'] = dict(zip(opts['doc_index'].values(), opts['doc_index'].keys()))
+        return matrix, opts
+
+    with (path / META_FILENAME).open(encoding='utf8') as f:
+        meta = json.load(f)
+    arrays = {name: np.load(str(path / f'{name}.npy'), mmap_mode='r')
+              for name in ('data', 'indices', 'indptr', 'term_freqs', 'titles_order')}
+    matrix = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=tuple(meta['shape']),
+                               copy=False)
+    titles = StringArray.load(path, 'titles')
+    doc_lengths_path = path / 'doc_lengths.npy'
+    opts = {
+        'hash_size': meta['hash_size'],
+        'ngram_range': meta['ngram_range'],
+        'term_freqs': arrays['term_freqs'],
+        'doc_lengths': np.load(str(doc_lengths_path), mmap_mode='r') if doc_lengths_path.exists() else None,
+        'doc_index': StringIndex(titles, arrays['titles_order']),
+        'index2doc': titles
+    }
+    return matrix, opts
+
+
+def convert_npz_index(npz_path: Union[str, Path], index_path: Union[str, Path]) -> None:
+    """Convert a **.npz** tf-idf matrix to an index directory loaded with memory mapping.
+
+    Args:
+        npz_path: a path to the **.npz** file
+        index_path: a path to the index directory
+
+    """
+    matrix, opts = load_tfidf_index(expand_path(npz_path))
+    save_tfidf_index(expand_path(index_path), matrix, opts['term_freqs'], opts['doc_index'], opts['hash_size'],
+                     opts['ngram_range'], opts['doc_lengths'])
+    logger.info(f'Converted {npz_path} to {index_path}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert a .npz tf-idf matrix to a memory-mapped index directory')
+    parser.add_argument('npz_path', help='path to the .npz tf-idf matrix', type=str)
+    parser.add_argument('index_path', help='path to the index directory', type=str)
+    args = parser.parse_args()
+    convert_npz_index(args.npz_path, args.index_path)
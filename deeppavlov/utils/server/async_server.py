@@ -0,0 +1,262 @@
+# Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import json
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from logging import getLogger
+from pathlib import Path
+from typing import List, Optional, Union, Tuple, Any
+
+from deeppavlov.core.agent.dialog_logger import DialogLogger
+from deeppavlov.core.commands.infer import build_model
+from deeppavlov.core.commands.utils import parse_config
+from deeppavlov.core.common.errors import ConfigError
+from deeppavlov.utils.server.batcher import ModelBatcher
+from deeppavlov.utils.server.server import get_model_args, get_response_data, PROMETHEUS_CONTENT_TYPE
+
+log = getLogger(__name__)
+
+_worker_model = None
+
+
+def _init_worker(model_config: Union[str, Path, dict]) -> None:
+    """Builds the model in a process pool worker."""
+    global _worker_model
+    _worker_model = build_model(model_config)
+
+
+def _infer_in_worker(model_args: List[list]) -> Any:
+    """Runs the model built by :func:`_init_worker` in a process pool worker."""
+    return _worker_model(*model_args)
+
+
+class AsyncModelApp:
+    """ASGI application that serves a model with inference in a thread or process pool.
+
+    Requests are accepted by an event loop, so one slow request does not block the others. At most
+    ``max_concurrency`` model calls run at the same time, up to ``max_queue_size`` requests more wait for
+    a free slot and further requests are rejected with the 429 status code. On the ASGI ``lifespan`` shutdown
+    event new requests are rejected with the 503 status code, and the application waits for accepted requests
+    to finish before shutting the pool down.
+
+    Args:
+        model_config: model configuration.
+        endpoint: URL path of the model endpoint.
+        params_names: names of the model arguments in the request payload.
+        executor: ``'thread'`` (default) to run the model built once in the current process in a thread pool or
+            ``'process'`` to build a model copy in every worker process of a process pool. The process executor
+            is opt-in: memory consumption is multiplied by ``workers``, as loaded model data is not shared
+            between the copies.
+        workers: number of pool workers.
+        max_concurrency: maximum number of model calls running at the same time.
+        max_queue_size: maximum number of requests waiting for a model call.
+        max_batch_size: if greater than 1, concurrent requests are merged into batches of up to this size
+            with :class:`~deeppavlov.utils.server.batcher.ModelBatcher` (thread executor only).
+        max_wait_ms: how long the batcher waits for more requests, in milliseconds.
+        metrics: whether to collect components statistics and serve them on ``/metrics`` in the Prometheus
+            format (thread executor only).
+        trace_path: path to a file to save per-request traces to if ``metrics`` is ``True``.
+    """
+    def __init__(self, model_config: Union[str, Path, dict], endpoint: str, params_names: List[str],
+                 executor: str = 'thread', workers: int = 1, max_concurrency: int = 1, max_queue_size: int = 100,
+                 max_batch_size: int = 1, max_wait_ms: float = 5, metrics: bool = False,
+                 trace_path: Optional[str] = None) -> None:
+        self.endpoint = endpoint
+        self.params_names = params_names
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue_size = max(0, max_queue_size)
+        self.dialog_logger = DialogLogger(agent_name='dp_api')
+
+        self.batcher: Optional[ModelBatcher] = None
+        self.instrumentation = None
+        self.caches = {}
+        if executor == 'thread':
+            self.model = build_model(model_config)
+            if metrics:
+                self.instrumentation = self.model.enable_instrumentation(trace_path)
+                self.caches = self.model.get_caches()
+            self.in_x_count = len(self.model.in_x)
+            self.out_count = len(self.model.out_params)
+            if max_batch_size > 1:
+                self.batcher = ModelBatcher(self.model, max_batch_size, max_wait_ms)
+                self.batcher.start()
+                self.max_concurrency = max(self.max_concurrency, max_batch_size)
+            self.executor: Executor = ThreadPoolExecutor(max_workers=max(workers, self.max_concurrency))
+        elif executor == 'process':
+            log.warning(f'Process executor builds {workers} separate model copies, memory consumption is '
+                        f'multiplied by the number of workers')
+            chainer_config = parse_config(model_config)['chainer']
+            self.model = None
+            self.in_x_count = len(chainer_config['in']) if isinstance(chainer_config['in'], list) else 1
+            out = chainer_config.get('out', chainer_config['in'])
+            self.out_count = len(out) if isinstance(out, list) else 1
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                initargs=(model_config,))
+        else:
+            raise ConfigError(f'Unknown executor type "{executor}", "thread" or "process" expected')
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._active = 0
+        self._idle: Optional[asyncio.Event] = None
+        self._closing = False
+
+    async def __call__(self, scope: dict, receive, send) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            if self.instrumentation is not None and scope['path'] == '/metrics' and scope['method'] == 'GET':
+                body = self.instrumentation.to_prometheus(caches=self.caches).encode('utf-8')
+                await self._send(send, 200, body, PROMETHEUS_CONTENT_TYPE)
+                return
+            status, result = await self._handle_http(scope, receive)
+            await self._send(send, status, json.dumps(result, ensure_ascii=False).encode('utf-8'))
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self._init_loop_primitives()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _init_loop_primitives(self) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._idle = asyncio.Event()
+            self._idle.set()
+
+    async def shutdown(self) -> None:
+        """Stops accepting requests, waits for accepted ones and shuts the pool down."""
+        self._closing = True
+        if self._idle is not None:
+            await self._idle.wait()
+        if self.batcher is not None:
+            self.batcher.stop()
+        self.executor.shutdown(wait=True)
+        log.info('Model server is stopped')
+
+    async def _handle_http(self, scope: dict, receive) -> Tuple[int, Any]:
+        if scope['path'] != self.endpoint:
+            return 404, {'error': f'{scope["path"]} not found'}
+        if scope['method'] != 'POST':
+            return 405, {'error': f'method {scope["method"]} is not allowed'}
+        if self._closing:
+            return 503, {'error': 'server is shutting down'}
+
+        headers = dict(scope.get('headers', []))
+        if not headers.get(b'content-type', b'').startswith(b'application/json'):
+            log.error('request Content-Type header is not application/json')
+            return 400, {'error': 'request Content-Type header is not application/json'}
+
+        body = await self._read_body(receive)
+        try:
+            data = json.loads(body.decode('utf-8'))
+            if not isinstance(data, dict):
+                raise ValueError('JSON object expected')
+            model_args = get_model_args(data, self.params_names, self.in_x_count)
+        except ValueError as e:
+            log.error(e)
+            return 400, {'error': str(e)}
+
+        self._init_loop_primitives()
+        if self._semaphore.locked() and self._waiting >= self.max_queue_size:
+            log.warning('request queue is full')
+            return 429, {'error': 'too many requests'}
+
+        self.dialog_logger.log_in(data)
+        self._active += 1
+        self._idle.clear()
+        try:
+            self._waiting += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self._waiting -= 1
+            try:
+                prediction = await self._infer(model_args)
+            finally:
+                self._semaphore.release()
+        except Exception as e:
+            log.exception('Error while inferring the model')
+            return 500, {'error': 'internal server error'}
+        finally:
+            self._active -= 1
+            if not self._active:
+                self._idle.set()
+
+        result = get_response_data(prediction, self.out_count)
+        self.dialog_logger.log_out(result)
+        return 200, result
+
+    def _infer(self, model_args: List[list]) -> asyncio.Future:
+        loop = asyncio.get_event_loop()
+        if self.model is None:
+            return loop.run_in_executor(self.executor, _infer_in_worker, model_args)
+        model = self.batcher or self.model
+        return loop.run_in_executor(self.executor, partial(model, *model_args))
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+        return body
+
+    @staticmethod
+    async def _send(send, status: int, body: bytes, content_type: str = 'application/json') -> None:
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', content_type.encode()),
+                        (b'content-length', str(len(body)).encode())]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def start_async_model_server(model_config: Union[str, Path, dict], server_params: dict, host: str, port: int,
+                             ssl_key: Optional[Path] = None, ssl_cert: Optional[Path] = None) -> None:
+    """Serves the model with :class:`AsyncModelApp` on the ``uvicorn`` ASGI server."""
+    try:
+        import uvicorn
+    except ImportError:
+        e = ImportError('uvicorn is required for the async serving mode, install it with `pip install uvicorn`')
+        log.error(e)
+        raise e
+
+    app = AsyncModelApp(model_config,
+                        endpoint=server_params['model_endpoint'],
+                        params_names=server_params['model_args_names'],
+                        executor=server_params.get('executor', 'thread'),
+                        workers=server_params.get('workers', 1),
+                        max_concurrency=server_params.get('max_concurrency', 1),
+                        max_queue_size=server_params.get('max_queue_size', 100),
+                        max_batch_size=server_params.get('max_batch_size', 1),
+                        max_wait_ms=server_params.get('max_wait_ms', 5),
+                        metrics=server_params.get('metrics', False),
+                        trace_path=server_params.get('trace_path') or None)
+
+    ssl_params = {}
+    if ssl_key is not None and ssl_cert is not None:
+        ssl_params = {'ssl_keyfile': str(ssl_key), 'ssl_certfile': str(ssl_cert)}
+
+    uvicorn.run(app, host=host, port=int(port), lifespan='on', **ssl_params)
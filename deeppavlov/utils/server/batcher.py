@@ -0,0 +1,146 @@
+# Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from itertools import chain
+from logging import getLogger
+from queue import Queue, Empty
+from threading import Thread, Event
+from typing import List, Optional, Any
+
+from deeppavlov.core.common.chainer import Chainer
+
+log = getLogger(__name__)
+
+
+class _BatchRequest:
+    """Single model call waiting in the :class:`ModelBatcher` queue."""
+    def __init__(self, model_args: List[list]) -> None:
+        self.model_args = model_args
+        self.size = len(model_args[0]) if model_args else 0
+        self.done = Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ModelBatcher(Thread):
+    """Coalesces concurrent model calls into larger batches.
+
+    Calls from several request threads are put into a queue. The worker thread takes the first waiting call,
+    waits up to ``max_wait_ms`` for more calls, concatenates their arguments into one batch of at most
+    ``max_batch_size`` samples, runs the model once and splits the predictions back per call.
+    A single call bigger than ``max_batch_size`` is run on its own.
+
+    The batcher has the same call interface as :class:`~deeppavlov.core.common.chainer.Chainer`, so it can be
+    used in place of the model.
+
+    Args:
+        model: model to run batches with.
+        max_batch_size: maximum total number of samples in a merged batch.
+        max_wait_ms: how long the worker waits for more calls after receiving the first one, in milliseconds.
+
+    Attributes:
+        model: model to run batches with.
+        max_batch_size: maximum total number of samples in a merged batch.
+        max_wait: how long the worker waits for more calls after receiving the first one, in seconds.
+        in_x: names of the model inputs.
+        out_params: names of the model outputs.
+    """
+    def __init__(self, model: Chainer, max_batch_size: int = 32, max_wait_ms: float = 5) -> None:
+        super().__init__(daemon=True)
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0., max_wait_ms) / 1000
+        self.in_x = model.in_x
+        self.out_params = model.out_params
+
+        self._queue: Queue = Queue()
+        self._pending: Optional[_BatchRequest] = None
+        self._stopped = False
+
+    def __call__(self, *model_args: list) -> Any:
+        """Puts a call into the queue and blocks until its predictions are ready."""
+        if self._stopped:
+            raise RuntimeError('Model batcher is stopped')
+        request = _BatchRequest(list(model_args))
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def stop(self) -> None:
+        """Stops the worker thread after already queued calls are processed."""
+        self._stopped = True
+        self._queue.put(None)
+
+    def run(self) -> None:
+        """Thread run method implementation."""
+        while True:
+            batch = self._collect_batch()
+            if not batch:
+                break
+            self._run_batch(batch)
+
+    def _next_request(self, timeout: Optional[float] = None) -> Optional[_BatchRequest]:
+        if self._pending is not None:
+            request, self._pending = self._pending, None
+            return request
+        return self._queue.get(timeout=timeout)
+
+    def _collect_batch(self) -> List[_BatchRequest]:
+        request = self._next_request()
+        if request is None:
+            return []
+        batch = [request]
+        size = request.size
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._next_request(timeout)
+            except Empty:
+                break
+            if request is None:
+                # let the outer loop stop after this batch is processed
+                self._queue.put(None)
+                break
+            if size + request.size > self.max_batch_size:
+                self._pending = request
+                break
+            batch.append(request)
+            size += request.size
+        return batch
+
+    def _run_batch(self, batch: List[_BatchRequest]) -> None:
+        try:
+            model_args = [list(chain.from_iterable(args)) for args in zip(*(request.model_args for request in batch))]
+            prediction = self.model(*model_args)
+            if len(self.out_params) == 1:
+                prediction = [prediction]
+            start = 0
+            for request in batch:
+                end = start + request.size
+                result = [list(out[start:end]) for out in prediction]
+                request.result = result[0] if len(self.out_params) == 1 else result
+                start = end
+        except Exception as e:
+            log.exception('Error while processing a merged batch')
+            for request in batch:
+                request.error = e
+        finally:
+            for request in batch:
+                request.done.set()
@@ -0,0 +1,136 @@
+# Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gc
+import os
+import signal
+import socket
+import time
+from logging import getLogger
+from ssl import SSLContext
+from typing import Callable, Optional, Set
+
+from werkzeug.serving import make_server
+
+log = getLogger(__name__)
+
+
+class PreforkServer:
+    """Serves a WSGI application with several forked worker processes sharing one listening socket.
+
+    The model has to be built before :meth:`serve_forever` is called. Workers are forked from the parent process,
+    so loaded model data (NumPy and SciPy arrays, vocabularies) are shared between workers copy-on-write instead of
+    being loaded into every worker. The parent process only supervises the workers and restarts dead ones.
+
+    Components holding threads or external sessions (e.g. TensorFlow sessions) may not work properly after fork.
+
+    Args:
+        app: WSGI application to serve.
+        host: host to listen on.
+        port: port to listen on.
+        workers: number of worker processes.
+        threaded: whether every worker handles requests in separate threads.
+        ssl_context: SSL context for the https mode.
+        worker_init: function called in every worker process after fork.
+        restart_delay: pause before restarting a dead worker, in seconds.
+    """
+    def __init__(self, app: Callable, host: str, port: int, workers: int, threaded: bool = False,
+                 ssl_context: Optional[SSLContext] = None, worker_init: Optional[Callable[[], None]] = None,
+                 restart_delay: float = 1.) -> None:
+        if not hasattr(os, 'fork'):
+            raise RuntimeError('Pre-fork serving is not supported on this platform')
+        self.app = app
+        self.host = host
+        self.port = int(port)
+        self.workers = max(1, workers)
+        self.threaded = threaded
+        self.ssl_context = ssl_context
+        self.worker_init = worker_init
+        self.restart_delay = restart_delay
+
+        self.pids: Set[int] = set()
+        self._socket: Optional[socket.socket] = None
+        self._running = False
+
+    def serve_forever(self) -> None:
+        """Forks workers and restarts them when they die until SIGINT or SIGTERM is received."""
+        family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+        self._socket = socket.socket(family, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.port))
+        self._socket.listen(128)
+        self._socket.set_inheritable(True)
+
+        # move already loaded objects out of the garbage collector's reach,
+        # so that collections in workers do not touch and copy their memory pages
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+
+        self._running = True
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+
+        for _ in range(self.workers):
+            self._spawn()
+        log.info(f'Started {self.workers} workers on {self.host}:{self.port}')
+
+        while self.pids:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            if pid not in self.pids:
+                continue
+            self.pids.discard(pid)
+            if self._running:
+                log.warning(f'Worker {pid} exited with status {status}, restarting')
+                time.sleep(self.restart_delay)
+                if self._running:
+                    self._spawn()
+
+        self._socket.close()
+        log.info('All workers are stopped')
+
+    def _stop(self, signum, frame) -> None:
+        if not self._running:
+            return
+        log.info(f'Received signal {signum}, stopping workers')
+        self._running = False
+        for pid in self.pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid:
+            self.pids.add(pid)
+            return
+
+        exit_code = 0
+        try:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            if self.worker_init is not None:
+                self.worker_init()
+            server = make_server(self.host, self.port, self.app, threaded=self.threaded,
+                                 ssl_context=self.ssl_context, fd=self._socket.fileno())
+            server.serve_forever()
+        except Exception:
+            log.exception(f'Worker {os.getpid()} failed')
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
@@ -15,7 +15,7 @@
 import ssl
 from logging import getLogger
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Tuple, Union
 
 from flasgger import Swagger, swag_from
 from flask import Flask, request, jsonify, redirect, Response
@@ -28,8 +28,11 @@ from deeppavlov.core.common.chainer import Chainer
 from deeppavlov.core.common.file import read_json
 from deeppavlov.core.common.paths import get_settings_path
 from deeppavlov.core.data.utils import check_nested_dict_keys, jsonify_data
+from deeppavlov.utils.server.batcher import ModelBatcher
+from deeppavlov.utils.server.prefork import PreforkServer
 
 SERVER_CONFIG_FILENAME = 'server_config.json'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
 
 log = getLogger(__name__)
 
@@ -57,45 +60,70 @@ def get_server_params(server_config_path, model_config):
     return server_params
 
 
-def interact(model: Chainer, params_names: List[str]) -> Tuple[Response, int]:
-    if not request.is_json:
-        log.error("request Content-Type header is not application/json")
-        return jsonify({
-            "error": "request Content-Type header is not application/json"
-        }), 400
+def get_model_args(data: dict, params_names: List[str], in_x_count: int) -> List[list]:
+    """Extracts model arguments from the request payload.
+
+    Args:
+        data: request JSON payload.
+        params_names: names of the arguments to take from the payload.
+        in_x_count: number of the model inputs.
+
+    Returns:
+        list of model arguments batches of equal size.
 
+    Raises:
+        ValueError: if the payload does not contain a valid batch.
+    """
     model_args = []
 
-    data = request.get_json()
-    dialog_logger.log_in(data)
     for param_name in params_names:
         param_value = data.get(param_name)
         if param_value is None or (isinstance(param_value, list) and len(param_value) > 0):
             model_args.append(param_value)
         else:
-            log.error(f"nonempty array expected but got '{param_name}'={repr(param_value)}")
-            return jsonify({'error': f"nonempty array expected but got '{param_name}'={repr(param_value)}"}), 400
+            raise ValueError(f"nonempty array expected but got '{param_name}'={repr(param_value)}")
 
     lengths = {len(i) for i in model_args if i is not None}
 
     if not lengths:
-        log.error('got empty request')
-        return jsonify({'error': 'got empty request'}), 400
+        raise ValueError('got empty request')
     elif len(lengths) > 1:
-        log.error('got several different batch sizes')
-        return jsonify({'error': 'got several different batch sizes'}), 400
+        raise ValueError('got several different batch sizes')
 
     batch_size = list(lengths)[0]
     model_args = [arg or [None] * batch_size for arg in model_args]
 
     # in case when some parameters were not described in model_args
-    model_args += [[None] * batch_size for _ in range(len(model.in_x) - len(model_args))]
+    model_args += [[None] * batch_size for _ in range(in_x_count - len(model_args))]
 
-    prediction = model(*model_args)
-    if len(model.out_params) == 1:
+    return model_args
+
+
+def get_response_data(prediction, out_count: int) -> list:
+    """Converts model predictions to the list of JSON serializable per-sample results."""
+    if out_count == 1:
         prediction = [prediction]
     prediction = list(zip(*prediction))
-    result = jsonify_data(prediction)
+    return jsonify_data(prediction)
+
+
+def interact(model: Union[Chainer, ModelBatcher], params_names: List[str]) -> Tuple[Response, int]:
+    if not request.is_json:
+        log.error("request Content-Type header is not application/json")
+        return jsonify({
+            "error": "request Content-Type header is not application/json"
+        }), 400
+
+    data = request.get_json()
+    dialog_logger.log_in(data)
+    try:
+        model_args = get_model_args(data, params_names, len(model.in_x))
+    except ValueError as e:
+        log.error(e)
+        return jsonify({'error': str(e)}), 400
+
+    prediction = model(*model_args)
+    result = get_response_data(prediction, len(model.out_params))
     dialog_logger.log_out(result)
     return jsonify(result), 200
 
@@ -108,6 +136,9 @@ def start_model_server(model_config, https=False, ssl_key=None, ssl_cert=None, p
     port = port or server_params['port']
     model_endpoint = server_params['model_endpoint']
     model_args_names = server_params['model_args_names']
+    max_batch_size = server_params.get('max_batch_size', 1)
+    max_wait_ms = server_params.get('max_wait_ms', 5)
+    prefork_workers = server_params.get('prefork_workers', 0)
 
     https = https or server_params['https']
 
@@ -129,10 +160,32 @@ def start_model_server(model_config, https=False, ssl_key=None, ssl_cert=None, p
         ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLSv1_2)
         ssl_context.load_cert_chain(ssh_cert_path, ssh_key_path)
     else:
+        ssh_key_path = ssh_cert_path = None
         ssl_context = None
 
+    if server_params.get('async_mode', False):
+        from deeppavlov.utils.server.async_server import start_async_model_server
+        start_async_model_server(model_config, server_params, host, port, ssh_key_path, ssh_cert_path)
+        return
+
     model = build_model(model_config)
 
+    if server_params.get('metrics', False):
+        instrumentation = model.enable_instrumentation(server_params.get('trace_path') or None)
+        caches = model.get_caches()
+
+        @app.route('/metrics')
+        def metrics():
+            return Response(instrumentation.to_prometheus(caches=caches), mimetype=PROMETHEUS_CONTENT_TYPE)
+
+    batching = max_batch_size > 1
+    if batching:
+        model = ModelBatcher(model, max_batch_size, max_wait_ms)
+        if not prefork_workers:
+            model.start()
+        log.info(f'Requests are merged into batches of up to {max_batch_size} samples '
+                 f'with {max_wait_ms} ms waiting time')
+
     @app.route('/')
     def index():
         return redirect('/apidocs/')
@@ -159,4 +212,15 @@ def start_model_server(model_config, https=False, ssl_key=None, ssl_cert=None, p
     def answer():
         return interact(model, model_args_names)
 
-    app.run(host=host, port=port, threaded=False, ssl_context=ssl_context)
+    if prefork_workers:
+        # batcher threads do not survive fork, so each worker starts its own one
+        server = PreforkServer(app, host, port, prefork_workers, threaded=batching, ssl_context=ssl_context,
+                               worker_init=model.start if batching else None)
+        server.serve_forever()
+        return
+
+    try:
+        app.run(host=host, port=port, threaded=batching, ssl_context=ssl_context)
+    finally:
+        if batching:
+            model.stop()
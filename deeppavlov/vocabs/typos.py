@@ -13,7 +13,6 @@
 # limitations under the License.
 
 import shutil
-from collections import defaultdict
 from logging import getLogger
 from pathlib import Path
 
@@ -24,6 +23,7 @@ from deeppavlov.core.commands.utils import expand_path
 from deeppavlov.core.common.file import load_pickle, save_pickle
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.data.utils import is_done, mark_done
+from deeppavlov.models.spelling_correction.levenshtein.array_trie import ArrayTrie
 
 log = getLogger(__name__)
 
@@ -41,16 +41,15 @@ class StaticDictionary:
     Attributes:
         dict_name: logical name of the dictionary
         alphabet: set of all the characters used in this dictionary
-        words_set: set of all the words
-        words_trie: trie structure of all the words
+        words_set: memory-mapped trie of all the words, supports checking whether a word is in the dictionary
+        words_trie: the same trie, its ``continuations`` method lists prefixes one letter longer than a given one
     """
 
     def __init__(self, data_dir: [Path, str]='', *args, dictionary_name: str='dictionary', **kwargs):
         data_dir = expand_path(data_dir) / dictionary_name
 
         alphabet_path = data_dir / 'alphabet.pkl'
-        words_path = data_dir / 'words.pkl'
-        words_trie_path = data_dir / 'words_trie.pkl'
+        words_trie_path = data_dir / 'words_trie'
 
         if not is_done(data_dir):
             log.info('Trying to build a dictionary in {}'.format(data_dir))
@@ -66,25 +65,21 @@ class StaticDictionary:
             alphabet.remove('⟭')
 
             save_pickle(alphabet, alphabet_path)
-            save_pickle(words, words_path)
-
-            words_trie = defaultdict(set)
-            for word in words:
-                for i in range(len(word)):
-                    words_trie[word[:i]].add(word[:i+1])
-                words_trie[word] = set()
-            words_trie = {k: sorted(v) for k, v in words_trie.items()}
-
-            save_pickle(words_trie, words_trie_path)
+            ArrayTrie.from_words(words).save(words_trie_path)
 
             mark_done(data_dir)
             log.info('built')
         else:
             log.info('Loading a dictionary from {}'.format(data_dir))
 
+        if not ArrayTrie.is_trie(words_trie_path):
+            # dictionaries built by previous versions store pickled sets of words and prefixes
+            log.info('Converting the dictionary in {} to a trie'.format(data_dir))
+            ArrayTrie.from_words(load_pickle(data_dir / 'words.pkl')).save(words_trie_path)
+
         self.alphabet = load_pickle(alphabet_path)
-        self.words_set = load_pickle(words_path)
-        self.words_trie = load_pickle(words_trie_path)
+        self.words_trie = ArrayTrie.load(words_trie_path)
+        self.words_set = self.words_trie
 
     @staticmethod
     def _get_source(data_dir, raw_dictionary_path, *args, **kwargs):
@@ -109,8 +104,8 @@ class RussianWordsVocab(StaticDictionary):
     Attributes:
         dict_name: logical name of the dictionary
         alphabet: set of all the characters used in this dictionary
-        words_set: set of all the words
-        words_trie: trie structure of all the words
+        words_set: memory-mapped trie of all the words, supports checking whether a word is in the dictionary
+        words_trie: the same trie, its ``continuations`` method lists prefixes one letter longer than a given one
     """
 
     def __init__(self, data_dir: [Path, str]='', *args, **kwargs):
@@ -137,8 +132,8 @@ class Wiki100KDictionary(StaticDictionary):
     Attributes:
         dict_name: logical name of the dictionary
         alphabet: set of all the characters used in this dictionary
-        words_set: set of all the words
-        words_trie: trie structure of all the words
+        words_set: memory-mapped trie of all the words, supports checking whether a word is in the dictionary
+        words_trie: the same trie, its ``continuations`` method lists prefixes one letter longer than a given one
     """
     def __init__(self, data_dir: [Path, str]='', *args, **kwargs):
         kwargs['dictionary_name'] = 'wikipedia_100K_vocab'
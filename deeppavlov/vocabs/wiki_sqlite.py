@@ -30,14 +30,18 @@ class WikiSQLiteVocab(SQLiteDataIterator, Component):
         load_path: a path to local DB file
         join_docs: whether to join extracted docs with ' ' or not
         shuffle: whether to shuffle data or not
+        mmap_size: a maximum number of bytes of the DB file to access with memory mapping
+        cache_size: a number of most recently fetched documents to keep in memory
 
     Attributes:
         join_docs: whether to join extracted docs with ' ' or not
 
     """
 
-    def __init__(self, load_path: str, join_docs: bool = True, shuffle: bool = False, **kwargs) -> None:
-        SQLiteDataIterator.__init__(self, load_path=load_path, shuffle=shuffle)
+    def __init__(self, load_path: str, join_docs: bool = True, shuffle: bool = False, mmap_size: int = 2 ** 28,
+                 cache_size: int = 0, **kwargs) -> None:
+        SQLiteDataIterator.__init__(self, load_path=load_path, shuffle=shuffle, mmap_size=mmap_size,
+                                    cache_size=cache_size)
         self.join_docs = join_docs
 
     def __call__(self, doc_ids: Optional[List[List[Any]]] = None, *args, **kwargs) -> List[Union[str, List[str]]]:
@@ -54,8 +58,10 @@ class WikiSQLiteVocab(SQLiteDataIterator, Component):
             logger.warn('No doc_ids are provided in WikiSqliteVocab, return all docs')
             doc_ids = [self.get_doc_ids()]
 
+        # fetch documents of the whole batch at once
+        batch_contents = iter(self.get_doc_contents([doc_id for ids in doc_ids for doc_id in ids]))
         for ids in doc_ids:
-            contents = [self.get_doc_content(doc_id) for doc_id in ids]
+            contents = [next(batch_contents) for _ in ids]
             if self.join_docs:
                 contents = ' '.join(contents)
             all_contents.append(contents)
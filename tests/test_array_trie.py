@@ -0,0 +1,29 @@
+import pickle
+
+from deeppavlov.models.spelling_correction.levenshtein.array_trie import ArrayTrie
+from deeppavlov.models.spelling_correction.levenshtein.levenshtein_searcher import LevenshteinSearcher
+from deeppavlov.models.spelling_correction.levenshtein.tabled_trie import make_trie
+
+WORDS = ['кот', 'кота', 'коты', 'котом', 'кит', 'кита', 'киты', 'китом', 'ток', 'тока', 'ком', 'комом']
+
+
+def test_array_trie(tmp_path):
+    alphabet = sorted({a for word in WORDS for a in word})
+    trie = make_trie(alphabet, WORDS, precompute_symbols=2, allow_spaces=True)
+    array_trie = ArrayTrie.from_words(WORDS, precompute_symbols=2, allow_spaces=True)
+    array_trie.save(tmp_path)
+    loaded = ArrayTrie.load(tmp_path)
+
+    for t in (array_trie, loaded, pickle.loads(pickle.dumps(loaded)), ArrayTrie.from_trie(trie)):
+        assert len(t) == len(trie)
+        assert list(t.words()) == sorted(WORDS)
+        assert 'кот' in t and 'ко' not in t and 'котик' not in t and 'dog' not in t
+        assert t.continuations('ко') == ['ком', 'кот']
+        for word in WORDS:
+            for i in range(len(word) + 1):
+                assert t.data[t.descend(t.root, word[:i])] == trie.data[trie.descend(trie.root, word[:i])]
+
+    searcher = LevenshteinSearcher(alphabet, trie, allow_spaces=True, euristics=2)
+    array_searcher = LevenshteinSearcher(alphabet, loaded, allow_spaces=True, euristics=2)
+    for word in ['кто', 'китм', 'тко', 'ком ток']:
+        assert sorted(array_searcher.search(word, 1)) == sorted(searcher.search(word, 1))
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from deeppavlov.utils.server import async_server
+from deeppavlov.utils.server.async_server import AsyncModelApp
+
+
+class StubModel:
+    in_x = ['x']
+    out_params = ['y']
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, xs):
+        self.release.wait(10)
+        if 'fail' in xs:
+            raise RuntimeError('/secret/path.db is locked')
+        return [x.upper() for x in xs]
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = StubModel()
+    monkeypatch.setattr(async_server, 'build_model', lambda config: model)
+    return model
+
+
+def _app(**kwargs):
+    return AsyncModelApp({}, endpoint='/model', params_names=['x'], **kwargs)
+
+
+async def _request(app, path='/model', method='POST', payload=None, body=None, content_type=b'application/json'):
+    if body is None:
+        body = json.dumps(payload).encode('utf-8')
+    scope = {'type': 'http', 'path': path, 'method': method, 'headers': [(b'content-type', content_type)]}
+    # the body comes in two chunks
+    messages = [{'type': 'http.request', 'body': body[:3], 'more_body': True},
+                {'type': 'http.request', 'body': body[3:], 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    start, response = sent
+    assert start['type'] == 'http.response.start' and response['type'] == 'http.response.body'
+    assert dict(start['headers'])[b'content-length'] == str(len(response['body'])).encode()
+    return start['status'], json.loads(response['body'].decode('utf-8'))
+
+
+def test_round_trip(model):
+    app = _app()
+    status, result = asyncio.run(_request(app, payload={'x': ['a', 'ёж']}))
+    assert status == 200 and result == [['A'], ['ЁЖ']]
+
+
+@pytest.mark.parametrize('request_params, status', [
+    ({'path': '/other', 'payload': {'x': ['a']}}, 404),
+    ({'method': 'GET', 'body': b''}, 405),
+    ({'body': b'{"x": ['}, 400),
+    ({'payload': ['a']}, 400),
+    ({'payload': {'x': []}}, 400),
+    ({'payload': {'x': ['a']}, 'content_type': b'text/plain'}, 400),
+])
+def test_errors(model, request_params, status):
+    app = _app()
+    response_status, result = asyncio.run(_request(app, **request_params))
+    assert response_status == status and 'error' in result
+
+
+def test_model_error_is_hidden(model):
+    status, result = asyncio.run(_request(_app(), payload={'x': ['fail']}))
+    assert status == 500 and result == {'error': 'internal server error'}
+
+
+def test_queue_full(model):
+    app = _app(max_concurrency=1, max_queue_size=1)
+    model.release.clear()
+
+    async def run():
+        first = asyncio.ensure_future(_request(app, payload={'x': ['a']}))
+        second = asyncio.ensure_future(_request(app, payload={'x': ['b']}))
+        # wait until the first request runs the model and the second one waits for it
+        while app._waiting < 1 or not app._semaphore.locked():
+            await asyncio.sleep(0.001)
+        rejected = await _request(app, payload={'x': ['c']})
+        model.release.set()
+        return rejected, await first, await second
+
+    rejected, first, second = asyncio.run(run())
+    assert rejected == (429, {'error': 'too many requests'})
+    assert first == (200, [['A']]) and second == (200, [['B']])
+
+
+def test_shutdown(model):
+    app = _app()
+    model.release.clear()
+
+    async def run():
+        lifespan = asyncio.Queue()
+        sent = []
+        for message_type in ['lifespan.startup', 'lifespan.shutdown']:
+            lifespan.put_nowait({'type': message_type})
+
+        async def send(message):
+            sent.append(message['type'])
+
+        accepted = asyncio.ensure_future(_request(app, payload={'x': ['a']}))
+        while not app._active:
+            await asyncio.sleep(0.001)
+        shutdown = asyncio.ensure_future(app({'type': 'lifespan'}, lifespan.get, send))
+        while not app._closing:
+            await asyncio.sleep(0.001)
+        rejected = await _request(app, payload={'x': ['b']})
+        # the accepted request is finished before the pool is shut down
+        assert not shutdown.done()
+        model.release.set()
+        await shutdown
+        return sent, await accepted, rejected
+
+    sent, accepted, rejected = asyncio.run(run())
+    assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+    assert accepted == (200, [['A']])
+    assert rejected == (503, {'error': 'server is shutting down'})
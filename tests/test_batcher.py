@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+
+from deeppavlov.utils.server.batcher import ModelBatcher
+
+
+class StubModel:
+    def __init__(self, n_outputs=1, error=None):
+        self.in_x = ['x', 'y']
+        self.out_params = [f'out_{i}' for i in range(n_outputs)]
+        self.error = error
+        self.batches = []
+
+    def __call__(self, xs, ys):
+        self.batches.append(list(xs))
+        if self.error is not None:
+            raise self.error
+        outputs = [[f'{x}{y}' for x, y in zip(xs, ys)], [len(xs)] * len(xs)][:len(self.out_params)]
+        return outputs[0] if len(outputs) == 1 else tuple(outputs)
+
+
+def _call_all(batcher, calls):
+    """Queues all calls from separate threads and runs the batcher until they are processed.
+
+    The batcher is stopped before it is started, so the last incomplete batch does not wait for more calls.
+    """
+    results = [None] * len(calls)
+
+    def call(i, args):
+        try:
+            results[i] = batcher(*args)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i, args)) for i, args in enumerate(calls)]
+    for i, thread in enumerate(threads):
+        thread.start()
+        # keep the queue order equal to the calls order
+        while batcher._queue.qsize() < i + 1:
+            time.sleep(0.001)
+    batcher.stop()
+    batcher.start()
+    for thread in threads:
+        thread.join(10)
+    batcher.join(10)
+    return results
+
+
+def test_merges_calls():
+    model = StubModel()
+    batcher = ModelBatcher(model, max_batch_size=4, max_wait_ms=10000)
+    results = _call_all(batcher, [(['a'], [1]), (['b', 'c'], [2, 3]), (['d'], [4]), (['e'], [5])])
+
+    # the first batch is full, so the batcher does not wait for more calls
+    assert model.batches == [['a', 'b', 'c', 'd'], ['e']]
+    assert results == [['a1'], ['b2', 'c3'], ['d4'], ['e5']]
+
+
+def test_splits_multiple_outputs():
+    model = StubModel(n_outputs=2)
+    batcher = ModelBatcher(model, max_batch_size=3, max_wait_ms=10000)
+    results = _call_all(batcher, [(['a'], [1]), (['b', 'c'], [2, 3])])
+
+    assert model.batches == [['a', 'b', 'c']]
+    assert results == [[['a1'], [3]], [['b2', 'c3'], [3, 3]]]
+
+
+def test_large_call():
+    model = StubModel()
+    batcher = ModelBatcher(model, max_batch_size=3, max_wait_ms=10000)
+    results = _call_all(batcher, [(['a'], [1]), (list('bcdef'), [2] * 5), (['g'], [3]), (['h'], [4])])
+
+    # a call bigger than max_batch_size is run on its own and is never split
+    assert model.batches == [['a'], list('bcdef'), ['g', 'h']]
+    assert results == [['a1'], [f'{x}2' for x in 'bcdef'], ['g3'], ['h4']]
+
+
+def test_max_wait_flush():
+    model = StubModel()
+    batcher = ModelBatcher(model, max_batch_size=100, max_wait_ms=1)
+    batcher.start()
+    # an incomplete batch is run after max_wait_ms without waiting for other calls
+    assert batcher(['a'], [1]) == ['a1']
+    assert batcher(['b', 'c'], [2, 3]) == ['b2', 'c3']
+    assert model.batches == [['a'], ['b', 'c']]
+    batcher.stop()
+    batcher.join(10)
+
+
+def test_error_reaches_every_caller():
+    error = ValueError('bad batch')
+    model = StubModel(error=error)
+    batcher = ModelBatcher(model, max_batch_size=3, max_wait_ms=10000)
+    results = _call_all(batcher, [(['a'], [1]), (['b', 'c'], [2, 3])])
+
+    assert len(model.batches) == 1
+    assert results == [error, error]
+
+
+def test_stop():
+    model = StubModel()
+    batcher = ModelBatcher(model, max_batch_size=10, max_wait_ms=10000)
+    results = [None, None]
+
+    def call(i):
+        results[i] = batcher([str(i)], [i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    while batcher._queue.qsize() < 2:
+        time.sleep(0.001)
+    batcher.stop()
+    batcher.start()
+    batcher.join(10)
+    for thread in threads:
+        thread.join(10)
+
+    # calls queued before stop() are processed without waiting for max_wait_ms, then the worker exits
+    assert not batcher.is_alive()
+    assert sorted(results) == [['00'], ['11']]
+    with pytest.raises(RuntimeError):
+        batcher(['x'], [0])
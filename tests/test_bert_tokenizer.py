@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from deeppavlov.models.preprocessors.bert_tokenizer import BertTokenizer
+
+tokenization = pytest.importorskip('bert_dp.tokenization')
+preprocessing = pytest.importorskip('bert_dp.preprocessing')
+
+VOCAB = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', 'the', 'The', 'cat', 'sat', 'on', 'mat', 'cafe', 'Café', 'na', '##ive',
+         '##s', '##i', '##ve', 'un', '##aff', '##able', 'x', '##x', '中', '国', '人', '.', ',', '!', '?', '-', '¿',
+         '"', "'", '(', ')', '…', 'a', '##b', 'ab']
+
+TEXTS = [
+    'The cat sat on the mat.',
+    'the cats, sat!on-the mat?',
+    'Café CAFÉ café naïve NAIVE unaffable',
+    '中国人 x中国x 人。',
+    '¿"cat" (the) mat…',
+    'cat\x00sat�on​the\x0bmat\x1fcat\x85the　mat\xa0cat\tsat\nthe\rmat',
+    '\x0c\x1c  \t ',
+    'x' * 10 + ' ' + 'x' * 11 + ' ab' + 'b' * 9 + ' abbb',
+    '',
+    'unknown words ##s',
+]
+
+
+@pytest.fixture(params=[True, False], ids=['lower', 'cased'])
+def tokenizers(request, tmp_path):
+    vocab_file = tmp_path / 'vocab.txt'
+    vocab_file.write_text('\n'.join(VOCAB) + '\n', encoding='utf8')
+    reference = tokenization.FullTokenizer(vocab_file=str(vocab_file), do_lower_case=request.param)
+    reference.wordpiece_tokenizer.max_input_chars_per_word = 10
+    tokenizer = BertTokenizer(vocab_file=str(vocab_file), do_lower_case=request.param, max_input_chars_per_word=10)
+    return tokenizer, reference
+
+
+def test_tokenize_parity(tokenizers):
+    tokenizer, reference = tokenizers
+    for text in TEXTS:
+        expected = reference.tokenize(text)
+        assert tokenizer.tokenize(text) == expected, text
+        # memoized chunks are tokenized the same way
+        assert tokenizer.tokenize_with_ids(text) == (expected, reference.convert_tokens_to_ids(expected)), text
+
+
+def test_encode_batch_parity(tokenizers):
+    tokenizer, reference = tokenizers
+    texts_a = TEXTS
+    texts_b = [TEXTS[-i - 1] or None for i in range(len(TEXTS))]
+    for max_seq_length in [6, 16, 64]:
+        for batch_b in [None, texts_b]:
+            examples = [preprocessing.InputExample(unique_id=0, text_a=text_a, text_b=text_b)
+                        for text_a, text_b in zip(texts_a, batch_b or [None] * len(texts_a))]
+            expected = preprocessing.convert_examples_to_features(examples, max_seq_length, reference)
+
+            tokens, input_ids, input_masks, input_type_ids = tokenizer.encode_batch(texts_a, batch_b, max_seq_length)
+            assert tokens == [f.tokens for f in expected]
+            assert np.array_equal(input_ids, [f.input_ids for f in expected])
+            assert np.array_equal(input_masks, [f.input_mask for f in expected])
+            assert np.array_equal(input_type_ids, [f.input_type_ids for f in expected])
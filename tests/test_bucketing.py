@@ -0,0 +1,86 @@
+import numpy as np
+
+from deeppavlov.core.data.data_learning_iterator import DataLearningIterator
+from deeppavlov.core.data.utils import length_buckets, predict_bucketed
+from deeppavlov.core.trainers.nn_trainer import NNTrainer
+from deeppavlov.models.preprocessors.bert_tokenizer import BertTokenizer
+
+
+def _padded(lengths, width):
+    batch = np.zeros((len(lengths), width), dtype=np.int32)
+    for i, length in enumerate(lengths):
+        batch[i, :length] = np.arange(1, length + 1) * (i + 1)
+    return batch
+
+
+def test_length_buckets():
+    buckets = length_buckets([5, 1, 3, 1, 4], 2)
+    assert [ids.tolist() for ids in buckets] == [[1, 3], [2, 4], [0]]
+
+
+def test_predict_bucketed():
+    calls = []
+
+    def predict(tokens, mask):
+        calls.append(tokens.shape)
+        # per-token outputs of the padded width, per-item sums and scores as a list
+        return tokens * 2, tokens.sum(axis=1), (mask.sum(axis=1) / 10).tolist()
+
+    lengths = np.array([5, 1, 3, 0, 4, 2])
+    tokens = _padded(lengths, 8)
+    mask = (tokens != 0).astype(np.int32)
+
+    expected = predict(tokens, mask)
+    calls.clear()
+    result = predict_bucketed(predict, [tokens, mask], [lengths, lengths], 2)
+
+    assert calls == [(2, 1), (2, 3), (2, 5)]
+    assert result[0].shape == (6, 5)
+    assert np.array_equal(result[0], expected[0][:, :5])
+    assert np.array_equal(result[1], expected[1])
+    assert result[2] == expected[2]
+
+    single = predict_bucketed(lambda x, _: x.sum(axis=1), [tokens, mask], [lengths, lengths], 4)
+    assert np.array_equal(single, expected[1])
+
+
+def test_predict_bucketed_per_input_lengths():
+    c_lengths = np.array([3, 1, 2])
+    q_lengths = np.array([1, 4, 2])
+    contexts, questions = _padded(c_lengths, 6), _padded(q_lengths, 5)
+
+    def predict(c, q):
+        return c.sum(axis=1) + 100 * q.sum(axis=1), q.shape[1] * np.ones(len(q), dtype=int)
+
+    sums, widths = predict_bucketed(predict, [contexts, questions], [c_lengths, q_lengths], 2)
+    assert np.array_equal(sums, predict(contexts, questions)[0])
+    # the first bucket has items 1 and 2 sorted by context lengths
+    assert widths.tolist() == [1, 4, 4]
+
+
+def test_dynamic_padding(tmp_path):
+    vocab_file = tmp_path / 'vocab.txt'
+    vocab_file.write_text('\n'.join(['[PAD]', '[UNK]', '[CLS]', '[SEP]', 'the', 'cat', 'sat', '##s', '.']))
+    tokenizer = BertTokenizer(str(vocab_file))
+    texts_a, texts_b = ['the cat sat.', 'cats'], ['the cats', None]
+
+    tokens, ids, masks, types = tokenizer.encode_batch(texts_a, texts_b, max_seq_length=16)
+    dyn_tokens, dyn_ids, dyn_masks, dyn_types = tokenizer.encode_batch(texts_a, texts_b, max_seq_length=16,
+                                                                       dynamic_padding=True)
+    assert ids.shape == (2, 16) and dyn_ids.shape == (2, 10)
+    assert dyn_tokens == tokens
+    for full, dynamic in [(ids, dyn_ids), (masks, dyn_masks), (types, dyn_types)]:
+        assert np.array_equal(full[:, :10], dynamic) and not full[:, 10:].any()
+
+
+def test_bucket_pool_size():
+    lengths = [9, 1, 7, 3, 5, 2, 8, 4]
+    iterator = DataLearningIterator({'train': [('x' * n, n) for n in lengths], 'valid': [], 'test': []},
+                                    seed=1, shuffle=False)
+    trainer = NNTrainer({'in': ['x'], 'in_y': ['y'], 'out': ['y'], 'pipe': []}, batch_size=2, bucket_pool_size=2)
+
+    batches = list(trainer._gen_train_batches(iterator))
+    assert sorted(len(y) for _, y in batches) == [2, 2, 2, 2]
+    # every pool of 4 examples is regrouped into batches of examples of similar length
+    assert sorted(sorted(y) for _, y in batches) == [[1, 3], [2, 4], [5, 8], [7, 9]]
+    assert all(x == tuple('x' * n for n in y) for x, y in batches)
@@ -0,0 +1,164 @@
+import threading
+
+import numpy as np
+import pytest
+
+from deeppavlov.core.common.cache import LRUCache, ResultCache
+from deeppavlov.core.common.chainer import Chainer, ExecutionPlan
+
+
+class Increment:
+    def __call__(self, batch):
+        return [x + 1 for x in batch]
+
+
+class Concat:
+    def __call__(self, *batches):
+        return [''.join(map(str, items)) for items in zip(*batches)]
+
+
+class Wait:
+    def __init__(self, barrier):
+        self.barrier = barrier
+
+    def __call__(self, batch):
+        self.barrier.wait()
+        return batch
+
+
+def _long_chainer(length):
+    chainer = Chainer(['x0'], [f'x{length}'])
+    for i in range(length):
+        chainer.append(Increment(), [f'x{i}'], [f'x{i + 1}'])
+    return chainer
+
+
+def test_plan_pruning():
+    chainer = Chainer(['x'], ['y'])
+    chainer.append(Increment(), ['x'], ['a'])
+    chainer.append(Increment(), ['a'], ['unused'])
+    chainer.append(Concat(), ['x', 'a'], ['y'])
+
+    assert chainer([1, 2]) == ['12', '23']
+    assert len(chainer.compile()) == 2
+    assert chainer.compute([1], targets=['a', 'unused']) == [[2], [3]]
+
+    with pytest.raises(RuntimeError):
+        chainer.compile(targets=['y'], param_names=['a'])
+
+
+def test_plan_cache_is_reset_on_append():
+    chainer = Chainer(['x'], ['x'])
+    assert chainer([1]) == [1]
+    chainer.append(Increment(), ['x'], ['x'])
+    assert chainer([1]) == [2]
+
+
+def test_parallel_execution():
+    # every component waits for all the others, so the call only succeeds if they run concurrently
+    barrier = threading.Barrier(4, timeout=10)
+    chainer = Chainer(['x'], ['y'], n_workers=4)
+    for name in ['a', 'b', 'c', 'd']:
+        chainer.append(Wait(barrier), ['x'], [name])
+    chainer.append(Concat(), ['a', 'b', 'c', 'd'], ['y'])
+
+    assert chainer([1, 2]) == ['1111', '2222']
+
+
+def test_compiled_plan_reuse(monkeypatch):
+    built = []
+    original_init = ExecutionPlan.__init__
+
+    def counting_init(self, *args, **kwargs):
+        built.append(self)
+        original_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(ExecutionPlan, '__init__', counting_init)
+
+    chainer = _long_chainer(20)
+    for _ in range(5):
+        assert chainer([0]) == [20]
+    assert len(built) == 1
+    assert chainer.compile() is built[0]
+
+    assert chainer.compute([0], targets=['x10']) == [10]
+    assert len(built) == 2 and len(built[1]) == 10
+
+
+def test_instrumentation(tmp_path):
+    chainer = Chainer(['x'], ['y'])
+    chainer.append(Increment(), ['x'], ['a'], component_id='first')
+    chainer.append(Concat(), ['x', 'a'], ['y'])
+    instrumentation = chainer.enable_instrumentation(tmp_path / 'trace.jsonl')
+
+    chainer([1, 2])
+    chainer([3])
+
+    stats = instrumentation.to_dict()
+    assert stats['calls'] == 2
+    assert [(c['component'], c['id'], c['calls'], c['batch_items']) for c in stats['components']] == \
+        [('Increment', 'first', 2, 3), ('Concat', '', 2, 3)]
+    assert 'deeppavlov_component_latency_seconds_count{component="Increment",id="first"} 2' in \
+        instrumentation.to_prometheus()
+    assert len((tmp_path / 'trace.jsonl').read_text().splitlines()) == 2
+
+
+def test_results_cache():
+    calls = []
+
+    class Tokenize:
+        def __call__(self, batch):
+            calls.append(list(batch))
+            return [text.split() for text in batch]
+
+    cache = ResultCache(max_entries=2)
+    chainer = Chainer(['x'], ['tokens'])
+    chainer.append(Tokenize(), ['x'], ['tokens'], cache=cache)
+
+    assert chainer(['a b', 'c']) == [['a', 'b'], ['c']]
+    assert chainer(['c', 'd e', 'a b']) == [['c'], ['d', 'e'], ['a', 'b']]
+    assert calls == [['a b', 'c'], ['d e']]
+    assert (cache.hits, cache.misses, len(cache)) == (2, 3, 2)
+
+    assert chainer.compute(['f'], ['y'], targets=['tokens']) == [['f']]
+    assert len(calls) == 3 and len(cache) == 2
+
+
+def test_component_caches():
+    class Lookup:
+        def __init__(self):
+            self.memo = LRUCache(max_entries=10)
+
+        def __call__(self, batch):
+            for x in batch:
+                if self.memo.get(x) is None:
+                    self.memo.put(x, x * 2)
+            return [self.memo.get(x, count=False) for x in batch]
+
+        def get_caches(self):
+            return {('Lookup', 'memo'): self.memo}
+
+    chainer = Chainer(['x'], ['y'])
+    chainer.append(Lookup(), ['x'], ['y'])
+    chainer([1, 2, 1])
+
+    caches = chainer.get_caches()
+    assert list(caches) == [('Lookup', 'memo')]
+    assert 'deeppavlov_cache_hits_total{component="Lookup",id="memo"} 1' in \
+        chainer.enable_instrumentation().to_prometheus(caches=caches)
+
+
+def test_results_cache_padded_arrays():
+    class PaddedLengths:
+        def __call__(self, batch):
+            width = max(map(len, batch))
+            return np.array([[len(text)] * len(text) + [0] * (width - len(text)) for text in batch],
+                            dtype=np.float32)
+
+    chainer = Chainer(['x'], ['y'])
+    chainer.append(PaddedLengths(), ['x'], ['y'], cache=ResultCache())
+
+    chainer(['aaa', 'b'])
+    result = chainer(['b', 'cc', 'aaa'])
+    assert isinstance(result, np.ndarray) and result.dtype == np.float32
+    assert result.tolist() == [[1, 0, 0], [2, 2, 0], [3, 3, 3]]
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from deeppavlov.models.embedders.abstract_embedder import Embedder
+
+VECTORS = {'a': [1, 2, 0], 'b': [3, 0, 1], 'c': [0, 0, 5], 'zero': [0, 0, 0]}
+
+
+class DictEmbedder(Embedder):
+    def load(self):
+        self.model = {w: np.array(v, dtype=np.float32) for w, v in VECTORS.items()}
+        self.dim = 3
+
+    def __iter__(self):
+        yield from self.model
+
+    def _get_word_vector(self, w):
+        return self.model[w]
+
+
+def _reference(embedder, sample, mean):
+    vectors = [embedder.model.get(t, np.zeros(3, dtype=np.float32)) for t in sample]
+    if mean:
+        nonzero = [v for v in vectors if v.any()]
+        return np.mean(nonzero, axis=0) if nonzero else np.zeros(3, dtype=np.float32)
+    return vectors
+
+
+BATCH = [['a', 'unk', 'b', 'a'], [], ['zero', 'c', 'other'], ['unk']]
+
+
+@pytest.mark.parametrize('cache_bytes', [0, 2 ** 10])
+def test_mean(cache_bytes):
+    embedder = DictEmbedder(load_path='vectors', mean=True, cache_bytes=cache_bytes)
+    means = embedder(BATCH)
+    assert isinstance(means, list) and len(means) == 4
+    for mean, sample in zip(means, BATCH):
+        # unknown and zero vectors are not counted in the mean
+        assert mean.dtype == np.float32 and np.allclose(mean, _reference(embedder, sample, True))
+    assert np.allclose(means[0], [5 / 3, 4 / 3, 1 / 3])
+
+    padded = DictEmbedder(load_path='vectors', pad_zero=True, cache_bytes=cache_bytes)(BATCH, mean=True)
+    assert padded.dtype == np.float32 and padded.shape == (4, 3)
+    assert np.array_equal(padded, np.stack(means))
+
+
+@pytest.mark.parametrize('cache_bytes', [0, 2 ** 10])
+def test_tokens(cache_bytes):
+    embedder = DictEmbedder(load_path='vectors', cache_bytes=cache_bytes)
+    for _ in range(2):
+        embedded = embedder(BATCH)
+        assert [len(sample) for sample in embedded] == [4, 0, 3, 1]
+        for sample_vectors, sample in zip(embedded, BATCH):
+            assert all(v.dtype == np.float32 for v in sample_vectors)
+            assert np.array_equal(np.reshape(sample_vectors, (-1, 3)), np.reshape(_reference(embedder, sample, False),
+                                                                                   (-1, 3)))
+
+    embedder.pad_zero = True
+    padded = embedder(BATCH)
+    assert padded.dtype == np.float32 and padded.shape == (4, 4, 3)
+    assert not padded[1].any() and not padded[2, 3:].any() and not padded[3].any()
+    assert np.array_equal(padded[0], _reference(embedder, BATCH[0], False))
+
+
+def test_empty():
+    embedder = DictEmbedder(load_path='vectors', pad_zero=True)
+    assert embedder([]) == [] and embedder([], mean=True) == []
+    assert embedder([[], []]).shape == (2, 0, 3)
+    means = embedder([[], []], mean=True)
+    assert means.dtype == np.float32 and not means.any() and means.shape == (2, 3)
+    embedder.pad_zero = False
+    assert embedder([[], []]) == [[], []]
@@ -0,0 +1,114 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from deeppavlov.models.embedders.embedding_store import EmbeddingStore, fasttext_hash, fasttext_subword_ids
+from deeppavlov.models.embedders.fasttext_embedder import FasttextEmbedder
+from deeppavlov.models.embedders.glove_embedder import GloVeEmbedder
+
+# buckets of character n-grams of the words computed by fastText 0.9 with minn=3, maxn=6 and bucket=2000000
+FASTTEXT_SUBWORD_IDS = {
+    'hello': [1188580, 128664, 1361308, 1760905, 1613742, 1198310, 1831723, 1068687, 1992344, 798165, 1616881,
+              617342, 350912, 1504790],
+    'naïve': [1806890, 1907692, 878190, 933201, 1590546, 1719404, 832043, 156687, 356832, 1223007, 1505331, 1711570,
+              1788548, 1088654],
+    'ёжик': [1779603, 170195, 941753, 995205, 888217, 784387, 1823879, 1307585, 1509485, 1987987],
+    '中国人': [1652257, 1630047, 1704627, 1005713, 322173, 802710],
+}
+
+TEXT = """5 3
+cat 1 2 3
+dog 0.5 -1 2
+cat 9 9 9
+broken 1 2
+ёжик 0 0 1.5
+"""
+
+
+def _write_store(path, tokens, vectors, subword_vectors=None, subwords=None):
+    path.mkdir()
+    EmbeddingStore._save_tokens(path, tokens)
+    np.save(str(path / 'vectors.npy'), np.asarray(vectors, dtype=np.float32))
+    if subword_vectors is not None:
+        np.save(str(path / 'subword_vectors.npy'), np.asarray(subword_vectors, dtype=np.float32))
+    EmbeddingStore._save_meta(path, {'dim': len(vectors[0]), 'dtype': 'float32', 'subwords': subwords})
+    return EmbeddingStore(path)
+
+
+def test_fasttext_subword_ids():
+    for word, ids in FASTTEXT_SUBWORD_IDS.items():
+        assert fasttext_subword_ids(word, 3, 6, 2000000) == ids, word
+    # "<cat>" without the single brackets, n-grams of multi-byte characters are not split
+    assert fasttext_subword_ids('cat', 1, 2, 1000) == [fasttext_hash(ngram.encode('utf8')) % 1000 for ngram in
+                                                       ['<c', 'c', 'ca', 'a', 'at', 't', 't>']]
+    assert fasttext_subword_ids('ёж', 2, 2, 1000) == [fasttext_hash(ngram.encode('utf8')) % 1000 for ngram in
+                                                      ['<ё', 'ёж', 'ж>']]
+    assert fasttext_hash(b'') == 2166136261
+    # bytes are sign-extended as in fastText
+    assert fasttext_hash('ё'.encode('utf8')) == ((((2166136261 ^ 0xFFFFFFD1) * 16777619 & 0xFFFFFFFF)
+                                                 ^ 0xFFFFFF91) * 16777619 & 0xFFFFFFFF)
+
+
+@pytest.mark.parametrize('dtype', ['float32', 'float16'])
+def test_from_word2vec_text(tmp_path, dtype):
+    src = tmp_path / 'vectors.txt'
+    src.write_text(TEXT, encoding='utf8')
+    store = EmbeddingStore.from_word2vec_text(src, tmp_path / 'store', dtype)
+
+    # the duplicate and the malformed lines are skipped and the matrix is truncated
+    assert list(store) == ['cat', 'dog', 'ёжик'] and len(store) == 3 and store.dim == 3
+    assert store.vectors.shape == (3, 3) and store.vectors.dtype == dtype
+    assert isinstance(store.vectors, np.memmap)
+    assert np.array_equal(store['cat'], [1, 2, 3]) and np.array_equal(store['ёжик'], [0, 0, 1.5])
+    assert 'dog' in store and 'broken' not in store
+    with pytest.raises(KeyError):
+        store['broken']
+
+    src.write_text('1 3\ncat 1 2 3\ndog 0.5 -1 2\n', encoding='utf8')
+    with pytest.raises(ValueError):
+        EmbeddingStore.from_word2vec_text(src, tmp_path / 'too_many')
+
+
+def test_get_vectors(tmp_path):
+    store = _write_store(tmp_path / 'store', ['a', 'b', 'c'], [[1, 0], [0, 2], [3, 3]])
+    tokens = ['c', 'unknown', 'a', 'c', '']
+    vectors = store.get_vectors(tokens)
+    assert vectors.dtype == np.float32 and vectors.shape == (5, 2)
+    assert np.array_equal(vectors, [store.get_word_vector(t) for t in tokens])
+    assert np.array_equal(vectors[[0, 2, 3]], [store[t] for t in ['c', 'a', 'c']])
+    assert not vectors[[1, 4]].any()
+    assert store.get_vectors([]).shape == (0, 2)
+
+
+def test_subword_vectors(tmp_path):
+    subwords = {'minn': 3, 'maxn': 6, 'bucket': 2000000}
+    subword_vectors = np.zeros((2000000, 2), dtype=np.float32)
+    ids = FASTTEXT_SUBWORD_IDS['naïve']
+    subword_vectors[ids] = np.arange(2 * len(ids)).reshape(-1, 2)
+    store = _write_store(tmp_path / 'store', ['a'], [[1, 1]], subword_vectors, subwords)
+
+    # vectors of out-of-vocabulary words are means of their n-grams vectors
+    expected = subword_vectors[ids].mean(axis=0)
+    assert np.allclose(store['naïve'], expected)
+    assert np.allclose(store.get_vectors(['naïve', 'a', 'ab']), [expected, [1, 1], [0, 0]])
+
+
+def test_pickle(tmp_path):
+    store = _write_store(tmp_path / 'store', ['a', 'b'], np.ones((2, 1000)))
+    data = pickle.dumps(store)
+    # only the path is pickled, the vectors are memory-mapped again
+    assert len(data) < 1000
+    loaded = pickle.loads(data)
+    assert isinstance(loaded.vectors, np.memmap) and list(loaded) == ['a', 'b']
+    assert np.array_equal(loaded['b'], np.ones(1000))
+
+
+@pytest.mark.parametrize('embedder_class', [GloVeEmbedder, FasttextEmbedder])
+def test_embedders_load_store(tmp_path, embedder_class):
+    _write_store(tmp_path / 'store', ['a', 'b'], [[1, 0], [0, 2]])
+    embedder = embedder_class(load_path=str(tmp_path / 'store'), pad_zero=True)
+    assert isinstance(embedder.model, EmbeddingStore) and embedder.dim == 2
+    assert list(embedder) == ['a', 'b']
+    assert np.array_equal(embedder([['b', 'x', 'a'], ['a']]), [[[0, 2], [0, 0], [1, 0]], [[1, 0], [0, 0], [0, 0]]])
+    assert np.array_equal(embedder([['a', 'b', 'x']], mean=True), [[0.5, 1]])
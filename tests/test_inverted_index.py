@@ -0,0 +1,179 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+from deeppavlov.models.doc_retrieval.inverted_index_ranker import InvertedIndex, InvertedIndexRanker, \
+    convert_tfidf_matrix, varint_decode, varint_encode
+from deeppavlov.models.vectorizers.hashing_tfidf_vectorizer import HashingTfIdfVectorizer
+from deeppavlov.models.vectorizers.tfidf_index import save_tfidf_index
+
+
+class WordsTokenizer:
+    ngram_range = [1, 1]
+
+    def __call__(self, texts):
+        return [text.split() for text in texts]
+
+
+def _count_matrix(hash_size=300, n_docs=200, seed=0):
+    rng = np.random.RandomState(seed)
+    # frequent terms are more likely to appear in a document
+    term_probas = 1 / np.arange(1, hash_size + 1)
+    terms = rng.choice(hash_size, size=n_docs * 30, p=term_probas / term_probas.sum())
+    docs = np.repeat(np.arange(n_docs), 30)
+    return sparse.csr_matrix((np.ones(len(terms), dtype=np.float32), (terms, docs)), shape=(hash_size, n_docs))
+
+
+def _exhaustive_search(index, term_nums, query_weights):
+    scores = np.zeros(index.n_docs)
+    for term_num, query_weight in zip(term_nums, query_weights):
+        docs, weights = index.postings(term_num)
+        scores[docs] += weights * query_weight
+    return scores
+
+
+def test_varint_round_trip():
+    values = np.array([0, 1, 127, 128, 255, 300, 16383, 16384, 2 ** 31 - 1, 2 ** 35 + 5, 7], dtype=np.int64)
+    encoded, n_bytes = varint_encode(values)
+
+    assert n_bytes.tolist() == [1, 1, 1, 2, 2, 2, 2, 3, 5, 6, 1]
+    assert encoded.dtype == np.uint8 and len(encoded) == n_bytes.sum()
+    assert encoded[3:5].tolist() == [0x80, 0x01]
+    assert varint_decode(encoded).tolist() == values.tolist()
+    assert varint_decode(np.zeros(0, dtype=np.uint8)).tolist() == []
+
+
+@pytest.mark.parametrize('scoring', ['tfidf', 'bm25'])
+def test_max_score_search(tmp_path, scoring):
+    count_matrix = _count_matrix()
+    index = InvertedIndex.build(tmp_path, count_matrix, [f'doc {i}' for i in range(200)], 300, [1, 1], scoring)
+    rng = np.random.RandomState(1)
+
+    for top_n in [1, 5, 20]:
+        for _ in range(20):
+            term_nums = rng.choice(len(index.terms), size=rng.randint(1, 8), replace=False)
+            query_weights = rng.uniform(0.5, 3, size=len(term_nums)).astype(np.float32)
+            docs, scores = index.search(term_nums, query_weights, top_n)
+
+            expected = _exhaustive_search(index, term_nums, query_weights)
+            assert len(docs) == min(top_n, np.count_nonzero(expected))
+            assert np.all(np.diff(scores) <= 0)
+            assert np.allclose(scores, expected[docs], rtol=1e-5)
+            assert np.allclose(scores, np.sort(expected)[::-1][:len(docs)], rtol=1e-5)
+
+
+def test_build_and_load(tmp_path):
+    count_matrix = _count_matrix(n_docs=50)
+    titles = [f'Title {i}' for i in range(49)] + ['Ёжик']
+    InvertedIndex.build(tmp_path, count_matrix, titles, 300, [1, 2], 'tfidf')
+
+    index = InvertedIndex(tmp_path)
+    assert isinstance(index.doc_bytes, np.memmap) and isinstance(index.weights, np.memmap)
+    assert index.meta['n_docs'] == 50 and index.meta['ngram_range'] == [1, 2]
+    assert index.title(49) == 'Ёжик'
+
+    idfs = np.log((50 - np.diff(count_matrix.indptr) + 0.5) / (np.diff(count_matrix.indptr) + 0.5))
+    for term_num, term in enumerate(index.terms):
+        docs, weights = index.postings(term_num)
+        row = count_matrix.getrow(term)
+        assert docs.tolist() == sorted(row.indices.tolist())
+        exact = np.log1p(row.toarray()[0, docs]) * idfs[term]
+        assert np.allclose(weights, exact, atol=index.max_weights[term_num] / 255)
+    assert index.lookup(np.array([index.terms[0], -5, 10 ** 9])).tolist() == [0, -1, -1]
+
+    # postings of small chunks of terms are written one after another
+    chunked = InvertedIndex.build(tmp_path / 'chunked', count_matrix, titles, 300, [1, 2], 'tfidf', chunk_size=7)
+    for name in InvertedIndex.ARRAYS:
+        assert np.array_equal(getattr(chunked, name), getattr(index, name)), name
+
+
+def test_convert_tfidf_matrix(tmp_path):
+    count_matrix = _count_matrix(n_docs=50)
+    term_freqs = np.diff(count_matrix.indptr)
+    idfs = np.log((50 - term_freqs + 0.5) / (term_freqs + 0.5))
+    idfs[idfs < 0] = 0
+    tfidf_matrix = count_matrix.copy()
+    tfidf_matrix.data = np.log1p(tfidf_matrix.data) * np.repeat(idfs, term_freqs)
+    save_tfidf_index(tmp_path / 'tfidf', tfidf_matrix, term_freqs, {f'doc {i}': i for i in range(50)}, 300, [1, 1])
+
+    converted = convert_tfidf_matrix(tmp_path / 'tfidf', tmp_path / 'converted')
+    built = InvertedIndex.build(tmp_path / 'built', count_matrix, [f'doc {i}' for i in range(50)], 300, [1, 1])
+    for name in InvertedIndex.ARRAYS:
+        assert np.allclose(getattr(converted, name), getattr(built, name)), name
+    assert converted.title(7) == 'doc 7'
+    # counts of terms with zero idf are lost in the matrix, so BM25 needs saved documents lengths
+    with pytest.raises(ValueError):
+        convert_tfidf_matrix(tmp_path / 'tfidf', tmp_path / 'bm25', scoring='bm25')
+
+
+@pytest.mark.parametrize('suffix', ['', '.npz'])
+def test_convert_bm25(tmp_path, suffix):
+    rng = np.random.RandomState(0)
+    words = ['common', 'frequent', 'usual'] + [f'w{i}' for i in range(40)]
+    # the first words are in most of the documents, so their idfs are zero
+    docs = [' '.join(rng.choice(words, size=rng.randint(3, 30), p=np.r_[[0.2] * 3, [0.01] * 40])) for _ in range(60)]
+    titles, nums = [f'doc {i}' for i in range(60)], list(range(60))
+
+    vectorizer = HashingTfIdfVectorizer(WordsTokenizer(), hash_size=2 ** 12, save_path=str(tmp_path / f'tfidf{suffix}'),
+                                        mode='train')
+    vectorizer.fit(docs[:30], titles[:30], nums[:30])
+    vectorizer.partial_fit(docs[30:], titles[30:], nums[30:])
+    vectorizer.save()
+    converted = convert_tfidf_matrix(tmp_path / f'tfidf{suffix}', tmp_path / 'converted', scoring='bm25')
+
+    ranker = InvertedIndexRanker(WordsTokenizer(), hash_size=2 ** 12, scoring='bm25', save_path=str(tmp_path / 'built'),
+                                 mode='train')
+    ranker.fit(docs, titles, nums)
+    ranker.save()
+    for name in InvertedIndex.ARRAYS:
+        assert np.array_equal(getattr(converted, name), getattr(ranker.index, name)), name
+
+    ranker.top_n = 10
+    expected = ranker(docs[:5] + ['w1 w2 common', 'usual'])
+    ranker.index = converted
+    ids, scores = ranker(docs[:5] + ['w1 w2 common', 'usual'])
+    assert ids == expected[0] and all(np.array_equal(s, e) for s, e in zip(scores, expected[1]))
+
+
+def test_ranker_fit_save_load(tmp_path):
+    docs = ['red apple', 'green apple tree', 'blue sky', 'red red sky', 'apple pie recipe']
+    ranker = InvertedIndexRanker(WordsTokenizer(), top_n=2, hash_size=2 ** 10, save_path=str(tmp_path),
+                                 load_path=str(tmp_path), mode='train')
+    ranker.fit(docs[:3], ['a', 'b', 'c'], [0, 1, 2])
+    ranker.partial_fit(docs[3:], ['d', 'e'], [3, 4])
+    ranker.save()
+
+    loaded = InvertedIndexRanker(WordsTokenizer(), top_n=2, hash_size=2 ** 10, load_path=str(tmp_path))
+    ids, scores = loaded(['red sky', 'apple', 'unknown'])
+    # documents with equal scores are ordered by their numbers
+    assert ids[0] == ['d', 'a'] and ids[1] == ['a', 'b']
+    assert len(ids[2]) == 2 and np.allclose(scores[2], 0.0001)
+    assert all(np.all(np.diff(s) <= 0) for s in scores)
+
+
+@pytest.mark.parametrize('scoring', ['tfidf', 'bm25'])
+def test_ranker_spill(tmp_path, scoring):
+    docs = [f'w{i % 7} w{i % 3} w{i % 11} w{i} common' for i in range(40)]
+    titles = [f'doc {i}' for i in range(40)]
+
+    def fit(name, **kwargs):
+        ranker = InvertedIndexRanker(WordsTokenizer(), hash_size=2 ** 10, scoring=scoring,
+                                     save_path=str(tmp_path / name), mode='train', **kwargs)
+        for start in range(0, 40, 15):
+            ranker.partial_fit(docs[start:start + 15], titles[start:start + 15], list(range(start, start + 15)))
+        ranker.save()
+        return ranker.index
+
+    index = fit('memory')
+    spilled = fit('spilled', n_workers=2, spill_dir=str(tmp_path / 'spill'))
+    for name in InvertedIndex.ARRAYS:
+        assert np.array_equal(getattr(spilled, name), getattr(index, name)), name
+    # spilled batches and the merged counts matrix are removed after saving
+    assert not list((tmp_path / 'spill').iterdir())
+
+
+def test_ranker_fit_once(tmp_path):
+    ranker = InvertedIndexRanker(WordsTokenizer(), hash_size=2 ** 10, save_path=str(tmp_path), mode='train')
+    ranker.fit(['a b', 'b c'], ['first', 'second'], [0, 1])
+    with pytest.raises(ValueError):
+        ranker.partial_fit(['c d'], ['second'], [1])
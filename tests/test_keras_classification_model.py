@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('keras')
+
+from deeppavlov.core.common.errors import ConfigError
+from deeppavlov.core.data.simple_vocab import SimpleVocabulary
+from deeppavlov.models.classifiers.keras_classification_model import KerasClassificationModel
+
+EMB_MATRIX = np.arange(20, dtype=np.float32).reshape(5, 4) + 1
+
+
+def _vocab(tmp_path, special_tokens=('<PAD>', '<UNK>')):
+    vocab = SimpleVocabulary(special_tokens=special_tokens, unk_token='<UNK>', save_path=str(tmp_path / 'tokens.dict'))
+    vocab.fit([['a', 'b', 'c']])
+    return vocab
+
+
+def _model(tmp_path, **kwargs):
+    return KerasClassificationModel(embedding_size=EMB_MATRIX.shape[1], n_classes=3, model_name='cnn_model',
+                                    classes=['x', 'y', 'z'], kernel_sizes_cnn=[1, 2], filters_cnn=4, dense_size=4,
+                                    learning_rate=0.01, learning_rate_decay=0., last_layer_activation='softmax',
+                                    loss='categorical_crossentropy', save_path=str(tmp_path / 'model'),
+                                    emb_matrix=EMB_MATRIX, **kwargs)
+
+
+@pytest.fixture
+def model(tmp_path):
+    return _model(tmp_path, vocab=_vocab(tmp_path))
+
+
+@pytest.mark.parametrize('padding, text_size, expected', [
+    ('pre', None, [[1, 2, 3], [0, 0, 4], [0, 0, 0]]),
+    ('post', None, [[1, 2, 3], [4, 0, 0], [0, 0, 0]]),
+    ('pre', 2, [[1, 2], [0, 4], [0, 0]]),
+    ('post', 2, [[1, 2], [4, 0], [0, 0]]),
+    ('pre', 5, [[1, 2, 3], [0, 0, 4], [0, 0, 0]]),
+])
+def test_pad_ids(model, padding, text_size, expected):
+    model.opt['padding'] = padding
+    model.opt['text_size'] = text_size
+    features = model.pad_ids([[1, 2, 3], [4], []])
+    assert features.dtype == np.int32
+    assert features.tolist() == expected
+    # token ids are padded only to the longest sample in a batch
+    assert model.pad_ids([[], []]).tolist() == [[0], [0]]
+    assert model.check_input([[1, 2, 3], [4], []]).tolist() == expected
+
+
+def test_pad_ids_wrong_padding(model):
+    model.opt['padding'] = 'middle'
+    with pytest.raises(ConfigError):
+        model.pad_ids([[1]])
+
+
+def test_emb_matrix_model(model):
+    assert np.all(model.emb_matrix[0] == 0.)
+    assert np.array_equal(model.emb_matrix[1:], EMB_MATRIX[1:])
+    assert np.all(EMB_MATRIX[0] == 1.)
+    assert np.array_equal(model.model.get_layer('embedding').get_weights()[0], model.emb_matrix)
+
+    for batch in [[[1, 2], [3]], [[4, 3, 2, 1, 2, 3, 4]], [[2], []]]:
+        predictions = model(batch)
+        assert np.array(predictions).shape == (len(batch), 3)
+        assert np.allclose(np.sum(predictions, axis=1), 1., atol=1e-5)
+    model.train_on_batch([[1, 2, 3], [4]], [[1, 0, 0], [0, 1, 0]])
+    model.train_on_batch([[1, 2, 3, 4, 4], [2]], [[0, 0, 1], [1, 0, 0]])
+    # the embeddings are frozen
+    assert np.array_equal(model.model.get_layer('embedding').get_weights()[0], model.emb_matrix)
+
+
+def test_pad_token_check(tmp_path, caplog):
+    model = _model(tmp_path, vocab=_vocab(tmp_path, special_tokens=('<UNK>', '<PAD>')))
+    # id 0 belongs to a token, so its embedding is kept
+    assert np.array_equal(model.emb_matrix, EMB_MATRIX)
+    assert 'not the padding token `<PAD>`' in caplog.text
+
+    caplog.clear()
+    model = _model(tmp_path, vocab=_vocab(tmp_path, special_tokens=('<S>',)), pad_token='<S>')
+    assert np.all(model.emb_matrix[0] == 0.)
+    assert 'padding token' not in caplog.text
+
+    model = _model(tmp_path)
+    assert np.all(model.emb_matrix[0] == 0.)
+    assert 'can not be checked' in caplog.text
@@ -0,0 +1,63 @@
+import pickle
+
+import pytest
+
+from deeppavlov.models.spelling_correction.levenshtein.levenshtein_searcher import LevenshteinSearcher
+
+WORDS = ['кот', 'кота', 'коты', 'котом', 'кит', 'кита', 'киты', 'китом', 'ток', 'тока', 'ком', 'комом']
+QUERIES = ['кто', 'китм', 'тко', 'кот', 'кто', 'ком ток', 'dog', 'комм', 'китм', 'ток', 'к', '']
+ALPHABET = sorted({a for word in WORDS for a in word})
+
+
+def _sorted(answers):
+    return [sorted(answer) for answer in answers]
+
+
+@pytest.mark.parametrize('euristics', ['none', 2])
+def test_search_batch(euristics):
+    searcher = LevenshteinSearcher(ALPHABET, WORDS, allow_spaces=True, euristics=euristics)
+    expected = [searcher.search(word, 1) for word in QUERIES]
+    assert searcher.cache is None
+    assert _sorted(searcher.search_batch(QUERIES, 1)) == _sorted(expected)
+
+    batch_searcher = LevenshteinSearcher(ALPHABET, WORDS, allow_spaces=True, euristics=euristics,
+                                         cache_size=100, n_workers=2)
+    try:
+        for _ in range(2):
+            assert _sorted(batch_searcher.search_batch(QUERIES, 1)) == _sorted(expected)
+            assert batch_searcher.search_batch(QUERIES, 1, return_cost=False) == \
+                [[word for word, _ in answer] for answer in batch_searcher.search_batch(QUERIES, 1)]
+        assert batch_searcher._pool is not None
+        # every distinct word was searched once, all the repeated searches hit the cache
+        assert batch_searcher.cache.misses == len(set(QUERIES))
+        assert len(batch_searcher.cache) == len(set(QUERIES))
+        assert [sorted(batch_searcher.search(word, 1)) for word in QUERIES] == _sorted(expected)
+        assert batch_searcher.cache.misses == len(set(QUERIES))
+
+        # cached answers are not changed by callers
+        batch_searcher.search_batch(['кто'], 1)[0].clear()
+        assert sorted(batch_searcher.search('кто', 1)) == sorted(expected[0])
+        # answers for another distance are cached separately
+        assert _sorted(batch_searcher.search_batch(QUERIES, 2)) == \
+            _sorted(searcher.search(word, 2) for word in QUERIES)
+    finally:
+        batch_searcher.close()
+    assert batch_searcher._pool is None
+
+
+@pytest.mark.parametrize('euristics', ['none', 2])
+def test_pickle(euristics):
+    searcher = LevenshteinSearcher(ALPHABET, WORDS, allow_spaces=True, euristics=euristics,
+                                   cache_size=100, n_workers=2)
+    try:
+        expected = _sorted(searcher.search_batch(QUERIES, 1))
+        assert searcher._pool is not None
+        loaded = pickle.loads(pickle.dumps(searcher))
+    finally:
+        searcher.close()
+
+    # neither the cache nor the process pool is pickled
+    assert loaded.cache is None and loaded._pool is None
+    assert loaded.n_workers == 2 and loaded.euristics == searcher.euristics
+    assert _sorted(loaded.search(word, 1) for word in QUERIES) == expected
+    assert 'кот' in loaded and 'кто' not in loaded
@@ -0,0 +1,65 @@
+import zlib
+from operator import itemgetter
+
+import pytest
+
+from deeppavlov.models.doc_retrieval.logit_ranker import LogitRanker
+
+
+class StubSquadModel:
+    """Answers with the first word of a context and a logit depending only on the context and the question."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, contexts, questions):
+        self.batches.append(list(contexts))
+        answers, starts, logits = [], [], []
+        for context, question in zip(contexts, questions):
+            logit = zlib.crc32(f'{context}|{question}'.encode()) / 2 ** 32
+            answers.append('' if context.startswith('noans') else context.split()[0])
+            starts.append(len(question))
+            logits.append(logit)
+        return answers, starts, logits
+
+
+def _unbatched_ranking(squad_model, contexts_batch, questions_batch, batch_size, sort_noans):
+    """LogitRanker.__call__ before contexts of different questions were batched together."""
+    batch_best_answers = []
+    batch_best_answers_scores = []
+    for contexts, questions in zip(contexts_batch, questions_batch):
+        results = []
+        for i in range(0, len(contexts), batch_size):
+            results += zip(*squad_model(contexts[i: i + batch_size], questions[i: i + batch_size]))
+        if sort_noans:
+            results = sorted(results, key=lambda x: (x[0] != '', x[2]), reverse=True)
+        else:
+            results = sorted(results, key=itemgetter(2), reverse=True)
+        batch_best_answers.append(results[0][0])
+        batch_best_answers_scores.append(results[0][2])
+    return batch_best_answers, batch_best_answers_scores
+
+
+@pytest.mark.parametrize('batch_size', [1, 3, 50])
+@pytest.mark.parametrize('sort_noans', [False, True])
+def test_batched_ranking(batch_size, sort_noans):
+    n_contexts = [1, 7, 2, 4, 1]
+    contexts_batch = [[('noans ' if j % 3 == 1 else '') + f'answer{q}_{j} ' + 'word ' * ((q * 7 + j * 5) % 11)
+                       for j in range(n)] for q, n in enumerate(n_contexts)]
+    questions_batch = [[f'question {q}'] * n for q, n in enumerate(n_contexts)]
+
+    squad_model = StubSquadModel()
+    ranker = LogitRanker(squad_model, batch_size=batch_size, sort_noans=sort_noans)
+    with pytest.warns(FutureWarning):
+        answers, scores = ranker(contexts_batch, questions_batch)
+
+    assert (answers, scores) == _unbatched_ranking(StubSquadModel(), contexts_batch, questions_batch,
+                                                   batch_size, sort_noans)
+    assert len(answers) == len(n_contexts)
+    # every context is sent to the squad model once in batches of at most batch_size contexts
+    assert sorted(c for batch in squad_model.batches for c in batch) == \
+        sorted(c for contexts in contexts_batch for c in contexts)
+    assert all(len(batch) <= batch_size for batch in squad_model.batches)
+    assert len(squad_model.batches) == -(-sum(n_contexts) // batch_size)
+    lengths = [len(c) for batch in squad_model.batches for c in batch]
+    assert lengths == sorted(lengths)
@@ -0,0 +1,88 @@
+import json
+from operator import itemgetter
+
+import numpy as np
+import pytest
+from scipy.special import expit
+
+joblib = pytest.importorskip('sklearn.externals.joblib')
+linear_model = pytest.importorskip('sklearn.linear_model')
+
+from deeppavlov.models.doc_retrieval.pop_ranker import PopRanker
+
+
+def _per_pair_ranking(clf, pop_dict, mean_pop, input_doc_ids, input_doc_scores, top_n):
+    """PopRanker.__call__ before batching: one predict_proba call per pair and a stable sort."""
+    batch_ids, batch_scores = [], []
+    for instance_ids, instance_scores in zip(input_doc_ids, input_doc_scores):
+        instance_probas = []
+        for idx, score in zip(instance_ids, instance_scores):
+            pop = pop_dict.get(idx, mean_pop)
+            instance_probas.append(clf.predict_proba([[score, pop, score * pop]])[0][1])
+        sort = sorted(enumerate(instance_probas), key=itemgetter(1), reverse=True)[:top_n]
+        batch_ids.append([instance_ids[i] for i, _ in sort])
+        batch_scores.append([proba for _, proba in sort])
+    return batch_ids, batch_scores
+
+
+class BinarySoftmaxRegression:
+    """A binary multinomial logistic regression: probabilities are the softmax of (-d, d), that is expit(2 d)."""
+    def __init__(self, coef, intercept):
+        self.coef_, self.intercept_ = coef, intercept
+
+    def fit(self, features, labels):
+        return self
+
+    def predict_proba(self, features):
+        probas = expit(2 * (np.asarray(features) @ self.coef_[0] + self.intercept_[0]))
+        return np.stack([1 - probas, probas], axis=1)
+
+
+def _fit(clf):
+    rng = np.random.RandomState(0)
+    scores, pops = rng.uniform(0, 1, 200), rng.lognormal(3, 1, 200)
+    features = np.stack([scores, pops, scores * pops], axis=1)
+    return clf.fit(features, (scores + pops / 50 + rng.normal(0, 0.3, 200) > 1).astype(int))
+
+
+@pytest.fixture
+def batch():
+    rng = np.random.RandomState(1)
+    titles = [f'title {i}' for i in range(30)]
+    pop_dict = {title: float(pop) for title, pop in zip(titles[:25], rng.lognormal(3, 1, 25))}
+    # the second question has fewer documents than top_n, the third one has equal scores and unknown titles
+    doc_ids = [titles[:10], titles[10:12], titles[20:30], []]
+    doc_scores = [rng.uniform(0, 1, 10).tolist(), [0.5, 0.1], [0.3] * 10, []]
+    return pop_dict, doc_ids, doc_scores
+
+
+@pytest.mark.parametrize('clf, logistic', [
+    (linear_model.LogisticRegression(), True),
+    (BinarySoftmaxRegression(np.array([[2., 0.05, 0.1]]), np.array([-1.5])), False),
+    (linear_model.SGDClassifier(loss='log_loss' if 'log_loss' in linear_model.SGDClassifier.loss_functions else 'log',
+                                random_state=0, max_iter=50, tol=None), True),
+])
+def test_parity_with_per_pair_ranking(tmp_path, batch, clf, logistic):
+    pop_dict, doc_ids, doc_scores = batch
+    (tmp_path / 'pops.json').write_text(json.dumps(pop_dict))
+    joblib.dump(_fit(clf), str(tmp_path / 'clf.pkl'))
+
+    ranker = PopRanker(str(tmp_path / 'pops.json'), str(tmp_path / 'clf.pkl'), top_n=5)
+    # the shortcut is used only when it gives the same probabilities as predict_proba
+    assert ranker._logistic == logistic
+
+    ids, scores = ranker(doc_ids, doc_scores)
+    expected_ids, expected_scores = _per_pair_ranking(ranker.clf, pop_dict, ranker.mean_pop, doc_ids, doc_scores, 5)
+    assert ids == expected_ids
+    assert all(np.allclose(s, e, rtol=1e-6) for s, e in zip(scores, expected_scores))
+
+
+def test_classifier_without_probabilities(tmp_path, batch):
+    pop_dict, doc_ids, doc_scores = batch
+    (tmp_path / 'pops.json').write_text(json.dumps(pop_dict))
+    joblib.dump(_fit(linear_model.RidgeClassifier()), str(tmp_path / 'clf.pkl'))
+
+    ranker = PopRanker(str(tmp_path / 'pops.json'), str(tmp_path / 'clf.pkl'))
+    assert not ranker._logistic
+    with pytest.raises(AttributeError):
+        ranker(doc_ids, doc_scores)
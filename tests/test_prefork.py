@@ -0,0 +1,119 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+from urllib.request import urlopen
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason='pre-fork serving needs os.fork')
+
+SERVER_SCRIPT = '''
+import os
+import sys
+import time
+
+from deeppavlov.utils.server.prefork import PreforkServer
+
+
+def app(environ, start_response):
+    time.sleep(float(environ['QUERY_STRING'] or 0))
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [str(os.getpid()).encode()]
+
+
+PreforkServer(app, '127.0.0.1', int(sys.argv[1]), int(sys.argv[2]), restart_delay=0.1).serve_forever()
+'''
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _get_pid(port, delay=0):
+    with urlopen(f'http://127.0.0.1:{port}/?{delay}', timeout=10) as response:
+        return int(response.read())
+
+
+def _wait_for(condition, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = condition()
+        if result:
+            return result
+        time.sleep(0.05)
+    raise TimeoutError
+
+
+def _try_get_pid(port):
+    try:
+        return _get_pid(port)
+    except (URLError, ConnectionError):
+        return None
+
+
+def _is_running(pid):
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().split()[2] != 'Z'
+    except FileNotFoundError:
+        return False
+
+
+def _parent_pid(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        return int(f.read().rsplit(')', 1)[1].split()[1])
+
+
+@pytest.fixture
+def server():
+    processes = []
+
+    def start(workers):
+        port = _free_port()
+        process = subprocess.Popen([sys.executable, '-c', SERVER_SCRIPT, str(port), str(workers)])
+        processes.append(process)
+        _wait_for(lambda: _try_get_pid(port))
+        return process, port
+
+    yield start
+    for process in processes:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+@pytest.mark.skipif(not os.path.exists('/proc'), reason='needs procfs')
+def test_workers_share_socket(server):
+    process, port = server(workers=2)
+    # a busy worker does not accept connections, so concurrent slow requests are served by different workers
+    with ThreadPoolExecutor(2) as executor:
+        pids = set(executor.map(lambda _: _get_pid(port, 0.5), range(2)))
+    assert len(pids) == 2 and process.pid not in pids
+    assert all(_parent_pid(pid) == process.pid for pid in pids)
+
+
+@pytest.mark.skipif(not os.path.exists('/proc'), reason='needs procfs')
+def test_dead_worker_restart_and_sigterm(server):
+    process, port = server(workers=1)
+    pid = _get_pid(port)
+    os.kill(pid, signal.SIGKILL)
+
+    def restarted_worker():
+        new_pid = _try_get_pid(port)
+        return new_pid if new_pid != pid else None
+
+    new_pid = _wait_for(restarted_worker)
+    assert _parent_pid(new_pid) == process.pid
+
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(20) == 0
+    assert not _is_running(new_pid)
+    with pytest.raises((URLError, ConnectionError)):
+        _get_pid(port)
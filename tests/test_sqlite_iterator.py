@@ -0,0 +1,119 @@
+import sqlite3
+import threading
+
+import pytest
+
+from deeppavlov.dataset_iterators import sqlite_iterator
+from deeppavlov.dataset_iterators.sqlite_iterator import SQLiteDataIterator
+
+N_DOCS = 2500
+
+
+@pytest.fixture(scope='module')
+def db_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp('sqlite') / 'docs.db'
+    connection = sqlite3.connect(str(path))
+    connection.execute('CREATE TABLE documents (id PRIMARY KEY, text)')
+    connection.executemany('INSERT INTO documents VALUES (?, ?)',
+                           [(f'doc {i}', f'text of document {i}') for i in range(N_DOCS)])
+    connection.commit()
+    connection.close()
+    return path
+
+
+def _trace_selects(iterator):
+    queries = []
+    iterator.connect.set_trace_callback(lambda query: queries.append(query) if query.startswith('SELECT') else None)
+    return queries
+
+
+def test_order_duplicates_and_missing(db_path):
+    iterator = SQLiteDataIterator(db_path)
+    doc_ids = ['doc 5', 'doc 1', 'missing', 'doc 5', 'doc 1000', 'missing']
+    assert iterator.get_doc_contents(doc_ids) == ['text of document 5', 'text of document 1', None,
+                                                  'text of document 5', 'text of document 1000', None]
+    assert iterator.get_doc_content('doc 7') == 'text of document 7'
+    assert iterator.get_doc_content('missing') is None
+    assert iterator.get_doc_contents([]) == []
+
+
+def test_chunked_queries(db_path):
+    iterator = SQLiteDataIterator(db_path)
+    queries = _trace_selects(iterator)
+    doc_ids = [f'doc {i}' for i in reversed(range(N_DOCS))] + ['missing', 'doc 0']
+    assert iterator.get_doc_contents(doc_ids) == [f'text of document {i}' for i in reversed(range(N_DOCS))] + \
+        [None, 'text of document 0']
+    # 2501 distinct ids do not fit into the SQLite limit of 999 query parameters
+    assert len(queries) == 3
+
+    docs, ids = next(iterator.gen_batches(batch_size=0))
+    assert docs == [f'text of document {doc_id[4:]}' for doc_id in iterator.doc_ids]
+    assert list(ids) == [(doc_id, i) for i, doc_id in enumerate(iterator.doc_ids)]
+
+
+def test_cache(db_path):
+    iterator = SQLiteDataIterator(db_path, cache_size=3)
+    queries = _trace_selects(iterator)
+    assert iterator.get_doc_contents(['doc 1', 'doc 2', 'doc 1']) == ['text of document 1', 'text of document 2',
+                                                                      'text of document 1']
+    assert len(queries) == 1
+    assert iterator.get_doc_contents(['doc 2', 'doc 1']) == ['text of document 2', 'text of document 1']
+    assert len(queries) == 1
+
+    # only the ids missing from the cache are queried, 'doc 2' is evicted as the least recently used
+    queries.clear()
+    assert iterator.get_doc_contents(['doc 1', 'doc 3', 'doc 4']) == ['text of document 1', 'text of document 3',
+                                                                      'text of document 4']
+    assert len(queries) == 1 and 'doc 1' not in queries[0]
+    assert 'doc 2' not in iterator.cache and 'doc 1' in iterator.cache
+    # missing documents are not cached
+    assert iterator.get_doc_content('missing') is None
+    assert 'missing' not in iterator.cache
+    assert iterator.cache.hits == 3
+
+    no_cache = SQLiteDataIterator(db_path)
+    assert no_cache.cache is None
+    queries = _trace_selects(no_cache)
+    no_cache.get_doc_contents(['doc 1'])
+    no_cache.get_doc_contents(['doc 1'])
+    assert len(queries) == 2
+
+
+def test_connection_per_thread(db_path):
+    iterator = SQLiteDataIterator(db_path)
+    main_connection = iterator.connect
+    assert iterator.connect is main_connection
+
+    connections, contents = [], []
+
+    def read():
+        connections.append(iterator.connect)
+        contents.append(iterator.get_doc_content('doc 3'))
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    thread.join()
+    assert connections[0] is not main_connection
+    assert contents == ['text of document 3']
+    assert iterator.connect is main_connection
+
+    with pytest.raises(sqlite3.OperationalError):
+        main_connection.execute("INSERT INTO documents VALUES ('new', 'text')")
+
+
+def test_connection_after_fork(db_path, monkeypatch):
+    iterator = SQLiteDataIterator(db_path)
+    connection = iterator.connect
+    pid = sqlite_iterator.os.getpid()
+    monkeypatch.setattr(sqlite_iterator.os, 'getpid', lambda: pid + 1)
+    # a forked process opens its own connection and leaves the parent's one alone
+    child_connection = iterator.connect
+    assert child_connection is not connection
+    assert iterator.get_doc_content('doc 3') == 'text of document 3'
+    iterator.close()
+    connection.execute('SELECT 1')
+
+    monkeypatch.setattr(sqlite_iterator.os, 'getpid', lambda: pid)
+    iterator.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        child_connection.execute('SELECT 1')
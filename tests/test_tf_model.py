@@ -0,0 +1,49 @@
+import numpy as np
+import tensorflow as tf
+
+from deeppavlov.core.models.tf_model import LRScheduledTFModel
+
+
+class LinearRegression(LRScheduledTFModel):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sess = tf.Session()
+        self.x_ph = tf.placeholder(tf.float32, shape=(None, 3))
+        self.y_ph = tf.placeholder(tf.float32, shape=(None,))
+        w = tf.get_variable('w', shape=(3, 1), initializer=tf.zeros_initializer())
+        self.y = tf.squeeze(tf.matmul(self.x_ph, w), axis=1)
+        self.loss = tf.reduce_mean(tf.square(self.y - self.y_ph))
+        self.train_op = self.get_train_op(self.loss)
+        self.sess.run(tf.global_variables_initializer())
+
+    def train_on_batch(self, x, y):
+        _, loss = self.sess.run([self.train_op, self.loss], feed_dict={self.x_ph: x, self.y_ph: y})
+        return loss
+
+    def __call__(self, x):
+        return self.sess.run(self.y, feed_dict={self.x_ph: x})
+
+
+def test_graph_does_not_grow():
+    model = LinearRegression(save_path=None, optimizer='MomentumOptimizer',
+                             learning_rate=[0.1, 0.001], learning_rate_decay='exponential',
+                             learning_rate_decay_batches=1000, momentum=[0.5, 0.9], momentum_decay='linear',
+                             momentum_decay_epochs=100)
+    rng = np.random.RandomState(0)
+    x = rng.rand(64, 3)
+    y = x @ np.array([1., -2., 3.])
+
+    def train_epoch():
+        for start in range(0, len(x), 8):
+            model.train_on_batch(x[start:start + 8], y[start:start + 8])
+            model.process_event('after_batch', {})
+        model.process_event('after_epoch', {})
+        model.deserialize(model.serialize())
+
+    train_epoch()
+    n_ops = len(model.graph.get_operations())
+    for _ in range(100):
+        train_epoch()
+
+    assert len(model.graph.get_operations()) == n_ops
+    assert np.abs(model(x) - y).mean() < np.abs(y).mean() / 2
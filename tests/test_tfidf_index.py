@@ -0,0 +1,135 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from deeppavlov.models.vectorizers.hashing_tfidf_vectorizer import HashingTfIdfVectorizer, hash_
+from deeppavlov.models.vectorizers.tfidf_index import StringArray, StringIndex, convert_npz_index, load_tfidf_index, \
+    save_tfidf_index
+
+
+def _is_memory_mapped(array):
+    while not isinstance(array, np.memmap):
+        if array.base is None:
+            return False
+        array = array.base
+    return True
+
+
+def _string_index(strings):
+    return StringIndex(StringArray.from_strings(strings), StringIndex.sort_order(strings))
+
+
+def test_string_index_find():
+    titles = [f'Title {i}' for i in range(500)] + ['Ёлка', 'Zürich', '']
+    index = _string_index(titles)
+    keys = titles[::-1] + ['missing', 'Title 1', 'Title', 'Zzz', 42]
+
+    expected = [index.get(key, -1) for key in keys]
+    assert expected[:len(titles)] == list(reversed(range(len(titles))))
+    # many keys are merged with the whole index, a few ones are binary searched
+    assert index.find(keys).tolist() == expected
+    assert index.find(keys[:3]).tolist() == expected[:3]
+    assert index.find([]).tolist() == []
+    assert _string_index([]).find(['Title 1']).tolist() == [-1]
+
+
+def test_string_array(tmp_path):
+    strings = ['first', '', 'Ёжик в тумане', 'last']
+    array = StringArray.from_strings(strings)
+    assert len(array) == 4 and list(array) == strings
+    assert array[-1] == 'last' and array[2] == 'Ёжик в тумане'
+    with pytest.raises(IndexError):
+        array[4]
+
+    array.save(tmp_path, 'names')
+    loaded = StringArray.load(tmp_path, 'names')
+    assert _is_memory_mapped(loaded.data) and list(loaded) == strings
+
+
+def test_string_index():
+    strings = ['b', 'a', 'Ёжик', 'ab', '']
+    index = _string_index(strings)
+    assert len(index) == 5 and list(index) == strings
+    assert [index[s] for s in strings] == [0, 1, 2, 3, 4]
+    assert 'ab' in index and 'abc' not in index and 1 not in index
+    assert index.get('c') is None
+    with pytest.raises(KeyError):
+        index['c']
+    assert dict(index.items()) == {s: i for i, s in enumerate(strings)}
+
+
+@pytest.mark.parametrize('npz', [False, True])
+def test_tfidf_index_round_trip(tmp_path, npz):
+    matrix = sparse.random(50, 8, density=0.3, format='csr', dtype=np.float32, random_state=0)
+    term_freqs = np.diff(matrix.indptr)
+    doc_index = {f'doc {i}': i for i in range(8)}
+    if npz:
+        opts = {'hash_size': 50, 'ngram_range': [1, 2], 'term_freqs': term_freqs, 'doc_index': doc_index}
+        np.savez(tmp_path / 'matrix.npz', data=matrix.data, indices=matrix.indices, indptr=matrix.indptr,
+                 shape=matrix.shape, opts=np.array([opts]))
+        convert_npz_index(tmp_path / 'matrix.npz', tmp_path / 'index')
+    else:
+        save_tfidf_index(tmp_path / 'index', matrix, term_freqs, doc_index, 50, [1, 2])
+
+    loaded, opts = load_tfidf_index(tmp_path / 'index')
+    assert all(_is_memory_mapped(array) for array in [loaded.data, loaded.indices, loaded.indptr])
+    assert (loaded != matrix).nnz == 0
+    assert opts['hash_size'] == 50 and opts['ngram_range'] == [1, 2]
+    assert np.array_equal(opts['term_freqs'], term_freqs)
+    assert dict(opts['doc_index'].items()) == doc_index and opts['index2doc'][3] == 'doc 3'
+
+
+def test_vectorizer_fit_once(tmp_path):
+    class WordsTokenizer:
+        ngram_range = [1, 1]
+
+        def __call__(self, texts):
+            return [text.split() for text in texts]
+
+    vectorizer = HashingTfIdfVectorizer(WordsTokenizer(), hash_size=2 ** 8, save_path=str(tmp_path / 'index'),
+                                        load_path=str(tmp_path / 'index'), mode='train')
+    vectorizer.fit(['a b', 'b c'], ['first', 'second'], [0, 1])
+    with pytest.raises(ValueError):
+        vectorizer.partial_fit(['c d'], ['second'], [1])
+    with pytest.raises(ValueError):
+        vectorizer.partial_fit(['c d', 'd'], ['third', 'third'], [2, 2])
+    vectorizer.partial_fit(['a c d d'], ['third'], [2])
+    vectorizer.save()
+
+    loaded = HashingTfIdfVectorizer(WordsTokenizer(), load_path=str(tmp_path / 'index'))
+    assert loaded.tfidf_matrix.shape == (2 ** 8, 3)
+    # "a", "b" and "c" are in two documents each, "d" is only in the third one, twice
+    assert sorted(loaded.term_freqs[loaded.term_freqs > 0].tolist()) == [1, 2, 2, 2]
+    d_row = loaded.tfidf_matrix.getrow(hash_('d', 2 ** 8))
+    assert d_row.indices.tolist() == [2] and np.isclose(d_row.data[0], np.log1p(2) * np.log(2.5 / 1.5))
+
+
+
+def test_vectorizer_counting_methods():
+    class WordsTokenizer:
+        ngram_range = [1, 1]
+
+        def __call__(self, texts):
+            return [text.split() for text in texts]
+
+    vectorizer = HashingTfIdfVectorizer(WordsTokenizer(), hash_size=2 ** 8, doc_index={'x': 1, 'y': 0, 'z': 2},
+                                        mode='train')
+    counts = list(vectorizer.get_counts(['a b a', '', 'c a'], ['x', 'y', 'z']))
+    expected = [Counter(hash_(w, 2 ** 8) for w in doc.split()) for doc in ['a b a', '', 'c a']]
+    assert [dict(zip(hashes.tolist(), values.tolist())) for hashes, values, _ in counts] == expected
+    assert [ids for _, _, ids in counts] == [[1, 1], [], [2, 2]]
+
+    rows, data, cols = (np.concatenate(arrays) for arrays in zip(*counts))
+    a = hash_('a', 2 ** 8)
+    # duplicate entries are summed
+    count_matrix = vectorizer.get_count_matrix(np.r_[rows, a], np.r_[cols, 1], np.r_[data, 3], 3)
+    assert count_matrix.shape == (2 ** 8, 3) and count_matrix[a, 1] == 5 and count_matrix[a, 2] == 1
+
+    tfidf_matrix, term_freqs = vectorizer.get_tfidf_matrix(count_matrix)
+    expected_freqs = np.asarray((count_matrix > 0).sum(1)).squeeze()
+    idfs = np.log((3 - expected_freqs + 0.5) / (expected_freqs + 0.5))
+    idfs[idfs < 0] = 0
+    assert np.array_equal(term_freqs, expected_freqs)
+    assert np.allclose(tfidf_matrix.toarray(), sparse.diags(idfs, 0).dot(count_matrix.log1p()).toarray())
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from deeppavlov.models.doc_retrieval.tfidf_ranker import TfidfRanker
+from deeppavlov.models.vectorizers.hashing_tfidf_vectorizer import HashingTfIdfVectorizer
+
+
+class WordsTokenizer:
+    ngram_range = [1, 1]
+
+    def __call__(self, texts):
+        return [text.split() for text in texts]
+
+
+def _dense_ranking(vectorizer, questions, thresh):
+    """TfidfRanker.__call__ before batching: a dense scores vector per question."""
+    batch_doc_ids, batch_docs_scores = [], []
+    for q_tfidf in vectorizer(questions):
+        scores = np.squeeze((q_tfidf * vectorizer.tfidf_matrix).toarray() + 0.0001)
+        if thresh >= len(scores):
+            o = np.argpartition(-scores, len(scores) - 1)[0:thresh]
+        else:
+            o = np.argpartition(-scores, thresh)[0:thresh]
+        o_sort = o[np.argsort(-scores[o])]
+        batch_doc_ids.append([vectorizer.index2doc[i] for i in o_sort])
+        batch_docs_scores.append(scores[o_sort])
+    return batch_doc_ids, batch_docs_scores
+
+
+@pytest.fixture(scope='module')
+def vectorizer(tmp_path_factory):
+    path = tmp_path_factory.mktemp('tfidf') / 'matrix.npz'
+    rng = np.random.RandomState(0)
+    words = [f'w{i}' for i in range(50)]
+    docs = [' '.join(rng.choice(words, size=rng.randint(5, 20))) for _ in range(30)]
+    vectorizer = HashingTfIdfVectorizer(WordsTokenizer(), hash_size=2 ** 12, save_path=str(path), mode='train')
+    vectorizer.fit(docs, [f'doc {i}' for i in range(30)], list(range(30)))
+    vectorizer.save()
+    return HashingTfIdfVectorizer(WordsTokenizer(), load_path=str(path))
+
+
+@pytest.mark.parametrize('top_n, active', [(5, True), (1, True), (40, True), (5, False)])
+def test_batched_ranking(vectorizer, top_n, active):
+    # the last questions have fewer nonzero scores than top_n or none at all
+    questions = ['w1 w2 w3', 'w4 w4 w10 w20 w30 w41', 'w7', 'w1', 'unknown words', '']
+    ranker = TfidfRanker(vectorizer, top_n=top_n, active=active)
+    ids, scores = ranker(questions)
+
+    thresh = min(top_n if active else len(vectorizer.doc_index), len(vectorizer.doc_index))
+    expected_ids, expected_scores = _dense_ranking(vectorizer, questions, thresh)
+    assert len(ids) == len(scores) == len(questions)
+    for question, q_ids, q_scores, e_ids, e_scores in zip(questions, ids, scores, expected_ids, expected_scores):
+        assert len(q_ids) == thresh and len(set(q_ids)) == thresh
+        assert np.allclose(q_scores, e_scores)
+        nonzero = e_scores > 0.0001
+        doc_scores = np.squeeze((vectorizer([question]) * vectorizer.tfidf_matrix).toarray() + 0.0001)
+        # documents with equal scores may be chosen and ordered differently by the dense ranking,
+        # but each of them must carry its own score
+        assert np.allclose(doc_scores[[vectorizer.doc_index[i] for i in q_ids]], q_scores)
+        values, counts = np.unique(doc_scores, return_counts=True)
+        unique = np.isin(e_scores, values[counts == 1]) & nonzero
+        assert [i for i, u in zip(q_ids, unique) if u] == [i for i, u in zip(e_ids, unique) if u]
+        # the rest are documents with zero scores in the order of their numbers
+        zero_ids = q_ids[nonzero.sum():]
+        assert zero_ids == sorted(zero_ids, key=lambda title: vectorizer.doc_index[title])
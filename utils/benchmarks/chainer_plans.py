@@ -0,0 +1,92 @@
+# Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import time
+from typing import List
+
+from deeppavlov.core.common.chainer import Chainer
+
+
+class Increment:
+    def __call__(self, batch):
+        return [x + 1 for x in batch]
+
+
+def legacy_compute(*args, param_names, pipe, targets):
+    """Chainer inference without execution plans, as it was done before plans caching."""
+    expected = set(targets)
+    final_pipe = []
+    for (in_keys, in_params), out_params, component in reversed(pipe):
+        if expected.intersection(out_params):
+            expected = expected - set(out_params) | set(in_params)
+            final_pipe.append(((in_keys, in_params), out_params, component))
+    final_pipe.reverse()
+    if not expected.issubset(param_names):
+        raise RuntimeError(f'{expected} are required to compute {targets} but were not found in memory or inputs')
+
+    mem = dict(zip(param_names, args))
+    for (in_keys, in_params), out_params, component in final_pipe:
+        x = [mem[k] for k in in_params]
+        if in_keys:
+            res = component(**dict(zip(in_keys, x)))
+        else:
+            res = component(*x)
+        if len(out_params) == 1:
+            mem[out_params[0]] = res
+        else:
+            mem.update(zip(out_params, res))
+
+    res = [mem[k] for k in targets]
+    if len(res) == 1:
+        res = res[0]
+    return res
+
+
+def long_chainer(length: int) -> Chainer:
+    chainer = Chainer(['x0'], [f'x{length}'])
+    for i in range(length):
+        chainer.append(Increment(), [f'x{i}'], [f'x{i + 1}'])
+    return chainer
+
+
+def main(args: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description='Compare per-call overhead of compiled and legacy chainer inference')
+    parser.add_argument('-l', '--length', help='number of components in the pipeline', default=200, type=int)
+    parser.add_argument('-n', '--calls', help='number of pipeline calls', default=1000, type=int)
+
+    args = parser.parse_args(args)
+
+    chainer = long_chainer(args.length)
+    batch = [0]
+    legacy_kwargs = dict(param_names=chainer.in_x, pipe=chainer.pipe, targets=chainer.out_params)
+    if chainer(batch) != legacy_compute(batch, **legacy_kwargs):
+        raise RuntimeError('compiled and legacy chainer results differ')
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        legacy_compute(batch, **legacy_kwargs)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        chainer(batch)
+    compiled_time = time.perf_counter() - start
+
+    print(f'per call: legacy {legacy_time / args.calls * 1e6:.1f} us, '
+          f'compiled {compiled_time / args.calls * 1e6:.1f} us')
+
+
+if __name__ == '__main__':
+    main()
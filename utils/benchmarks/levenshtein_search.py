@@ -0,0 +1,134 @@
+# Copyright 2017 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import csv
+import random
+import time
+from logging import getLogger
+from typing import List, Tuple
+
+from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.models.spelling_correction.levenshtein.searcher_component import LevenshteinSearcherComponent
+
+log = getLogger(__name__)
+
+
+def _normalize(word: str) -> str:
+    return word.strip().lower().replace('ё', 'е')
+
+
+def _read_words(path: str) -> List[str]:
+    with expand_path(path).open(encoding='utf8') as f:
+        return [line.strip().split('\t')[0] for line in f if line.strip()]
+
+
+def _read_typos(path: str) -> List[Tuple[str, str]]:
+    """Read misspelled and correct words from a tsv file with a header as ``typos_custom_reader`` does."""
+    with expand_path(path).open(newline='', encoding='utf8') as f:
+        reader = csv.reader(f, delimiter='\t')
+        next(reader)
+        return [(mistake, correct) for mistake, correct in reader]
+
+
+def benchmark(words: List[str], typos: List[Tuple[str, str]], max_distance: int = 1, batch_size: int = 64,
+              sentence_length: int = 16, repeat: int = 5, cache_size: int = 100000, n_workers: int = 0,
+              seed: int = 42) -> dict:
+    """Compare token by token candidates search with batched search of :class:`LevenshteinSearcherComponent`.
+
+    Misspelled and correct words of the typos are shuffled ``repeat`` times into sentences, so words repeat
+    as in real texts.
+
+    Args:
+        words: dictionary words
+        typos: pairs of misspelled and correct words
+        max_distance: maximum allowed Damerau-Levenshtein distance between source words and candidates
+        batch_size: number of sentences in a batch
+        sentence_length: number of tokens in a sentence
+        repeat: number of times every word appears in the corpus
+        cache_size: number of most recently searched words to keep candidates for
+        n_workers: number of processes to search words missing from the cache in
+        seed: random seed of shuffling
+
+    Returns:
+        timings in seconds, tokens per second, cache hit rate and share of typos with the correct word among
+        candidates
+    """
+    start = time.time()
+    component = LevenshteinSearcherComponent(words, max_distance=max_distance, cache_size=cache_size,
+                                             n_workers=n_workers)
+    build_seconds = time.time() - start
+
+    tokens = [_normalize(word) for pair in typos for word in pair] * repeat
+    random.Random(seed).shuffle(tokens)
+    sentences = [tokens[i:i + sentence_length] for i in range(0, len(tokens), sentence_length)]
+    batches = [sentences[i:i + batch_size] for i in range(0, len(sentences), batch_size)]
+
+    # the way candidates were searched before batching: every token is searched anew
+    start = time.time()
+    unbatched = {}
+    for sentence in sentences:
+        for token in sentence:
+            if token in component._punctuation:
+                unbatched[token] = [(0, token)]
+            else:
+                unbatched[token] = component._candidates(token, component.searcher._search(token, max_distance, True))
+    unbatched_seconds = time.time() - start
+
+    start = time.time()
+    batched = {}
+    for batch in batches:
+        for sentence, candidates in zip(batch, component(batch)):
+            batched.update(zip(sentence, candidates))
+    batched_seconds = time.time() - start
+    hit_rate = component.searcher.cache.hit_rate if component.searcher.cache is not None else 0.
+    component.destroy()
+
+    for token, candidates in unbatched.items():
+        if sorted(candidates) != sorted(batched[token]):
+            raise RuntimeError(f'Batched and token by token candidates of {token} differ')
+
+    found_typos = sum(_normalize(correct) in {candidate for _, candidate in batched[_normalize(typo)]}
+                      for typo, correct in typos)
+    return {
+        'tokens': len(tokens),
+        'distinct_tokens': len(unbatched),
+        'build_seconds': build_seconds,
+        'unbatched_seconds': unbatched_seconds,
+        'batched_seconds': batched_seconds,
+        'unbatched_tokens_per_second': len(tokens) / unbatched_seconds,
+        'batched_tokens_per_second': len(tokens) / batched_seconds,
+        'cache_hit_rate': hit_rate,
+        'typos_recall': found_typos / len(typos)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark spelling correction candidates search on a typos corpus')
+    parser.add_argument('words', help='path to a dictionary file with a word in the first column of every line',
+                        type=str)
+    parser.add_argument('typos', help='path to a tsv file with a header and misspelled and correct words columns',
+                        type=str)
+    parser.add_argument('--max-distance', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--cache-size', type=int, default=100000)
+    parser.add_argument('--n-workers', type=int, default=0)
+    args = parser.parse_args()
+
+    results = benchmark(_read_words(args.words), _read_typos(args.typos),
+                        max_distance=args.max_distance, batch_size=args.batch_size, repeat=args.repeat,
+                        cache_size=args.cache_size, n_workers=args.n_workers)
+    for key, value in results.items():
+        print(f'{key}: {value:.3f}' if isinstance(value, float) else f'{key}: {value}')